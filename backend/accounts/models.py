@@ -3,9 +3,12 @@ import uuid
 
 from django.contrib.auth import get_user_model
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils.text import slugify
+from rest_framework.authtoken.models import Token
+
+from common.authentication import invalidate_token, invalidate_user_tokens
 
 
 User = get_user_model()
@@ -45,3 +48,14 @@ class UserProfile(models.Model):
 def ensure_user_profile(sender, instance, created, **_):
     if created:
         UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def drop_cached_user_tokens(sender, instance, created, **_):
+    if not created:
+        invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def drop_cached_token(sender, instance, **_):
+    invalidate_token(instance.key)
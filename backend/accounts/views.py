@@ -15,6 +15,7 @@ from accounts.serializers import (
     ProfileUpdateSerializer,
     RegisterSerializer,
 )
+from common.conditional import conditional_get, make_etag, presigned_url_epoch
 from common.throttles import AnonymousRequestThrottle
 
 
@@ -68,6 +69,24 @@ class LogoutView(APIView):
 class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def get_validators(self, request):
+        user = request.user
+        profile = user.profile
+        url_epoch = presigned_url_epoch(profile.avatar)
+        etag = make_etag(
+            "profile",
+            user.pk,
+            profile.updated_at,
+            user.username,
+            user.email,
+            user.first_name,
+            user.last_name,
+            user.is_staff,
+            url_epoch,
+        )
+        return etag, max(profile.updated_at, url_epoch) if url_epoch else profile.updated_at
+
+    @conditional_get
     def get(self, request):
         profile = request.user.profile
         serializer = ProfileSerializer(profile, context={"request": request})
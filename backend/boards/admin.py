@@ -1,10 +1,12 @@
 from django.contrib import admin
 
 from boards.models import Post
+from common.search import IndexedSearchAdminMixin
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(IndexedSearchAdminMixin, admin.ModelAdmin):
     list_display = ("title", "author", "created_at")
-    search_fields = ("title", "author__username")
+    search_fields = ("title", "body", "author__username")
+    search_index_fields = ("title", "body")
     list_filter = ("created_at",)
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from common.search import create_search_indexes, drop_search_indexes
+
+COLUMNS = ["title", "body"]
+
+
+def create_indexes(apps, schema_editor):
+    create_search_indexes(schema_editor, "boards_post", COLUMNS)
+
+
+def drop_indexes(apps, schema_editor):
+    drop_search_indexes(schema_editor, "boards_post", COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0002_copy_core_posts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -32,6 +32,7 @@ class Post(models.Model):
     body = models.TextField(blank=True)
     attachment = models.FileField(upload_to=board_attachment_upload, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     objects = PostQuerySet.as_manager()
 
@@ -1,11 +1,12 @@
 from django.urls import path
 
-from boards.views import PostDetailView, PostListCreateView
+from boards.views import PostDetailView, PostListCreateView, PostSearchView
 
 
 app_name = "boards"
 
 urlpatterns = [
     path("posts", PostListCreateView.as_view(), name="post-list"),
+    path("posts/search", PostSearchView.as_view(), name="post-search"),
     path("posts/<int:pk>", PostDetailView.as_view(), name="post-detail"),
 ]
@@ -7,6 +7,8 @@ from rest_framework.views import APIView
 
 from boards.models import Post
 from boards.serializers import PostSerializer
+from common.conditional import conditional_get, make_etag, presigned_url_epoch
+from common.search import search_page
 
 
 class PostListCreateView(APIView):
@@ -28,12 +30,40 @@ class PostListCreateView(APIView):
         )
 
 
+class PostSearchView(APIView):
+    """
+    제목/본문 검색. 최신 글부터 cursor 로 이어서 가져온다.
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 50
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            limit = self.DEFAULT_LIMIT
+        posts, next_cursor = search_page(
+            Post.objects.select_related("author", "author__profile"),
+            ["title", "body"],
+            request.query_params.get("q"),
+            max(1, min(limit, self.MAX_LIMIT)),
+            cursor=request.query_params.get("cursor"),
+        )
+        serializer = PostSerializer(posts, many=True, context={"request": request})
+        return Response({"posts": serializer.data, "next_cursor": next_cursor})
+
+
 class PostDetailView(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
     parser_classes = (MultiPartParser, FormParser, JSONParser)
 
     def get_object(self, pk):
-        return Post.objects.select_related("author", "author__profile").get(pk=pk)
+        post = getattr(self, "_post", None)
+        if post is None or post.pk != int(pk):
+            post = self._post = Post.objects.select_related("author", "author__profile").get(pk=pk)
+        return post
 
     def ensure_owner(self, request, post):
         if not request.user.is_authenticated:
@@ -42,6 +72,25 @@ class PostDetailView(APIView):
             return
         raise PermissionDenied("본인 게시글만 수정 또는 삭제할 수 있습니다.")
 
+    def get_validators(self, request, pk):
+        post = self.get_object(pk)
+        author = post.author
+        url_epoch = presigned_url_epoch(post.attachment)
+        etag = make_etag(
+            "post",
+            post.pk,
+            post.updated_at,
+            author.pk,
+            author.username,
+            author.email,
+            author.first_name,
+            author.last_name,
+            author.is_staff,
+            url_epoch,
+        )
+        return etag, max(post.updated_at, url_epoch) if url_epoch else post.updated_at
+
+    @conditional_get
     def get(self, request, pk):
         post = self.get_object(pk)
         serializer = PostSerializer(post, context={"request": request})
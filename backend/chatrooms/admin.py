@@ -1,32 +1,72 @@
 from django.contrib import admin
+from django.db import transaction
 
-from chatrooms.models import ChatMessage, ChatRoom, ChatRoomMembership
+from chatrooms.history import forget_deleted_messages
+from chatrooms.membership import leave_room
+from chatrooms.models import ChatArchiveSegment, ChatMessage, ChatRoom, ChatRoomMembership
+from common.search import IndexedSearchAdminMixin
 
 
 @admin.register(ChatRoom)
 class ChatRoomAdmin(admin.ModelAdmin):
-    list_display = ("name", "owner", "capacity", "is_private", "current_members")
+    list_display = ("name", "owner", "capacity", "is_private", "member_count")
     search_fields = ("name",)
     list_filter = ("is_private",)
 
-    @admin.display(description="현재 인원")
-    def current_members(self, obj):
-        return obj.memberships.count()
-
 
 @admin.register(ChatRoomMembership)
 class ChatRoomMembershipAdmin(admin.ModelAdmin):
     list_display = ("room", "user", "joined_at")
     search_fields = ("room__name", "user__username")
     list_filter = ("joined_at",)
+    list_select_related = ("room", "user")
+
+    # 입장은 정원 검사가 있는 join_room 으로만 한다. 관리자 화면에서 행을 직접 만들거나 바꾸면 member_count 가 어긋난다.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def delete_model(self, request, obj):
+        leave_room(obj.room, obj.user)
+
+    def delete_queryset(self, request, queryset):
+        for membership in queryset.select_related("room", "user"):
+            leave_room(membership.room, membership.user)
 
 
 @admin.register(ChatMessage)
-class ChatMessageAdmin(admin.ModelAdmin):
+class ChatMessageAdmin(IndexedSearchAdminMixin, admin.ModelAdmin):
     list_display = ("room", "actual_user", "display_name", "is_anonymous", "created_at")
     search_fields = ("user__username", "content", "room__name")
+    search_index_fields = ("content",)
     list_filter = ("is_anonymous", "created_at", "room")
 
     @admin.display(description="실제 사용자")
     def actual_user(self, obj):
         return obj.user.username
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(lambda: forget_deleted_messages([obj.room_id]))
+
+    def delete_queryset(self, request, queryset):
+        room_ids = list(queryset.order_by().values_list("room_id", flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(lambda: forget_deleted_messages(room_ids))
+
+
+@admin.register(ChatArchiveSegment)
+class ChatArchiveSegmentAdmin(admin.ModelAdmin):
+    list_display = ("room", "path", "message_count", "first_created_at", "last_created_at")
+    search_fields = ("room__name", "path")
+    readonly_fields = (
+        "room",
+        "path",
+        "message_count",
+        "first_created_at",
+        "first_message_id",
+        "last_created_at",
+        "last_message_id",
+    )
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_migrate
 
 
 class ChatroomsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chatrooms'
+
+    def ready(self):
+        from chatrooms import signals
+        from chatrooms.inbox import update_last_messages
+        from chatrooms.sequences import check_room_seqs
+        from common.scheduler import register_job
+        from common.write_behind import register_after_flush
+
+        post_migrate.connect(signals.bootstrap_default_room, sender=self)
+        register_after_flush("chatrooms.chatmessage", update_last_messages)
+        register_job("chat-seq-check", check_room_seqs, getattr(settings, "CHAT_SEQ_CHECK_INTERVAL_SECONDS", 3600))
@@ -0,0 +1,259 @@
+import json
+import mmap
+import uuid
+import zlib
+from functools import lru_cache
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from chatrooms.models import ChatArchiveSegment, ChatMessage, ChatRoom
+from common.storage import get_archive_storage
+
+BLOCK_SIZE = 64
+SEGMENT_MAX_MESSAGES = 5000
+
+
+def _record(message):
+    return {
+        "id": message.id,
+        "seq": message.seq,
+        "user_id": message.user_id,
+        "username": message.user.username,
+        "content": message.content,
+        "is_anonymous": message.is_anonymous,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def build_segment(messages):
+    """
+    오래된 순으로 정렬된 메시지를 BLOCK_SIZE 개씩 zlib 블록으로 압축해 이어 붙인다.
+    반환값은 (세그먼트 바이트, 블록 오프셋 인덱스 JSON 바이트) 이다.
+    """
+    return _pack([_record(message) for message in messages])
+
+
+def _pack(records):
+    data = bytearray()
+    blocks = []
+    for start in range(0, len(records), BLOCK_SIZE):
+        chunk = records[start : start + BLOCK_SIZE]
+        lines = "\n".join(json.dumps(record, ensure_ascii=False) for record in chunk)
+        payload = zlib.compress(lines.encode(), 6)
+        blocks.append(
+            {
+                "offset": len(data),
+                "length": len(payload),
+                "count": len(chunk),
+                "first": [chunk[0]["created_at"], chunk[0]["id"]],
+                "last": [chunk[-1]["created_at"], chunk[-1]["id"]],
+                "min_id": min(record["id"] for record in chunk),
+                "max_id": max(record["id"] for record in chunk),
+            }
+        )
+        data += payload
+    return bytes(data), json.dumps({"version": 1, "blocks": blocks}).encode()
+
+
+def _delete_messages(ids):
+    """
+    행마다 post_delete 시그널(히스토리 버퍼 무효화)이 돌지 않도록 직접 DELETE 한다.
+    버퍼 무효화는 호출하는 쪽에서 방마다 한 번 한다.
+    """
+    table = connection.ops.quote_name(ChatMessage._meta.db_table)
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+
+
+def archive_room_messages(room_id, cutoff, segment_size=SEGMENT_MAX_MESSAGES):
+    """
+    cutoff 이전 메시지를 segment_size 개씩 세그먼트 파일로 옮기고 DB 에서 지운다. 옮긴 개수를 돌려준다.
+    파일을 먼저 쓰고 세그먼트 등록과 삭제를 한 트랜잭션으로 처리하므로, 실패해도 메시지는 유실되지 않는다.
+    트랜잭션이 실패하면 방금 쓴 파일을 지운다. 방의 archived_through 도 같은 트랜잭션에서 옮긴다.
+    """
+    storage = get_archive_storage()
+    archived = 0
+    while True:
+        messages = list(
+            ChatMessage.objects.filter(room_id=room_id, created_at__lt=cutoff)
+            .select_related("user")
+            .order_by("created_at", "id")[:segment_size]
+        )
+        if not messages:
+            return archived
+        data, index = build_segment(messages)
+        first, last = messages[0], messages[-1]
+        path = f"rooms/{room_id}/{first.created_at:%Y%m%d%H%M%S%f}-{first.id}.seg"
+        storage.save(path, data)
+        storage.save(f"{path}.idx", index)
+        try:
+            with transaction.atomic():
+                ChatArchiveSegment.objects.create(
+                    room_id=room_id,
+                    path=path,
+                    message_count=len(messages),
+                    first_created_at=first.created_at,
+                    first_message_id=first.id,
+                    last_created_at=last.created_at,
+                    last_message_id=last.id,
+                ).authors.add(*{message.user_id for message in messages})
+                _delete_messages([message.id for message in messages])
+                ChatRoom.objects.filter(pk=room_id).update(archived_through=last.created_at)
+        except Exception:
+            storage.delete(path)
+            storage.delete(f"{path}.idx")
+            raise
+        archived += len(messages)
+
+
+def purge_archived_users(user_ids, segment_ids):
+    """
+    탈퇴한 사용자들의 메시지를 아카이브에서 지운다. 세그먼트 파일은 불변이므로 남은 메시지로 새 경로에 다시 쓰고
+    행을 옮긴 뒤 옛 파일을 지운다. 남는 메시지가 없으면 세그먼트를 지운다. 손댄 방 ID 집합을 돌려준다.
+    """
+    storage = get_archive_storage()
+    room_ids = set()
+    for segment in ChatArchiveSegment.objects.filter(pk__in=segment_ids):
+        room_ids.add(segment.room_id)
+        records = [
+            record
+            for block in _load_index(segment.path)
+            for record in _read_block(segment.path, block)
+            if record["user_id"] not in user_ids
+        ]
+        if not records:
+            segment.delete()
+            continue
+        data, index = _pack(records)
+        first, last = records[0], records[-1]
+        old_path = segment.path
+        path = f"rooms/{segment.room_id}/{parse_datetime(first['created_at']):%Y%m%d%H%M%S%f}-{first['id']}-{uuid.uuid4().hex[:8]}.seg"
+        storage.save(path, data)
+        storage.save(f"{path}.idx", index)
+        try:
+            ChatArchiveSegment.objects.filter(pk=segment.pk).update(
+                path=path,
+                message_count=len(records),
+                first_created_at=parse_datetime(first["created_at"]),
+                first_message_id=first["id"],
+                last_created_at=parse_datetime(last["created_at"]),
+                last_message_id=last["id"],
+            )
+        except Exception:
+            storage.delete(path)
+            storage.delete(f"{path}.idx")
+            raise
+        storage.delete(old_path)
+        storage.delete(f"{old_path}.idx")
+    return room_ids
+
+
+def segment_author_ids(path):
+    """
+    세그먼트 파일에 든 메시지의 작성자 ID 집합. 기존 세그먼트의 authors 를 채우는 마이그레이션에서 쓴다.
+    """
+    return {record["user_id"] for block in _load_index(path) for record in _read_block(path, block)}
+
+
+@lru_cache(maxsize=512)
+def _load_index(path):
+    with open(get_archive_storage().local_path(f"{path}.idx"), "rb") as handle:
+        raw = json.load(handle)
+    return [
+        {
+            **block,
+            "first": (parse_datetime(block["first"][0]), block["first"][1]),
+            "last": (parse_datetime(block["last"][0]), block["last"][1]),
+        }
+        for block in raw["blocks"]
+    ]
+
+
+def _read_block(path, block):
+    with open(get_archive_storage().local_path(path), "rb") as handle:
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            payload = mapped[block["offset"] : block["offset"] + block["length"]]
+    return [json.loads(line) for line in zlib.decompress(payload).decode().split("\n")]
+
+
+def _to_message(room_id, record):
+    user = get_user_model()(id=record["user_id"], username=record["username"])
+    return ChatMessage(
+        id=record["id"],
+        room_id=room_id,
+        user=user,
+        content=record["content"],
+        is_anonymous=record["is_anonymous"],
+        seq=record["seq"],
+        created_at=parse_datetime(record["created_at"]),
+    )
+
+
+def read_archived_before(room, key, count):
+    """
+    (created_at, id) 가 key 보다 오래된 아카이브 메시지를 최신 순으로 count 개까지 돌려준다. key 가 None 이면 가장 최근부터.
+    """
+    if count <= 0 or room.archived_through is None:
+        return []
+    room_id = room.pk
+    segments = ChatArchiveSegment.objects.filter(room_id=room_id)
+    if key is not None:
+        segments = segments.filter(first_created_at__lte=key[0])
+    messages = []
+    for segment in segments.order_by("-last_created_at", "-last_message_id"):
+        for block in reversed(_load_index(segment.path)):
+            if key is not None and block["first"] >= key:
+                continue
+            for record in reversed(_read_block(segment.path, block)):
+                message = _to_message(room_id, record)
+                if key is not None and (message.created_at, message.id) >= key:
+                    continue
+                messages.append(message)
+                if len(messages) >= count:
+                    return messages
+    return messages
+
+
+def read_archived_after(room, key, count):
+    """
+    key 보다 새로운 아카이브 메시지를 오래된 순으로 count 개까지 돌려준다.
+    key 가 archived_through 보다 새로우면(보통의 최신 메시지 폴링) 세그먼트를 조회하지 않는다.
+    """
+    if count <= 0 or room.archived_through is None or key[0] > room.archived_through:
+        return []
+    room_id = room.pk
+    segments = ChatArchiveSegment.objects.filter(room_id=room_id, last_created_at__gte=key[0])
+    messages = []
+    for segment in segments.order_by("first_created_at", "first_message_id"):
+        for block in _load_index(segment.path):
+            if block["last"] <= key:
+                continue
+            for record in _read_block(segment.path, block):
+                message = _to_message(room_id, record)
+                if (message.created_at, message.id) <= key:
+                    continue
+                messages.append(message)
+                if len(messages) >= count:
+                    return messages
+    return messages
+
+
+def find_archived_key(room, message_id):
+    """
+    숫자 ID 커서가 아카이브된 메시지를 가리킬 때 (created_at, id) 를 찾는다. 없으면 None.
+    """
+    if room.archived_through is None:
+        return None
+    room_id = room.pk
+    for segment in ChatArchiveSegment.objects.filter(room_id=room_id):
+        for block in _load_index(segment.path):
+            if not block["min_id"] <= message_id <= block["max_id"]:
+                continue
+            for record in _read_block(segment.path, block):
+                if record["id"] == message_id:
+                    return parse_datetime(record["created_at"]), message_id
+    return None
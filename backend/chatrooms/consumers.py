@@ -1,15 +1,40 @@
+import asyncio
+import json
 import logging
 from types import SimpleNamespace
 from urllib.parse import parse_qs
 
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
-from django.contrib.auth.models import AnonymousUser
-from rest_framework.authtoken.models import Token
+from django.conf import settings
 from rest_framework.exceptions import ValidationError
 
+from chatrooms.history import (
+    is_staff_viewer,
+    load_missed_history,
+    load_recent_history,
+    project_entries,
+    record_message,
+)
+from chatrooms.inbox import (
+    inbox_room_group,
+    inbox_user_group,
+    load_inbox,
+    mark_read,
+    notify_read,
+    notify_room_activity,
+    unread_count,
+)
 from chatrooms.models import ChatMessage, ChatRoom, ChatRoomMembership
+from chatrooms.pagination import encode_message_cursor, paginate_room_messages
+from chatrooms.presence import get_presence, parse_member, presence_member
+from chatrooms.sequences import next_room_seq
 from chatrooms.serializers import ChatMessageSerializer
+from common import write_behind
+from common.outbound import OutboundFlowControlMixin
+from common.rate_limit import RateLimitedConsumerMixin
+from common.typing import typing_coalescer
 
 logger = logging.getLogger(__name__)
 
@@ -18,13 +43,34 @@ def _room_group_name(room_id):
     return f"chatroom_{room_id}"
 
 
-class ChatRoomConsumer(AsyncJsonWebsocketConsumer):
+def _validation_detail(exc):
+    detail = exc.detail
+    if isinstance(detail, dict):
+        detail = next(iter(detail.values()))
+    if isinstance(detail, list):
+        detail = detail[0]
+    return detail
+
+
+def _encode_message_frames(entry):
+    """
+    브로드캐스트 프레임을 보내는 쪽에서 한 번만 인코딩한다.
+    익명 메시지가 아니면 운영자용 프레임이 일반 프레임과 같으므로 하나만 싣는다.
+    """
+    frames = {"regular": json.dumps({"event": "message", "message": entry["regular"]}, ensure_ascii=False)}
+    if entry["staff"] != entry["regular"]:
+        frames["staff"] = json.dumps({"event": "message", "message": entry["staff"]}, ensure_ascii=False)
+    return frames
+
+
+class ChatRoomConsumer(OutboundFlowControlMixin, RateLimitedConsumerMixin, AsyncJsonWebsocketConsumer):
     """
     공개/비공개 채팅방 공용 WebSocket consumer.
     방에 입장한 사용자끼리만 실시간 메시지를 주고받는다.
     """
 
     HISTORY_LIMIT = 80
+    rate_limit_scope = "chatroom"
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -32,10 +78,15 @@ class ChatRoomConsumer(AsyncJsonWebsocketConsumer):
         self.room = None
         self.room_id = None
         self.room_group_name = None
+        self.viewer_class = "regular"
+        self.presence_member = None
+        self.heartbeat_task = None
+        self.read_seq = 0
+        self.persisted_read_seq = 0
 
     async def connect(self):
         self.room_id = self.scope.get("url_route", {}).get("kwargs", {}).get("room_id")
-        self.user = await database_sync_to_async(self._authenticate_from_scope)()
+        self.user = self.scope.get("user")
         if not self.user or not self.user.is_authenticated:
             await self.close(code=4401)
             return
@@ -54,29 +105,101 @@ class ChatRoomConsumer(AsyncJsonWebsocketConsumer):
             await self.close(code=4403)
             return
 
+        self.viewer_class = "staff" if is_staff_viewer(self.user) else "regular"
         self.room_group_name = _room_group_name(self.room_id)
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
-        await self.send_history()
+        last_seq = self._query_params().get("last_seq", [None])[0]
+        if last_seq is not None:
+            await self.send_resume(last_seq)
+        else:
+            await self.send_history()
+        self.read_seq = self.room.last_message_seq
+        await self.flush_read_marker()
+        await self.enter_presence()
 
     async def disconnect(self, code):
+        if self.room is not None:
+            await self.flush_read_marker()
+        await self.leave_presence()
         if self.room_group_name:
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 
-    def _authenticate_from_scope(self):
+    async def enter_presence(self):
+        self.presence_member = presence_member(self.user)
+        first = await sync_to_async(get_presence().join, thread_sensitive=False)(self.room.id, self.presence_member)
+        self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        await self.send_presence()
+        if first:
+            await self._broadcast_presence_change("joined")
+
+    async def leave_presence(self):
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+            self.heartbeat_task = None
+        if not self.presence_member:
+            return
+        last = await sync_to_async(get_presence().leave, thread_sensitive=False)(self.room.id, self.presence_member)
+        if last:
+            await self._broadcast_presence_change("left")
+        self.presence_member = None
+
+    async def _heartbeat_loop(self):
+        interval = getattr(settings, "CHAT_PRESENCE_HEARTBEAT_SECONDS", 20)
+        presence = get_presence()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await sync_to_async(presence.heartbeat, thread_sensitive=False)(self.room.id, self.presence_member)
+                await self.flush_read_marker()
+            except Exception:
+                logger.exception("presence heartbeat 실패 (room=%s)", self.room_id)
+
+    async def flush_read_marker(self):
+        """
+        이 소켓으로 받은 메시지까지를 읽음으로 기록한다. 메시지마다 쓰지 않고 입장/heartbeat/퇴장 때 한 번에 쓴다.
+        """
+        seq = self.read_seq
+        if seq <= self.persisted_read_seq:
+            return
+        await database_sync_to_async(mark_read, thread_sensitive=False)(self.room.id, self.user.id, seq)
+        self.persisted_read_seq = seq
+        await notify_read(self.channel_layer, self.user.id, self.room.id, seq)
+
+    async def _broadcast_presence_change(self, change):
+        count = await sync_to_async(get_presence().online_counts, thread_sensitive=False)([self.room.id])
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                "type": "chatroom.presence",
+                "room_id": self.room.id,
+                "change": change,
+                "member": parse_member(self.presence_member),
+                "online_count": count.get(self.room.id, 0),
+            },
+        )
+
+    async def send_presence(self):
+        members = await sync_to_async(get_presence().online_members, thread_sensitive=False)(self.room.id)
+        parsed = [parse_member(member) for member in members]
+        await self.send_json({"event": "presence", "online_count": len(parsed), "members": parsed})
+
+    async def chatroom_presence(self, event):
+        await self.send_droppable_json(
+            {
+                "event": "presence_update",
+                "change": event["change"],
+                "member": event["member"],
+                "online_count": event["online_count"],
+            }
+        )
+
+    def _query_params(self):
         query = self.scope.get("query_string", b"")
         try:
-            params = parse_qs(query.decode())
+            return parse_qs(query.decode())
         except Exception:
-            return AnonymousUser()
-        token_key = params.get("token", [None])[0]
-        if not token_key:
-            return AnonymousUser()
-        try:
-            token = Token.objects.select_related("user").get(key=token_key)
-        except Token.DoesNotExist:
-            return AnonymousUser()
-        return token.user if token.user.is_active else AnonymousUser()
+            return {}
 
     def _get_room(self):
         try:
@@ -94,11 +217,25 @@ class ChatRoomConsumer(AsyncJsonWebsocketConsumer):
         if not action:
             await self.send_error("action 필드가 필요합니다.")
             return
+        if await self.handle_flow_ack(content):
+            return
+        if action == "typing":
+            await self.handle_typing(content)
+            return
+        if not await self.enforce_rate_limit(action):
+            return
 
         if action == "send_message":
             await self.handle_send_message(content)
         elif action == "fetch_history":
-            await self.send_history()
+            if content.get("last_seq") is not None:
+                await self.send_resume(content.get("last_seq"))
+            elif content.get("before_id") or content.get("after_id"):
+                await self.send_history_page(content)
+            else:
+                await self.send_history()
+        elif action == "fetch_presence":
+            await self.send_presence()
         else:
             await self.send_error(f"알 수 없는 action: {action}")
 
@@ -109,47 +246,108 @@ class ChatRoomConsumer(AsyncJsonWebsocketConsumer):
             return
         is_anonymous = bool(content.get("is_anonymous"))
         try:
-            payload = await self._create_message(text, is_anonymous)
+            entry = await self._create_message(text, is_anonymous)
         except ValidationError as exc:
-            detail = exc.detail
-            if isinstance(detail, dict):
-                detail = next(iter(detail.values()))[0]
-            elif isinstance(detail, list):
-                detail = detail[0]
-            await self.send_error(detail or "메시지를 전송하지 못했습니다.")
+            await self.send_error(_validation_detail(exc) or "메시지를 전송하지 못했습니다.")
             return
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 "type": "chatroom.broadcast",
-                "message": payload,
+                "room_id": self.room.id,
+                "seq": entry["regular"]["seq"],
+                "frames": _encode_message_frames(entry),
+            },
+        )
+        await notify_room_activity(self.channel_layer, self.room.id, entry, self.user.id)
+
+    async def handle_typing(self, content):
+        """
+        DB 를 거치지 않고 channel layer 로만 퍼뜨린다. 익명 입력이면 일반 사용자에게는 이름을 숨긴다.
+        """
+        if not typing_coalescer.allow(self.room_group_name, self.user.id):
+            return
+        staff = {"event": "typing", "user": {"id": self.user.id, "username": self.user.username}}
+        regular = {"event": "typing", "user": None} if content.get("is_anonymous") else staff
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                "type": "chatroom.typing",
+                "room_id": self.room.id,
+                "sender_channel": self.channel_name,
+                "frames": {"regular": regular, "staff": staff},
             },
         )
 
+    async def chatroom_typing(self, event):
+        if event["sender_channel"] == self.channel_name:
+            return
+        await self.send_droppable_json(event["frames"].get(self.viewer_class) or event["frames"]["regular"])
+
     async def send_history(self):
         messages = await self._fetch_recent_messages()
-        await self.send_json({"event": "history", "messages": messages})
+        prev_cursor = None
+        if len(messages) >= self.HISTORY_LIMIT:
+            prev_cursor = encode_message_cursor(messages[0])
+        await self.send_json({"event": "history", "messages": messages, "prev_cursor": prev_cursor})
+
+    async def send_resume(self, last_seq):
+        try:
+            last_seq = int(last_seq)
+        except (TypeError, ValueError):
+            await self.send_history()
+            return
+        messages = await database_sync_to_async(self._serialize_missed_messages)(last_seq)
+        if messages is None:
+            await self.send_json({"event": "resume_failed", "last_seq": last_seq})
+            await self.send_history()
+            return
+        await self.send_json({"event": "resume", "last_seq": last_seq, "messages": messages})
+
+    async def send_history_page(self, content):
+        try:
+            page = await database_sync_to_async(self._paginate_messages)(
+                content.get("before_id"),
+                content.get("after_id"),
+                content.get("limit"),
+            )
+        except ValidationError as exc:
+            await self.send_error(_validation_detail(exc) or "대화 기록을 불러오지 못했습니다.")
+            return
+        await self.send_json({"event": "history_page", **page})
 
     async def chatroom_broadcast(self, event):
-        await self.send_json({"event": "message", "message": event.get("message")})
+        self.read_seq = max(self.read_seq, event.get("seq") or 0)
+        frames = event["frames"]
+        await self.send(text_data=frames.get(self.viewer_class) or frames["regular"])
 
     async def _fetch_recent_messages(self):
         return await database_sync_to_async(self._serialize_recent_messages)()
 
     def _serialize_recent_messages(self):
-        queryset = (
-            ChatMessage.objects.filter(room=self.room)
-            .select_related("user")
-            .order_by("-created_at")[: self.HISTORY_LIMIT]
+        entries = load_recent_history(self.room, self.HISTORY_LIMIT)
+        return project_entries(entries, self.viewer_class == "staff")
+
+    def _serialize_missed_messages(self, last_seq):
+        entries = load_missed_history(self.room, last_seq, self.HISTORY_LIMIT)
+        if entries is None:
+            return None
+        return project_entries(entries, self.viewer_class == "staff")
+
+    def _paginate_messages(self, before, after, limit):
+        try:
+            limit = max(1, min(int(limit or self.HISTORY_LIMIT), self.HISTORY_LIMIT))
+        except (TypeError, ValueError):
+            limit = self.HISTORY_LIMIT
+        messages, prev_cursor, next_cursor = paginate_room_messages(
+            self.room, limit, before=before, after=after
         )
-        messages = list(queryset)
-        messages.reverse()
         serializer = ChatMessageSerializer(
             messages,
             many=True,
             context={"request": SimpleNamespace(user=self.user)},
         )
-        return serializer.data
+        return {"messages": serializer.data, "prev_cursor": prev_cursor, "next_cursor": next_cursor}
 
     async def _create_message(self, content, is_anonymous):
         return await database_sync_to_async(self._create_message_sync)(content, is_anonymous)
@@ -160,11 +358,117 @@ class ChatRoomConsumer(AsyncJsonWebsocketConsumer):
             context={"request": SimpleNamespace(user=self.user), "room": self.room},
         )
         serializer.is_valid(raise_exception=True)
-        message = serializer.save()
-        return ChatMessageSerializer(
-            message,
-            context={"request": SimpleNamespace(user=self.user)},
-        ).data
+        if write_behind.is_enabled():
+            message = write_behind.enqueue(
+                ChatMessage(
+                    room=self.room,
+                    user=self.user,
+                    seq=next_room_seq(self.room.id),
+                    **serializer.validated_data,
+                )
+            )
+            return record_message(message, deferred=True)
+        return record_message(serializer.save())
+
+    async def send_error(self, detail):
+        await self.send_json({"event": "error", "detail": detail})
+
+
+class InboxConsumer(OutboundFlowControlMixin, RateLimitedConsumerMixin, AsyncJsonWebsocketConsumer):
+    """
+    내가 속한 방 목록(미리보기/안 읽은 수)을 받고, 이후 변화만 "unread" 이벤트로 받는 consumer.
+    방 활동은 방별 inbox 그룹으로, 다른 소켓에서 읽은 위치는 사용자 그룹으로 전달된다.
+    """
+
+    rate_limit_scope = "inbox"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = None
+        self.unread_state = {}
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+        await self.channel_layer.group_add(inbox_user_group(self.user.id), self.channel_name)
+        await self.accept()
+        await self.send_inbox()
+
+    async def disconnect(self, code):
+        if not self.user or not self.user.is_authenticated:
+            return
+        for room_id in self.unread_state:
+            await self.channel_layer.group_discard(inbox_room_group(room_id), self.channel_name)
+        await self.channel_layer.group_discard(inbox_user_group(self.user.id), self.channel_name)
+        self.unread_state = {}
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get("action")
+        if not action:
+            await self.send_error("action 필드가 필요합니다.")
+            return
+        if await self.handle_flow_ack(content):
+            return
+        if not await self.enforce_rate_limit(action):
+            return
+
+        if action == "fetch_inbox":
+            await self.send_inbox()
+        elif action == "mark_read":
+            await self.handle_mark_read(content)
+        else:
+            await self.send_error(f"알 수 없는 action: {action}")
+
+    async def send_inbox(self):
+        rooms, state = await database_sync_to_async(load_inbox)(self.user)
+        for room_id in self.unread_state.keys() - state.keys():
+            await self.channel_layer.group_discard(inbox_room_group(room_id), self.channel_name)
+        for room_id in state.keys() - self.unread_state.keys():
+            await self.channel_layer.group_add(inbox_room_group(room_id), self.channel_name)
+        self.unread_state = state
+        await self.send_json({"event": "inbox", "rooms": rooms})
+
+    async def handle_mark_read(self, content):
+        try:
+            room_id, seq = int(content.get("room_id")), int(content.get("seq"))
+        except (TypeError, ValueError):
+            await self.send_error("room_id 와 seq 가 필요합니다.")
+            return
+        state = self.unread_state.get(room_id)
+        if state is None:
+            await self.send_error("참여하지 않은 채팅방입니다.")
+            return
+        seq = min(seq, state[0])
+        if await database_sync_to_async(mark_read)(room_id, self.user.id, seq):
+            await notify_read(self.channel_layer, self.user.id, room_id, seq)
+
+    async def send_unread(self, room_id, **extra):
+        state = self.unread_state[room_id]
+        await self.send_json(
+            {"event": "unread", "room_id": room_id, "unread_count": unread_count(*state), **extra}
+        )
+
+    async def inbox_activity(self, event):
+        state = self.unread_state.get(event["room_id"])
+        if state is None:
+            return
+        seq = event["last_message"]["seq"]
+        state[0] = max(state[0], seq)
+        if event["sender_id"] == self.user.id:
+            state[1] = max(state[1], seq)
+        await self.send_unread(event["room_id"], last_message=event["last_message"])
+
+    async def inbox_read(self, event):
+        state = self.unread_state.get(event["room_id"])
+        if state is None or event["last_read_seq"] <= state[1]:
+            return
+        state[1] = event["last_read_seq"]
+        await self.send_unread(event["room_id"], last_read_seq=state[1])
+
+    async def inbox_membership(self, event):
+        await self.send_inbox()
 
     async def send_error(self, detail):
         await self.send_json({"event": "error", "detail": detail})
@@ -0,0 +1,273 @@
+import json
+import threading
+from collections import deque
+from types import SimpleNamespace
+
+from django.conf import settings
+
+from chatrooms.archive import read_archived_before
+from chatrooms.inbox import refresh_last_message, update_last_message
+from chatrooms.models import ChatMessage
+from chatrooms.serializers import ChatMessageSerializer
+from common.redis_client import get_redis_client
+
+
+def _viewer_context(is_staff):
+    viewer = SimpleNamespace(is_staff=is_staff, is_superuser=False, is_authenticated=True)
+    return {"request": SimpleNamespace(user=viewer)}
+
+
+def is_staff_viewer(user):
+    return bool(user and (user.is_staff or user.is_superuser))
+
+
+def serialize_message_entry(message):
+    """
+    메시지를 일반 사용자용/운영자용 두 가지 형태로 한 번에 직렬화한다.
+    익명 메시지가 아니면 두 형태가 같으므로 직렬화도 한 번만 한다.
+    """
+    regular = dict(ChatMessageSerializer(message, context=_viewer_context(False)).data)
+    staff = regular
+    if message.is_anonymous:
+        staff = dict(ChatMessageSerializer(message, context=_viewer_context(True)).data)
+    return {"regular": regular, "staff": staff}
+
+
+def project_entries(entries, is_staff):
+    key = "staff" if is_staff else "regular"
+    return [entry[key] for entry in entries]
+
+
+def _entry_seq(entry):
+    return entry["regular"].get("seq")
+
+
+def merge_appended(entries, appended):
+    """
+    DB 에서 읽은 entries 뒤에, 채우는 동안 append 된 메시지 중 entries 에 없는(seq 가 더 큰) 것만 붙인다.
+    """
+    seqs = [seq for seq in map(_entry_seq, entries) if seq is not None]
+    newest = max(seqs) if seqs else -1
+    return list(entries) + [entry for entry in appended if _entry_seq(entry) is None or _entry_seq(entry) > newest]
+
+
+class InMemoryHistoryBuffer:
+    """
+    REDIS_URL 이 없는 단일 프로세스(개발) 환경용 링 버퍼.
+    begin_fill 과 fill 사이에 들어온 append 는 따로 모아 두었다가 fill 때 seq 기준으로 합친다.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._rooms = {}
+        self._filling = {}
+        self._lock = threading.Lock()
+
+    def get(self, room_id):
+        with self._lock:
+            buffer = self._rooms.get(room_id)
+            return list(buffer) if buffer is not None else None
+
+    def begin_fill(self, room_id):
+        with self._lock:
+            if room_id not in self._rooms:
+                self._filling.setdefault(room_id, [])
+
+    def fill(self, room_id, entries):
+        with self._lock:
+            appended = self._filling.pop(room_id, None)
+            if appended is None or room_id in self._rooms:
+                return
+            self._rooms[room_id] = deque(merge_appended(entries, appended), maxlen=self.size)
+
+    def append(self, room_id, entry):
+        with self._lock:
+            buffer = self._rooms.get(room_id)
+            if buffer is not None:
+                buffer.append(entry)
+            elif room_id in self._filling:
+                self._filling[room_id].append(entry)
+
+    def invalidate(self, room_id):
+        with self._lock:
+            self._rooms.pop(room_id, None)
+            self._filling.pop(room_id, None)
+
+
+class RedisHistoryBuffer:
+    """
+    방마다 Redis list 하나를 링 버퍼로 쓴다.
+    append 는 RPUSHX 이므로 아직 채워지지 않은(cold) 방에는 부분 기록이 남지 않는다.
+    DB 를 읽기 전에 begin_fill 이 FILLING 표식만 든 list 를 만들어 두면, 그동안의 append 가 표식 뒤에 쌓이고
+    fill 이 DB 결과와 seq 기준으로 합친다. 표식이 없어졌으면(invalidate, 다른 프로세스가 먼저 채움) fill 은 버린다.
+    메시지가 없는 방은 EMPTY 표식 하나로 채워 다음 조회가 DB 와 아카이브를 다시 읽지 않게 한다.
+    """
+
+    KEY_PREFIX = "chat:history"
+    FILLING = "__filling__"
+    EMPTY = "__empty__"
+
+    BEGIN_FILL_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        return 0
+    end
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+    """
+
+    FILL_SCRIPT = """
+    if redis.call('LINDEX', KEYS[1], 0) ~= ARGV[1] then
+        return 0
+    end
+    local appended = redis.call('LRANGE', KEYS[1], 1, -1)
+    local newest = tonumber(ARGV[5])
+    redis.call('DEL', KEYS[1])
+    for i = 6, #ARGV do
+        redis.call('RPUSH', KEYS[1], ARGV[i])
+    end
+    for _, item in ipairs(appended) do
+        local seq = cjson.decode(item)['regular']['seq']
+        if type(seq) ~= 'number' or seq > newest then
+            redis.call('RPUSH', KEYS[1], item)
+        end
+    end
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        redis.call('RPUSH', KEYS[1], ARGV[2])
+    end
+    redis.call('LTRIM', KEYS[1], -tonumber(ARGV[4]), -1)
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return 1
+    """
+
+    FILL_MARK_TTL = 30
+
+    def __init__(self, client, size, ttl):
+        self.client = client
+        self.size = size
+        self.ttl = ttl
+        self._begin_fill = client.register_script(self.BEGIN_FILL_SCRIPT)
+        self._fill = client.register_script(self.FILL_SCRIPT)
+
+    def _key(self, room_id):
+        return f"{self.KEY_PREFIX}:{room_id}"
+
+    def get(self, room_id):
+        raw = self.client.lrange(self._key(room_id), 0, -1)
+        if not raw or raw[0] == self.FILLING:
+            return None
+        if raw[0] == self.EMPTY:
+            raw = raw[1:]
+        return [json.loads(item) for item in raw]
+
+    def begin_fill(self, room_id):
+        self._begin_fill(keys=[self._key(room_id)], args=[self.FILLING, self.FILL_MARK_TTL])
+
+    def fill(self, room_id, entries):
+        seqs = [seq for seq in map(_entry_seq, entries) if seq is not None]
+        payload = [json.dumps(entry, ensure_ascii=False) for entry in entries[-self.size :]]
+        self._fill(
+            keys=[self._key(room_id)],
+            args=[self.FILLING, self.EMPTY, self.ttl, self.size, max(seqs) if seqs else -1, *payload],
+        )
+
+    def append(self, room_id, entry):
+        key = self._key(room_id)
+        pipe = self.client.pipeline()
+        pipe.rpushx(key, json.dumps(entry, ensure_ascii=False))
+        pipe.ltrim(key, -self.size, -1)
+        pipe.expire(key, self.ttl, xx=True)
+        pipe.execute()
+
+    def invalidate(self, room_id):
+        self.client.delete(self._key(room_id))
+
+
+_history_buffer = None
+
+
+def get_history_buffer():
+    global _history_buffer
+    if _history_buffer is None:
+        size = getattr(settings, "CHAT_HISTORY_BUFFER_SIZE", 80)
+        client = get_redis_client()
+        if client is not None:
+            ttl = getattr(settings, "CHAT_HISTORY_BUFFER_TTL_SECONDS", 3600)
+            _history_buffer = RedisHistoryBuffer(client, size, ttl)
+        else:
+            _history_buffer = InMemoryHistoryBuffer(size)
+    return _history_buffer
+
+
+def load_recent_history(room, limit):
+    """
+    버퍼에서 최근 메시지를 읽고, 비어 있으면 DB(모자라면 아카이브까지)에서 한 번 읽어 버퍼를 채운다.
+    반환값은 serialize_message_entry 형태의 목록(오래된 순)이다.
+    """
+    room_id = room.pk
+    buffer = get_history_buffer()
+    entries = buffer.get(room_id)
+    if entries is None:
+        buffer.begin_fill(room_id)
+        wanted = max(limit, buffer.size)
+        messages = list(
+            ChatMessage.objects.filter(room_id=room_id)
+            .select_related("user")
+            .order_by("-created_at", "-id")[:wanted]
+        )
+        if len(messages) < wanted:
+            boundary = (messages[-1].created_at, messages[-1].id) if messages else None
+            messages += read_archived_before(room, boundary, wanted - len(messages))
+        messages.reverse()
+        entries = [serialize_message_entry(message) for message in messages]
+        buffer.fill(room_id, entries[-buffer.size :])
+    return entries[-limit:]
+
+
+def load_missed_history(room, last_seq, limit):
+    """
+    재접속한 클라이언트가 놓친(last_seq 이후) 메시지만 돌려준다.
+    limit 개보다 많이 밀렸거나 클라이언트 순번이 서버보다 앞서 있으면 None 을 돌려준다.
+    """
+    entries = load_recent_history(room, limit)
+    if entries:
+        newest_seq = entries[-1]["regular"].get("seq")
+        oldest_seq = entries[0]["regular"].get("seq")
+        if newest_seq is not None and last_seq > newest_seq:
+            return None
+        if oldest_seq is not None and oldest_seq <= last_seq + 1:
+            return [entry for entry in entries if entry["regular"]["seq"] > last_seq]
+    messages = list(
+        ChatMessage.objects.filter(room_id=room.pk, seq__gt=last_seq)
+        .select_related("user")
+        .order_by("seq")[: limit + 1]
+    )
+    if len(messages) > limit:
+        return None
+    return [serialize_message_entry(message) for message in messages]
+
+
+def record_message(message, deferred=False):
+    """
+    새 메시지를 버퍼 뒤에 붙이고 방의 마지막 메시지 포인터를 옮긴 뒤 직렬화 결과를 돌려준다.
+    deferred(write-behind 로 아직 DB 에 없는 메시지)이면 포인터는 flush 때 방마다 한 번에 옮긴다.
+    """
+    entry = serialize_message_entry(message)
+    get_history_buffer().append(message.room_id, entry)
+    if not deferred:
+        update_last_message(message)
+    return entry
+
+
+def invalidate_room_history(room_id):
+    get_history_buffer().invalidate(room_id)
+
+
+def forget_deleted_messages(room_ids):
+    """
+    메시지를 지운 뒤 방마다 한 번씩 버퍼를 비우고 마지막 메시지 포인터를 다시 맞춘다.
+    ChatMessage 에 삭제 시그널을 두지 않으므로(행마다 도는 대신 fast-delete 가 되도록) 지우는 쪽에서 부른다.
+    """
+    for room_id in room_ids:
+        invalidate_room_history(room_id)
+        refresh_last_message(room_id)
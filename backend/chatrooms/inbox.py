@@ -0,0 +1,176 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.utils import timezone
+
+from chatrooms.models import ChatMessage, ChatRoom, ChatRoomMembership
+from chatrooms.presence import get_presence
+from chatrooms.serializers import ChatRoomSerializer
+
+PREVIEW_LENGTH = 120
+
+
+def inbox_room_group(room_id):
+    return f"chatinbox_{room_id}"
+
+
+def inbox_user_group(user_id):
+    return f"chatinbox_user_{user_id}"
+
+
+def unread_count(last_message_seq, last_read_seq):
+    return max(0, last_message_seq - last_read_seq)
+
+
+def update_last_message(message):
+    """
+    방의 마지막 메시지 포인터를 갱신한다. seq 가 더 클 때만 덮어써서 동시에 들어온 메시지끼리 순서가 뒤집히지 않는다.
+    """
+    ChatRoom.objects.filter(pk=message.room_id, last_message_seq__lt=message.seq).update(
+        last_message_id=message.id,
+        last_message_seq=message.seq,
+        last_message_at=message.created_at,
+        last_message_preview=message.content[:PREVIEW_LENGTH],
+        last_message_display_name=message.display_name,
+    )
+
+
+def update_last_messages(messages):
+    """
+    write-behind flush 한 묶음에서 방마다 seq 가 가장 큰 메시지로 포인터를 한 번씩만 옮긴다.
+    """
+    latest = {}
+    for message in messages:
+        current = latest.get(message.room_id)
+        if current is None or message.seq > current.seq:
+            latest[message.room_id] = message
+    users = get_user_model().objects.in_bulk({message.user_id for message in latest.values()})
+    for message in latest.values():
+        message.user = users.get(message.user_id)
+        if message.user is not None:
+            update_last_message(message)
+
+
+def refresh_last_message(room_id):
+    """
+    메시지가 지워졌을 때 남은 메시지 중 최신으로 미리보기를 다시 맞추고, 메시지 목록 조건부 GET 의 버전(updated_at)을 바꾼다.
+    last_message_seq 는 안 읽은 수 계산 기준이므로 되돌리지 않는다.
+    """
+    latest = ChatMessage.objects.filter(room_id=room_id).select_related("user").order_by("-seq").first()
+    ChatRoom.objects.filter(pk=room_id).update(
+        updated_at=timezone.now(),
+        last_message_id=latest.id if latest else None,
+        last_message_at=latest.created_at if latest else None,
+        last_message_preview=latest.content[:PREVIEW_LENGTH] if latest else "",
+        last_message_display_name=latest.display_name if latest else "",
+    )
+
+
+def last_message_payload(room):
+    if room.last_message_id is None:
+        return None
+    return {
+        "id": room.last_message_id,
+        "seq": room.last_message_seq,
+        "preview": room.last_message_preview,
+        "display_name": room.last_message_display_name,
+        "created_at": room.last_message_at.isoformat() if room.last_message_at else None,
+    }
+
+
+def entry_payload(entry):
+    message = entry["regular"]
+    return {
+        "id": message["id"],
+        "seq": message["seq"],
+        "preview": message["content"][:PREVIEW_LENGTH],
+        "display_name": message["display_name"],
+        "created_at": message["created_at"],
+    }
+
+
+def load_inbox(user):
+    """
+    사용자가 속한 방 전부를 미리보기/안 읽은 수와 함께 돌려준다. 방 개수와 관계없이 쿼리는 한 번이다.
+    반환값은 (직렬화된 방 목록, {room_id: [last_message_seq, last_read_seq]}) 이다.
+    """
+    memberships = list(
+        ChatRoomMembership.objects.filter(user=user)
+        .select_related("room__owner")
+        .order_by(F("room__last_message_at").desc(nulls_last=True), "room__name")
+    )
+    rooms = [membership.room for membership in memberships]
+    room_ids = [room.id for room in rooms]
+    data = ChatRoomSerializer(
+        rooms,
+        many=True,
+        context={
+            "member_room_ids": set(room_ids),
+            "online_counts": get_presence().online_counts(room_ids) if room_ids else {},
+        },
+    ).data
+    items = []
+    state = {}
+    for item, membership in zip(data, memberships):
+        room = membership.room
+        state[room.id] = [room.last_message_seq, membership.last_read_seq]
+        items.append(
+            {
+                **item,
+                "last_message": last_message_payload(room),
+                "last_read_seq": membership.last_read_seq,
+                "unread_count": unread_count(room.last_message_seq, membership.last_read_seq),
+            }
+        )
+    return items, state
+
+
+def mark_read(room_id, user_id, seq):
+    """
+    읽음 위치를 앞으로만 옮긴다. 실제로 바뀌었으면 True.
+    """
+    return bool(
+        ChatRoomMembership.objects.filter(room_id=room_id, user_id=user_id, last_read_seq__lt=seq).update(
+            last_read_seq=seq
+        )
+    )
+
+
+async def notify_room_activity(channel_layer, room_id, entry, sender_id):
+    await channel_layer.group_send(
+        inbox_room_group(room_id),
+        {
+            "type": "inbox.activity",
+            "room_id": room_id,
+            "sender_id": sender_id,
+            "last_message": entry_payload(entry),
+        },
+    )
+
+
+def publish_room_activity(room_id, entry, sender_id):
+    """
+    동기 뷰(REST 전송)에서 쓰는 notify_room_activity.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(notify_room_activity)(channel_layer, room_id, entry, sender_id)
+
+
+async def notify_read(channel_layer, user_id, room_id, seq):
+    await channel_layer.group_send(
+        inbox_user_group(user_id),
+        {"type": "inbox.read", "room_id": room_id, "last_read_seq": seq},
+    )
+
+
+def notify_membership_changed(user_id):
+    """
+    방에 들어가거나 나갔을 때(동기 뷰에서 호출) 열려 있는 inbox 가 목록을 다시 읽게 한다.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(inbox_user_group(user_id), {"type": "inbox.membership"})
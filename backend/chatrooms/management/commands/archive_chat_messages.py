@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chatrooms.archive import SEGMENT_MAX_MESSAGES, archive_room_messages
+from chatrooms.history import invalidate_room_history
+from chatrooms.models import ChatMessage
+
+
+class Command(BaseCommand):
+    help = "오래된 채팅 메시지를 방별 압축 세그먼트 파일(로컬 또는 S3)로 옮기고 DB 에서 삭제합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=getattr(settings, "CHAT_ARCHIVE_AFTER_DAYS", 180),
+            help="이 일수보다 오래된 메시지를 아카이브합니다.",
+        )
+        parser.add_argument("--room", type=int, help="특정 채팅방 ID 만 처리합니다.")
+        parser.add_argument(
+            "--segment-size",
+            type=int,
+            default=SEGMENT_MAX_MESSAGES,
+            help="세그먼트 파일 하나에 담을 최대 메시지 수.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        messages = ChatMessage.objects.filter(created_at__lt=cutoff)
+        if options["room"]:
+            messages = messages.filter(room_id=options["room"])
+        room_ids = list(messages.order_by().values_list("room_id", flat=True).distinct())
+
+        total = 0
+        for room_id in room_ids:
+            archived = archive_room_messages(room_id, cutoff, options["segment_size"])
+            if archived:
+                invalidate_room_history(room_id)
+                self.stdout.write(f"room {room_id}: {archived}개 보관")
+            total += archived
+        self.stdout.write(self.style.SUCCESS(f"{total}개의 메시지를 아카이브했습니다."))
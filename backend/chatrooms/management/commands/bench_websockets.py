@@ -0,0 +1,391 @@
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework.authtoken.models import Token
+
+from chatrooms.models import ChatRoom, ChatRoomMembership
+from chatrooms.room_list import invalidate_public_rooms
+from common.benchmark import rss_bytes, run_metadata, summarize_ms, write_report
+from randomchat.matchmaking import get_matchmaker
+
+USER_PREFIX = "bench_ws_"
+ACK_EVERY = 20
+ROOM_PREFIX = "bench-ws-"
+MARKER = "bench"
+
+
+class BenchSocket:
+    """
+    네트워크 없이 ASGI 앱 인스턴스를 직접 돌리는 WebSocket 클라이언트.
+    channels.testing 의 communicator 와 달리 수신 대기 타임아웃으로 앱을 취소하지 않아 장시간 부하에 쓸 수 있다.
+    """
+
+    def __init__(self, application, path, token, index, on_frame):
+        self.index = index
+        self.on_frame = on_frame
+        self.scope = {
+            "type": "websocket",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode({"token": token}).encode(),
+            "headers": [(b"host", b"bench.local")],
+            "subprotocols": [],
+            "client": ("127.0.0.1", 40000 + index % 20000),
+            "server": ("127.0.0.1", 8000),
+        }
+        self.application = application
+        self.incoming = asyncio.Queue()
+        self.accepted = None
+        self.closed = False
+        self.task = None
+        self.session_id = None
+        self.frames = 0
+
+    async def connect(self, timeout):
+        self.accepted = asyncio.get_running_loop().create_future()
+        self.task = asyncio.ensure_future(self.application(self.scope, self.incoming.get, self._send))
+        await self.incoming.put({"type": "websocket.connect"})
+        try:
+            return await asyncio.wait_for(asyncio.shield(self.accepted), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+    async def _send(self, message):
+        kind = message["type"]
+        if kind == "websocket.accept":
+            if not self.accepted.done():
+                self.accepted.set_result(True)
+        elif kind == "websocket.close":
+            self.closed = True
+            if not self.accepted.done():
+                self.accepted.set_result(False)
+        elif kind == "websocket.send":
+            # 서버 송신 창(OutboundFlowControlMixin)이 막히지 않도록 브라우저 클라이언트처럼 주기적으로 ack 한다.
+            self.frames += 1
+            if self.frames % ACK_EVERY == 0:
+                self.incoming.put_nowait(
+                    {"type": "websocket.receive", "text": json.dumps({"action": "ack", "received": self.frames})}
+                )
+            if message.get("text") is not None:
+                self.on_frame(self, message["text"])
+
+    async def send_json(self, content):
+        await self.incoming.put({"type": "websocket.receive", "text": json.dumps(content, ensure_ascii=False)})
+
+    async def disconnect(self, timeout):
+        if self.task is None:
+            return
+        await self.incoming.put({"type": "websocket.disconnect", "code": 1000})
+        try:
+            await asyncio.wait_for(self.task, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.task.cancel()
+        except Exception:
+            pass
+
+
+class LoadRun:
+    """
+    한 번의 부하 실행에서 모이는 측정값. 프레임 콜백은 이벤트 루프 안에서만 불리므로 잠금이 필요 없다.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.sent = 0
+        self.received = 0
+        self.expected = 0
+        self.errors = {}
+        self.closed_by_server = 0
+
+    def on_frame(self, socket, text):
+        received_at = time.perf_counter()
+        try:
+            frame = json.loads(text)
+        except ValueError:
+            return
+        event = frame.get("event")
+        if event == "message":
+            parts = (frame.get("message") or {}).get("content", "").split(" ")
+            if len(parts) == 4 and parts[0] == MARKER:
+                self.received += 1
+                self.latencies.append(received_at - float(parts[3]))
+        elif event == "state":
+            session = (frame.get("payload") or {}).get("session")
+            socket.session_id = session["id"] if session else None
+        elif event == "error":
+            detail = str(frame.get("detail"))
+            self.errors[detail] = self.errors.get(detail, 0) + 1
+
+
+def _quantity(value):
+    value = int(value)
+    if value < 1:
+        raise ValueError
+    return value
+
+
+class Command(BaseCommand):
+    help = (
+        "프로세스 안에서 ASGI 앱에 WebSocket 부하를 걸어 연결 처리량, 전송→수신 지연(p50/p95/p99), "
+        "연결당 메모리를 측정하고 결과를 JSON 으로 남깁니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=["chatroom", "randomchat"], default="chatroom")
+        parser.add_argument("--users", type=_quantity, default=100, help="동시 연결 수(기본 100).")
+        parser.add_argument("--rooms", type=_quantity, default=10, help="chatroom 대상일 때 방 개수(기본 10).")
+        parser.add_argument("--rate", type=float, default=0.5, help="연결당 초당 전송 메시지 수(기본 0.5).")
+        parser.add_argument("--duration", type=float, default=10.0, help="전송 구간 길이(초, 기본 10).")
+        parser.add_argument("--drain", type=float, default=5.0, help="전송 후 남은 수신을 기다리는 최대 시간(초).")
+        parser.add_argument("--connect-concurrency", type=_quantity, default=50, help="동시에 진행할 연결 수.")
+        parser.add_argument("--layer", choices=["memory", "redis"], default="memory")
+        parser.add_argument("--redis-url", default=None, help="--layer redis 일 때 주소(기본 REDIS_URL).")
+        parser.add_argument(
+            "--keep-rate-limits",
+            action="store_true",
+            help="WS_ACTION_RATES 를 그대로 적용합니다(기본은 측정을 위해 끕니다).",
+        )
+        parser.add_argument("--output", default=None, help="결과 JSON 파일 경로. '-' 이면 표준 출력.")
+
+    def handle(self, *args, **options):
+        if options["rate"] <= 0 or options["duration"] <= 0:
+            raise CommandError("--rate 와 --duration 은 0 보다 커야 합니다.")
+        if options["target"] == "randomchat" and options["users"] % 2:
+            raise CommandError("randomchat 대상은 --users 가 짝수여야 합니다.")
+
+        overrides = {"CHANNEL_LAYERS": self._channel_layers(options)}
+        if not options["keep_rate_limits"]:
+            overrides["WS_ACTION_RATES"] = {}
+
+        # 설정된(운영일 수 있는) DB 를 건드리지 않도록 테스트 DB 를 만들어 쓰고 끝나면 지운다.
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            fixtures = self._prepare(options)
+            with override_settings(**overrides):
+                from config.asgi import application
+
+                run = LoadRun()
+                result = asyncio.run(self._run(application, fixtures, run, options))
+        finally:
+            self._close_worker_connections()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "benchmark": "websockets",
+            "meta": run_metadata(),
+            "config": {
+                key: options[key]
+                for key in ("target", "users", "rooms", "rate", "duration", "connect_concurrency", "layer")
+            },
+            "rate_limits": options["keep_rate_limits"],
+            **result,
+        }
+        if options["output"]:
+            write_report(options["output"], report)
+        self._print_summary(report)
+
+    def _channel_layers(self, options):
+        if options["layer"] == "memory":
+            return {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+        url = options["redis_url"] or getattr(settings, "REDIS_URL", None)
+        if not url:
+            raise CommandError("--layer redis 에는 --redis-url 또는 REDIS_URL 이 필요합니다.")
+        return {"default": {"BACKEND": "channels_redis.core.RedisChannelLayer", "CONFIG": {"hosts": [url]}}}
+
+    def _prepare(self, options):
+        """
+        테스트 DB 에 벤치마크 전용 사용자/토큰/방을 만들고 (경로, 토큰, 방 ID) 목록을 돌려준다.
+        """
+        User = get_user_model()
+        count = options["users"]
+        users = []
+        for index in range(count):
+            user = User(username=f"{USER_PREFIX}{index}")
+            user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__startswith=USER_PREFIX).order_by("id"))
+        tokens = Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in users])
+
+        if options["target"] == "randomchat":
+            get_matchmaker().leave_many(user.id for user in users)
+            return [("/ws/random-chat/", token.key, None) for token in tokens]
+
+        room_count = min(options["rooms"], count)
+        rooms = [
+            ChatRoom.objects.create(name=f"{ROOM_PREFIX}{index}", owner=users[index], capacity=ChatRoom.MAX_CAPACITY)
+            for index in range(room_count)
+        ]
+        assignments = [rooms[index % room_count] for index in range(count)]
+        ChatRoomMembership.objects.bulk_create(
+            [ChatRoomMembership(room=room, user=user) for room, user in zip(assignments, users)]
+        )
+        for room in rooms:
+            ChatRoom.objects.filter(pk=room.pk).update(member_count=assignments.count(room))
+        invalidate_public_rooms()
+        return [(f"/ws/chatrooms/{room.id}/", token.key, room.id) for room, token in zip(assignments, tokens)]
+
+    def _close_worker_connections(self):
+        """
+        consumer 스레드들이 CONN_MAX_AGE 동안 들고 있는 테스트 DB 연결을 끊어야 테스트 DB 를 지울 수 있다.
+        """
+        if connection.vendor != "postgresql":
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+            )
+
+    async def _run(self, application, fixtures, run, options):
+        timeout = max(5.0, options["duration"])
+        sockets = [
+            BenchSocket(application, path, token, index, run.on_frame)
+            for index, (path, token, _room_id) in enumerate(fixtures)
+        ]
+
+        rss_before = rss_bytes()
+        gate = asyncio.Semaphore(options["connect_concurrency"])
+        connect_times = []
+
+        async def open_socket(socket):
+            async with gate:
+                started = time.perf_counter()
+                ok = await socket.connect(timeout)
+                if ok:
+                    connect_times.append(time.perf_counter() - started)
+                return ok
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(open_socket(socket) for socket in sockets))
+        connect_elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.5)
+        rss_connected = rss_bytes()
+        connected = [socket for socket, ok in zip(sockets, results) if ok]
+
+        if options["target"] == "randomchat":
+            pairing = await self._pair_random(connected, timeout)
+        else:
+            pairing = None
+        fanout = self._fanout(connected, fixtures, options["target"])
+
+        async def sender(socket):
+            interval = 1.0 / options["rate"]
+            await asyncio.sleep(random.uniform(0, interval))
+            deadline = time.perf_counter() + options["duration"]
+            seq = 0
+            while time.perf_counter() < deadline and not socket.closed:
+                seq += 1
+                run.sent += 1
+                run.expected += fanout.get(socket.index, 0)
+                content = f"{MARKER} {socket.index} {seq} {time.perf_counter():.9f}"
+                await socket.send_json({"action": "send_message", "content": content})
+                await asyncio.sleep(interval)
+
+        send_started = time.perf_counter()
+        await asyncio.gather(*(sender(socket) for socket in connected if fanout.get(socket.index)))
+        send_elapsed = time.perf_counter() - send_started
+        drain_deadline = time.perf_counter() + options["drain"]
+        while run.received < run.expected and time.perf_counter() < drain_deadline:
+            await asyncio.sleep(0.05)
+        rss_peak = rss_bytes()
+
+        run.closed_by_server = sum(1 for socket in connected if socket.closed)
+        await asyncio.gather(*(socket.disconnect(timeout) for socket in sockets))
+
+        memory_delta = max(0, rss_connected - rss_before)
+        return {
+            "connect": {
+                "attempted": len(sockets),
+                "accepted": len(connected),
+                "seconds": round(connect_elapsed, 3),
+                "per_second": round(len(connected) / connect_elapsed, 1) if connect_elapsed else None,
+                "latency_ms": summarize_ms(connect_times),
+            },
+            "pairing": pairing,
+            "messages": {
+                "sent": run.sent,
+                "send_seconds": round(send_elapsed, 3),
+                "sent_per_second": round(run.sent / send_elapsed, 1) if send_elapsed else None,
+                "deliveries_expected": run.expected,
+                "deliveries_received": run.received,
+                "delivery_ratio": round(run.received / run.expected, 4) if run.expected else None,
+                "errors": run.errors,
+                "closed_by_server": run.closed_by_server,
+            },
+            "latency_ms": summarize_ms(run.latencies),
+            "memory": {
+                "rss_before_bytes": rss_before,
+                "rss_connected_bytes": rss_connected,
+                "rss_after_send_bytes": rss_peak,
+                "bytes_per_connection": memory_delta // len(connected) if connected else None,
+            },
+        }
+
+    def _fanout(self, connected, fixtures, target):
+        """
+        소켓별로 메시지 하나가 몇 번 배달되어야 하는지(보낸 사람 자신 포함).
+        """
+        if target == "randomchat":
+            return {socket.index: 2 for socket in connected if socket.session_id}
+        members = {}
+        for socket in connected:
+            room_id = fixtures[socket.index][2]
+            members[room_id] = members.get(room_id, 0) + 1
+        return {socket.index: members[fixtures[socket.index][2]] for socket in connected}
+
+    async def _pair_random(self, sockets, timeout):
+        """
+        모두 대기열에 넣은 뒤 아직 짝이 없는 연결에서 차례로 request_match 를 보내 세션을 만든다.
+        짝이 정해진 상대는 서버가 밀어주는 state 로 session_id 를 알게 된다.
+        """
+        for socket in sockets:
+            await socket.send_json({"action": "join_queue"})
+        await asyncio.sleep(0.5)
+        started = time.perf_counter()
+        for socket in sockets:
+            if socket.session_id or socket.closed:
+                continue
+            await socket.send_json({"action": "request_match"})
+            deadline = time.perf_counter() + timeout
+            while time.perf_counter() < deadline:
+                if socket.session_id and sum(1 for other in sockets if other.session_id == socket.session_id) >= 2:
+                    break
+                await asyncio.sleep(0.01)
+        paired = sum(1 for socket in sockets if socket.session_id)
+        return {"paired_sockets": paired, "seconds": round(time.perf_counter() - started, 3)}
+
+    def _print_summary(self, report):
+        connect, messages, latency = report["connect"], report["messages"], report["latency_ms"]
+        memory = report["memory"]["bytes_per_connection"]
+        self.stdout.write(
+            f"connect: {connect['accepted']}/{connect['attempted']} in {connect['seconds']}s "
+            f"({connect['per_second']}/s)"
+        )
+        self.stdout.write(
+            f"messages: sent {messages['sent']}, delivered {messages['deliveries_received']}"
+            f"/{messages['deliveries_expected']}, errors {sum(messages['errors'].values())}"
+        )
+        if latency["count"]:
+            self.stdout.write(
+                f"latency ms: p50 {latency['p50']} / p95 {latency['p95']} / p99 {latency['p99']} / max {latency['max']}"
+            )
+        if memory is not None:
+            self.stdout.write(f"memory: ~{memory / 1024:.1f} KiB per connection")
+        self.stdout.write(self.style.SUCCESS("WebSocket 벤치마크 완료."))
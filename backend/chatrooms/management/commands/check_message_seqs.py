@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from chatrooms.sequences import check_room_seqs
+
+
+class Command(BaseCommand):
+    help = "같은 방에서 seq 가 겹친 메시지를 찾고, 뒤처진 Redis seq 카운터를 DB 값까지 끌어올립니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24, help="최근 몇 시간의 메시지를 볼지 지정합니다. 0이면 전체.")
+
+    def handle(self, *args, **options):
+        duplicates = check_room_seqs(max(0, options["hours"]) * 3600)
+        for room_id, seq, total in duplicates:
+            self.stdout.write(f"room #{room_id}: seq {seq} × {total}")
+        style = self.style.ERROR if duplicates else self.style.SUCCESS
+        self.stdout.write(style(f"seq 중복 {len(duplicates)}건."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from common.redis_client import get_redis_client
+from common.write_behind import WriteBehindFlusher
+
+
+class Command(BaseCommand):
+    help = "write-behind stream 에 남아 있는 채팅 메시지를 DB에 모두 반영합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-idle-ms",
+            type=int,
+            default=WriteBehindFlusher.CLAIM_IDLE_MS,
+            help="다른 워커가 잡고 있던 항목을 넘겨받기 전 최소 대기 시간(ms). 0이면 즉시 넘겨받습니다.",
+        )
+
+    def handle(self, *args, **options):
+        client = get_redis_client()
+        if client is None:
+            raise CommandError("REDIS_URL 이 설정되지 않았습니다.")
+        flushed = WriteBehindFlusher(client).drain(min_idle_ms=options["min_idle_ms"])
+        self.stdout.write(self.style.SUCCESS(f"{flushed}개의 메시지를 저장했습니다."))
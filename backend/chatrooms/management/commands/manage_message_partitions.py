@@ -0,0 +1,57 @@
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from chatrooms.models import ChatMessage
+from common.partitioning import add_months, drop_partitions_before, ensure_partitions, month_start
+from randomchat.models import RandomChatMessage
+
+PARTITIONED_MODELS = (ChatMessage, RandomChatMessage)
+
+
+class Command(BaseCommand):
+    help = "채팅 메시지 월 파티션을 미리 만들고, 보존 기간이 지난 파티션을 삭제합니다(PostgreSQL 전용)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=getattr(settings, "CHAT_PARTITION_MONTHS_AHEAD", 3),
+            help="이번 달 이후 몇 달치 파티션을 미리 만들지 지정합니다.",
+        )
+        parser.add_argument(
+            "--retain-months",
+            type=int,
+            default=getattr(settings, "CHAT_MESSAGE_RETENTION_MONTHS", 0),
+            help="이번 달을 포함해 보존할 개월 수. 0이면 삭제하지 않습니다.",
+        )
+        parser.add_argument(
+            "--drop-before",
+            help="YYYY-MM. 이 달 이전에 끝나는 파티션을 삭제합니다(--retain-months 보다 우선).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("월 파티션은 PostgreSQL 에서만 지원됩니다.")
+
+        cutoff = None
+        if options["drop_before"]:
+            try:
+                cutoff = month_start(datetime.strptime(options["drop_before"], "%Y-%m").date())
+            except ValueError as exc:
+                raise CommandError("--drop-before 는 YYYY-MM 형식이어야 합니다.") from exc
+        elif options["retain_months"] > 0:
+            cutoff = add_months(month_start(date.today()), 1 - options["retain_months"])
+
+        for model in PARTITIONED_MODELS:
+            table = model._meta.db_table
+            created = ensure_partitions(table, options["months_ahead"])
+            self.stdout.write(f"{table}: 새 파티션 {len(created)}개 {', '.join(created)}".rstrip())
+            if cutoff is not None:
+                dropped = drop_partitions_before(table, cutoff)
+                self.stdout.write(
+                    f"{table}: {cutoff:%Y-%m} 이전 파티션 {len(dropped)}개 삭제 {', '.join(dropped)}".rstrip()
+                )
+        self.stdout.write(self.style.SUCCESS("파티션 정리를 완료했습니다."))
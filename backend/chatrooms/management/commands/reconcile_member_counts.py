@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from chatrooms.membership import reconcile_member_counts
+from chatrooms.room_list import invalidate_public_rooms
+
+
+class Command(BaseCommand):
+    help = "ChatRoom.member_count 를 실제 멤버십 수와 맞춥니다(관리자 화면/사용자 삭제 등으로 생긴 차이 보정)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="고치지 않고 차이만 출력합니다.")
+
+    def handle(self, *args, **options):
+        drifted = reconcile_member_counts(dry_run=options["dry_run"])
+        for room, recorded, actual in drifted:
+            self.stdout.write(f"{room.name} (#{room.pk}): {recorded} → {actual}")
+        if drifted and not options["dry_run"]:
+            invalidate_public_rooms()
+        verb = "발견" if options["dry_run"] else "보정"
+        self.stdout.write(self.style.SUCCESS(f"member_count 차이 {len(drifted)}건 {verb}."))
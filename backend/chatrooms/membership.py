@@ -0,0 +1,64 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from rest_framework.exceptions import ValidationError
+
+from chatrooms.models import ChatRoom, ChatRoomMembership
+
+
+def join_room(room, user):
+    """
+    정원 조건이 걸린 UPDATE 로 member_count 를 먼저 올리고 멤버십을 만든다.
+    방 행 잠금이 동시 입장을 직렬화하므로 정원을 넘길 수 없다. 새로 들어왔으면 True.
+    """
+    if ChatRoomMembership.objects.filter(room=room, user=user).exists():
+        return False
+    with transaction.atomic():
+        reserved = ChatRoom.objects.filter(pk=room.pk, member_count__lt=F("capacity")).update(
+            member_count=F("member_count") + 1
+        )
+        if not reserved:
+            raise ValidationError({"name": "채팅방 정원이 가득 찼습니다."})
+        try:
+            with transaction.atomic():
+                ChatRoomMembership.objects.create(room=room, user=user)
+        except IntegrityError:
+            ChatRoom.objects.filter(pk=room.pk).update(member_count=F("member_count") - 1)
+            return False
+    return True
+
+
+def leave_room(room, user):
+    """
+    멤버십을 지우고 member_count 를 내린다. 실제로 나갔으면 True.
+    """
+    with transaction.atomic():
+        deleted, _ = ChatRoomMembership.objects.filter(room=room, user=user).delete()
+        if deleted:
+            ChatRoom.objects.filter(pk=room.pk, member_count__gt=0).update(member_count=F("member_count") - 1)
+    return bool(deleted)
+
+
+def reconcile_member_counts(dry_run=False):
+    """
+    member_count 가 실제 멤버십 수와 다른 방을 고친다. [(방, 기록된 값, 실제 값)] 을 돌려준다.
+    집계 한 번으로 후보를 고른 뒤, 방 행을 잠근 상태에서 다시 세어 동시 입장/퇴장과 엇갈리지 않게 한다.
+    """
+    counts = dict(
+        ChatRoomMembership.objects.order_by().values("room_id").annotate(total=Count("id")).values_list("room_id", "total")
+    )
+    candidates = [
+        pk for pk, recorded in ChatRoom.objects.values_list("pk", "member_count") if counts.get(pk, 0) != recorded
+    ]
+    drifted = []
+    for pk in candidates:
+        with transaction.atomic():
+            room = ChatRoom.objects.select_for_update().filter(pk=pk).first()
+            if room is None:
+                continue
+            actual = ChatRoomMembership.objects.filter(room_id=pk).count()
+            if actual == room.member_count:
+                continue
+            drifted.append((room, room.member_count, actual))
+            if not dry_run:
+                ChatRoom.objects.filter(pk=pk).update(member_count=actual)
+    return drifted
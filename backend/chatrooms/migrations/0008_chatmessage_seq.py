@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+def backfill_message_seq(apps, schema_editor):
+    ChatMessage = apps.get_model("chatrooms", "ChatMessage")
+    room_ids = ChatMessage.objects.order_by().values_list("room_id", flat=True).distinct()
+    for room_id in room_ids:
+        messages = list(ChatMessage.objects.filter(room_id=room_id).order_by("created_at", "id").only("id"))
+        for seq, message in enumerate(messages, start=1):
+            message.seq = seq
+        ChatMessage.objects.bulk_update(messages, ["seq"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatrooms', '0007_chatmessage_room_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='seq',
+            field=models.PositiveBigIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_message_seq, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='chatmessage',
+            constraint=models.UniqueConstraint(fields=('room', 'seq'), name='chatmsg_room_seq_uniq'),
+        ),
+    ]
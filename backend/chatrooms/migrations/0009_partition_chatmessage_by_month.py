@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+from common.partitioning import convert_to_monthly_partitions, revert_monthly_partitions
+
+
+def partition_messages(apps, schema_editor):
+    convert_to_monthly_partitions(schema_editor, "chatrooms_chatmessage")
+
+
+def unpartition_messages(apps, schema_editor):
+    revert_monthly_partitions(schema_editor, "chatrooms_chatmessage")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatrooms', '0008_chatmessage_seq'),
+    ]
+
+    operations = [
+        # 파티션 테이블의 UNIQUE 는 파티션 키(created_at)를 포함해야 하므로 일반 인덱스로 바꾼다.
+        migrations.RemoveConstraint(
+            model_name='chatmessage',
+            name='chatmsg_room_seq_uniq',
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['room', 'seq'], name='chatmsg_room_seq_idx'),
+        ),
+        migrations.RunPython(partition_messages, unpartition_messages),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatrooms', '0009_partition_chatmessage_by_month'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatArchiveSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('message_count', models.PositiveIntegerField()),
+                ('first_created_at', models.DateTimeField()),
+                ('first_message_id', models.BigIntegerField()),
+                ('last_created_at', models.DateTimeField()),
+                ('last_message_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_segments', to='chatrooms.chatroom')),
+            ],
+            options={
+                'ordering': ['room', 'first_created_at', 'first_message_id'],
+                'indexes': [models.Index(fields=['room', 'last_created_at'], name='chatarchive_room_last_idx')],
+            },
+        ),
+    ]
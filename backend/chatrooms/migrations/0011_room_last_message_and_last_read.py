@@ -0,0 +1,65 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:22
+
+from django.db import migrations, models
+
+
+def backfill_last_message(apps, schema_editor):
+    """
+    기존 방의 마지막 메시지 포인터를 채우고, 기존 멤버는 모두 읽은 상태로 시작한다.
+    """
+    ChatRoom = apps.get_model("chatrooms", "ChatRoom")
+    ChatMessage = apps.get_model("chatrooms", "ChatMessage")
+    ChatRoomMembership = apps.get_model("chatrooms", "ChatRoomMembership")
+    for room in ChatRoom.objects.all().iterator():
+        latest = ChatMessage.objects.filter(room_id=room.pk).select_related("user").order_by("-seq").first()
+        if latest is None:
+            continue
+        ChatRoom.objects.filter(pk=room.pk).update(
+            last_message_id=latest.id,
+            last_message_seq=latest.seq,
+            last_message_at=latest.created_at,
+            last_message_preview=latest.content[:120],
+            last_message_display_name="익명" if latest.is_anonymous else latest.user.username,
+        )
+        ChatRoomMembership.objects.filter(room_id=room.pk).update(last_read_seq=latest.seq)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatrooms', '0010_chatarchivesegment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_display_name',
+            field=models.CharField(blank=True, editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_preview',
+            field=models.CharField(blank=True, editable=False, max_length=120),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_seq',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='chatroommembership',
+            name='last_read_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_last_message, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from common.search import create_search_indexes, drop_search_indexes
+
+COLUMNS = ["content"]
+
+
+def create_indexes(apps, schema_editor):
+    create_search_indexes(schema_editor, "chatrooms_chatmessage", COLUMNS)
+
+
+def drop_indexes(apps, schema_editor):
+    drop_search_indexes(schema_editor, "chatrooms_chatmessage", COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatrooms', '0011_room_last_message_and_last_read'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
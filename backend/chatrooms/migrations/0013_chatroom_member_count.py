@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_member_count(apps, schema_editor):
+    ChatRoom = apps.get_model("chatrooms", "ChatRoom")
+    ChatRoomMembership = apps.get_model("chatrooms", "ChatRoomMembership")
+    counts = (
+        ChatRoomMembership.objects.filter(room=OuterRef("pk"))
+        .order_by()
+        .values("room")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    ChatRoom.objects.update(member_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatrooms', '0012_chatmessage_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_member_count, migrations.RunPython.noop),
+    ]
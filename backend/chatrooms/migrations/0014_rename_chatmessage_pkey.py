@@ -0,0 +1,18 @@
+from django.db import migrations
+
+from common.partitioning import rename_primary_key
+
+
+def rename_message_pkey(apps, schema_editor):
+    rename_primary_key(schema_editor, "chatrooms_chatmessage")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatrooms', '0013_chatroom_member_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_message_pkey, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:12
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_archived_through(apps, schema_editor):
+    """
+    이미 세그먼트가 있는 방은 가장 최근 세그먼트의 끝 시각으로 채운다.
+    """
+    ChatRoom = apps.get_model("chatrooms", "ChatRoom")
+    ChatArchiveSegment = apps.get_model("chatrooms", "ChatArchiveSegment")
+    latest = ChatArchiveSegment.objects.order_by().values("room_id").annotate(last=Max("last_created_at"))
+    for row in latest:
+        ChatRoom.objects.filter(pk=row["room_id"]).update(archived_through=row["last"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatrooms', '0014_rename_chatmessage_pkey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='archived_through',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_archived_through, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_authors(apps, schema_editor):
+    """
+    기존 세그먼트 파일을 읽어 authors 를 채운다. 이미 탈퇴한 사용자의 메시지는 이 기회에 아카이브에서 지운다.
+    """
+    from chatrooms.archive import purge_archived_users, segment_author_ids
+
+    ChatArchiveSegment = apps.get_model("chatrooms", "ChatArchiveSegment")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    for segment in ChatArchiveSegment.objects.all():
+        author_ids = segment_author_ids(segment.path)
+        existing = set(User.objects.filter(pk__in=author_ids).values_list("pk", flat=True))
+        segment.authors.add(*existing)
+        if author_ids - existing:
+            purge_archived_users(author_ids - existing, [segment.pk])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatrooms', '0015_chatroom_archived_through'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatarchivesegment',
+            name='authors',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_authors, migrations.RunPython.noop),
+    ]
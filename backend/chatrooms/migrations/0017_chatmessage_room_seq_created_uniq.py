@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatrooms', '0016_chatarchivesegment_authors'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='chatmessage',
+            constraint=models.UniqueConstraint(fields=('room', 'seq', 'created_at'), name='chatmsg_room_seq_created_uniq'),
+        ),
+    ]
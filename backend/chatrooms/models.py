@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.contrib.auth.hashers import check_password, make_password
 from django.db import models
+from django.utils import timezone
 
 
 class ChatRoom(models.Model):
@@ -17,10 +18,19 @@ class ChatRoom(models.Model):
         blank=True,
     )
     capacity = models.PositiveIntegerField(default=20)
+    member_count = models.PositiveIntegerField(default=0, editable=False)
     is_private = models.BooleanField(default=False)
     password = models.CharField(max_length=128, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # 마지막 메시지 포인터(비정규화). 메시지 테이블이 파티션 테이블이라 FK 대신 값으로 들고 있다.
+    last_message_id = models.BigIntegerField(null=True, blank=True, editable=False)
+    last_message_seq = models.PositiveBigIntegerField(default=0, editable=False)
+    last_message_at = models.DateTimeField(null=True, blank=True, editable=False)
+    last_message_preview = models.CharField(max_length=120, blank=True, editable=False)
+    last_message_display_name = models.CharField(max_length=150, blank=True, editable=False)
+    # 아카이브로 옮긴 가장 최근 메시지의 created_at. None 이면 아카이브를 읽지 않는다.
+    archived_through = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
@@ -36,15 +46,9 @@ class ChatRoom(models.Model):
             return False
         return check_password(raw_password, self.password or "")
 
-    def active_member_count(self):
-        annotated = getattr(self, "current_members", None)
-        if annotated is not None:
-            return annotated
-        return self.memberships.count()
-
     @property
     def is_full(self):
-        return self.active_member_count() >= self.capacity
+        return self.member_count >= self.capacity
 
 
 class ChatRoomMembership(models.Model):
@@ -59,6 +63,7 @@ class ChatRoomMembership(models.Model):
         related_name="chatroom_memberships",
     )
     joined_at = models.DateTimeField(auto_now_add=True)
+    last_read_seq = models.PositiveBigIntegerField(default=0)
 
     class Meta:
         unique_together = ("room", "user")
@@ -81,10 +86,19 @@ class ChatMessage(models.Model):
     )
     content = models.TextField()
     is_anonymous = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    seq = models.PositiveBigIntegerField(null=True, editable=False)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["room", "created_at", "id"], name="chatmsg_room_created_id_idx"),
+            models.Index(fields=["room", "seq"], name="chatmsg_room_seq_idx"),
+        ]
+        constraints = [
+            # 파티션 테이블의 UNIQUE 는 파티션 키를 포함해야 하므로 created_at 을 함께 건다(파티션마다 검사된다).
+            models.UniqueConstraint(fields=["room", "seq", "created_at"], name="chatmsg_room_seq_created_uniq"),
+        ]
 
     def __str__(self):
         return f"[{self.room.name}] {self.display_name}: {self.content[:30]}"
@@ -94,3 +108,39 @@ class ChatMessage(models.Model):
         if self.is_anonymous:
             return "익명"
         return self.user.username
+
+
+class ChatArchiveSegment(models.Model):
+    """
+    archive_chat_messages 가 DB 에서 옮긴 메시지 묶음(압축 세그먼트 파일 하나).
+    파일은 한 번 쓰면 바뀌지 않고, 방마다 시간 순으로 새 세그먼트가 뒤에 붙는다.
+    authors 는 탈퇴한 사용자의 메시지가 든 세그먼트를 찾아 다시 쓰기 위한 것이다.
+    """
+
+    room = models.ForeignKey(
+        ChatRoom,
+        on_delete=models.CASCADE,
+        related_name="archive_segments",
+    )
+    path = models.CharField(max_length=255, unique=True)
+    message_count = models.PositiveIntegerField()
+    first_created_at = models.DateTimeField()
+    first_message_id = models.BigIntegerField()
+    last_created_at = models.DateTimeField()
+    last_message_id = models.BigIntegerField()
+    authors = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        related_name="+",
+        blank=True,
+        editable=False,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["room", "first_created_at", "first_message_id"]
+        indexes = [
+            models.Index(fields=["room", "last_created_at"], name="chatarchive_room_last_idx"),
+        ]
+
+    def __str__(self):
+        return f"[{self.room_id}] {self.path} ({self.message_count})"
@@ -0,0 +1,234 @@
+import json
+from urllib.parse import urlencode
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from chatrooms.consumers import ChatRoomConsumer, InboxConsumer
+from chatrooms.models import ChatRoom, ChatRoomMembership
+from common.outbound import OutboundFlowControlMixin
+from common.rate_limit import RateLimitedConsumerMixin
+from randomchat.consumers import RandomChatConsumer
+
+RANDOM_STREAM = "random"
+INBOX_STREAM = "inbox"
+
+
+def room_stream_name(room_id):
+    return f"room:{room_id}"
+
+
+class StreamMixin:
+    """
+    기존 consumer 로직을 멀티플렉스 연결 안의 stream 하나로 돌리기 위한 어댑터.
+    ASGI send 를 가로채 부모 소켓으로 {"stream": ..., "data": ...} 형태로 내보내고,
+    close 는 소켓을 닫는 대신 해당 stream 구독만 해제한다.
+    """
+
+    def attach(self, parent, stream, scope):
+        self.parent = parent
+        self.stream = stream
+        self.scope = scope
+        self.channel_layer = parent.channel_layer
+        self.channel_name = parent.channel_name
+        self.base_send = self._forward
+        return self
+
+    async def _forward(self, message):
+        if message["type"] == "websocket.send":
+            await self.parent.send_stream_text(self.stream, message["text"])
+        elif message["type"] == "websocket.close":
+            await self.parent.drop_stream(self.stream, message.get("code"))
+
+    async def enforce_rate_limit(self, action):
+        return await self.parent.enforce_rate_limit(action)
+
+
+class RoomStream(StreamMixin, ChatRoomConsumer):
+    """
+    방 조회/멤버십 확인은 subscribe 시 부모가 한 번에 조회해 둔 값을 쓴다.
+    """
+
+    def _get_room(self):
+        return self.parent.room_lookup.get(int(self.room_id), (None, False))[0]
+
+    def _is_member(self):
+        return self.parent.room_lookup.get(int(self.room_id), (None, False))[1]
+
+
+class RandomStream(StreamMixin, RandomChatConsumer):
+    pass
+
+
+class InboxStream(StreamMixin, InboxConsumer):
+    pass
+
+
+class MultiplexConsumer(OutboundFlowControlMixin, RateLimitedConsumerMixin, AsyncJsonWebsocketConsumer):
+    """
+    한 연결에서 여러 채팅방과 랜덤 채팅을 함께 구독하는 WebSocket.
+    {"action": "subscribe", "rooms": [1, {"id": 2, "last_seq": 10}], "random": true, "inbox": true} 로 구독하면
+    각 stream 의 입장 응답(history/resume/presence 등)을 "subscribed" 프레임 하나로 모아 보낸다.
+    이후 stream 별 action 은 {"stream": "room:1", "action": ...} 처럼 보낸다.
+    """
+
+    rate_limit_scope = "stream"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = None
+        self.streams = {}
+        self.room_lookup = {}
+        self._batch = None
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+        await self.accept()
+
+    async def disconnect(self, code):
+        for stream in list(self.streams.values()):
+            await stream.disconnect(code)
+        self.streams.clear()
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get("action")
+        if not action:
+            await self.send_error("action 필드가 필요합니다.")
+            return
+        if await self.handle_flow_ack(content):
+            return
+
+        stream_name = content.get("stream")
+        if stream_name:
+            stream = self.streams.get(stream_name)
+            if stream is None:
+                await self.send_error(f"구독하지 않은 stream 입니다: {stream_name}")
+                return
+            await stream.receive_json(content)
+            return
+
+        if not await self.enforce_rate_limit(action):
+            return
+        if action == "subscribe":
+            await self.subscribe(content)
+        elif action == "unsubscribe":
+            for name in content.get("streams") or []:
+                await self.drop_stream(name, 1000)
+        else:
+            await self.send_error(f"알 수 없는 action: {action}")
+
+    async def subscribe(self, content):
+        requests = self._parse_room_requests(content.get("rooms") or [])
+        if requests is None:
+            await self.send_error("rooms 형식이 올바르지 않습니다.")
+            return
+        requests = [request for request in requests if room_stream_name(request[0]) not in self.streams]
+        subscribed_rooms = sum(1 for name in self.streams if name not in (RANDOM_STREAM, INBOX_STREAM))
+        if subscribed_rooms + len(requests) > getattr(settings, "WS_STREAM_MAX_ROOMS", 20):
+            await self.send_error("한 연결에서 구독할 수 있는 채팅방 수를 넘었습니다.")
+            return
+
+        self.room_lookup = await database_sync_to_async(self._lookup_rooms)([room_id for room_id, _ in requests])
+        self._batch = {}
+        try:
+            for room_id, last_seq in requests:
+                query = urlencode({"last_seq": last_seq}) if last_seq is not None else ""
+                scope = dict(
+                    self.scope,
+                    url_route={"args": (), "kwargs": {"room_id": room_id}},
+                    query_string=query.encode(),
+                )
+                await self._open_stream(RoomStream(), room_stream_name(room_id), scope)
+            if content.get("random") and RANDOM_STREAM not in self.streams:
+                await self._open_stream(RandomStream(), RANDOM_STREAM, dict(self.scope))
+            if content.get("inbox") and INBOX_STREAM not in self.streams:
+                await self._open_stream(InboxStream(), INBOX_STREAM, dict(self.scope))
+        finally:
+            batch, self._batch = self._batch, None
+            self.room_lookup = {}
+        streams = ",".join(f'{json.dumps(name)}:[{",".join(frames)}]' for name, frames in batch.items())
+        await self.send(text_data=f'{{"event":"subscribed","streams":{{{streams}}}}}')
+
+    async def _open_stream(self, stream, name, scope):
+        self.streams[name] = stream.attach(self, name, scope)
+        self._batch.setdefault(name, [])
+        await stream.connect()
+
+    async def drop_stream(self, name, code):
+        stream = self.streams.pop(name, None)
+        if stream is None:
+            return
+        await stream.disconnect(code)
+        await self.send_stream_text(name, await self.encode_json({"event": "unsubscribed", "code": code}))
+
+    async def send_stream_text(self, name, text):
+        if self._batch is not None:
+            self._batch.setdefault(name, []).append(text)
+            return
+        await self.send(text_data=f'{{"stream":{json.dumps(name)},"data":{text}}}')
+
+    async def send_error(self, detail):
+        await self.send_json({"event": "error", "detail": detail})
+
+    async def _route(self, name, handler, event):
+        stream = self.streams.get(name)
+        if stream is not None:
+            await getattr(stream, handler)(event)
+
+    async def chatroom_broadcast(self, event):
+        await self._route(room_stream_name(event["room_id"]), "chatroom_broadcast", event)
+
+    async def chatroom_presence(self, event):
+        await self._route(room_stream_name(event["room_id"]), "chatroom_presence", event)
+
+    async def chatroom_typing(self, event):
+        await self._route(room_stream_name(event["room_id"]), "chatroom_typing", event)
+
+    async def inbox_activity(self, event):
+        await self._route(INBOX_STREAM, "inbox_activity", event)
+
+    async def inbox_read(self, event):
+        await self._route(INBOX_STREAM, "inbox_read", event)
+
+    async def inbox_membership(self, event):
+        await self._route(INBOX_STREAM, "inbox_membership", event)
+
+    async def randomchat_session_message(self, event):
+        await self._route(RANDOM_STREAM, "randomchat_session_message", event)
+
+    async def randomchat_session_typing(self, event):
+        await self._route(RANDOM_STREAM, "randomchat_session_typing", event)
+
+    async def randomchat_dispatch_state(self, event):
+        await self._route(RANDOM_STREAM, "randomchat_dispatch_state", event)
+
+    @staticmethod
+    def _parse_room_requests(rooms):
+        if not isinstance(rooms, list):
+            return None
+        requests = []
+        for item in rooms:
+            if isinstance(item, dict):
+                room_id, last_seq = item.get("id"), item.get("last_seq")
+            else:
+                room_id, last_seq = item, None
+            try:
+                requests.append((int(room_id), int(last_seq) if last_seq is not None else None))
+            except (TypeError, ValueError):
+                return None
+        return requests
+
+    def _lookup_rooms(self, room_ids):
+        """
+        요청한 방들과 멤버 여부를 쿼리 한 번으로 가져온다.
+        """
+        if not room_ids:
+            return {}
+        memberships = ChatRoomMembership.objects.filter(room=OuterRef("pk"), user=self.user)
+        rooms = ChatRoom.objects.filter(pk__in=room_ids).annotate(viewer_is_member=Exists(memberships))
+        return {room.id: (room, room.viewer_is_member) for room in rooms}
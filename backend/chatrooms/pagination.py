@@ -0,0 +1,88 @@
+from rest_framework.exceptions import ValidationError
+
+from chatrooms.archive import find_archived_key, read_archived_after, read_archived_before
+from chatrooms.models import ChatMessage
+from common.cursors import decode_cursor_token, encode_cursor
+
+
+def encode_message_cursor(message):
+    if isinstance(message, dict):
+        return encode_cursor(message["created_at"], message["id"])
+    return encode_cursor(message.created_at, message.id)
+
+
+def decode_cursor(token, room):
+    """
+    불투명 커서 또는 메시지 ID 숫자를 (created_at, id) 로 바꾼다.
+    숫자인 경우 같은 방의 메시지인지 확인하기 위해 PK 조회를 한 번 하고, 없으면 아카이브에서 찾는다.
+    """
+    token = str(token).strip()
+    if token.isascii() and token.isdecimal():
+        created_at = (
+            ChatMessage.objects.filter(room_id=room.pk, pk=int(token))
+            .values_list("created_at", flat=True)
+            .first()
+        )
+        if created_at is not None:
+            return created_at, int(token)
+        key = find_archived_key(room, int(token))
+        if key is None:
+            raise ValidationError({"cursor": "존재하지 않는 메시지입니다."})
+        return key
+    key = decode_cursor_token(token)
+    if key is None:
+        raise ValidationError({"cursor": "잘못된 커서입니다."})
+    return key
+
+
+def _older_than(queryset, key):
+    created_at, message_id = key
+    return queryset.filter(created_at__lte=created_at).exclude(created_at=created_at, id__gte=message_id)
+
+
+def _has_older(room, queryset, key):
+    """
+    key 보다 오래된 메시지가 DB 나 아카이브에 하나라도 있으면 True.
+    """
+    return _older_than(queryset, key).exists() or bool(read_archived_before(room, key, 1))
+
+
+def paginate_room_messages(room, limit, before=None, after=None):
+    """
+    (room_id, created_at, id) 인덱스를 타는 keyset 페이지네이션.
+    DB(hot) 에 남은 메시지가 모자라면 아카이브 세그먼트에서 이어서 읽는다(room.archived_through 가 있을 때만).
+    반환값은 (오래된 순 메시지 목록, 더 오래된 페이지 커서, 더 최신 페이지 커서) 이다.
+    """
+    if before and after:
+        raise ValidationError({"cursor": "before_id 와 after_id 는 함께 사용할 수 없습니다."})
+    queryset = ChatMessage.objects.filter(room_id=room.pk).select_related("user")
+
+    if after:
+        created_at, message_id = decode_cursor(after, room)
+        page = read_archived_after(room, (created_at, message_id), limit + 1)
+        page += list(
+            queryset.filter(created_at__gte=created_at)
+            .exclude(created_at=created_at, id__lte=message_id)
+            .order_by("created_at", "id")[: limit + 1 - len(page)]
+        )
+        has_newer = len(page) > limit
+        messages = page[:limit]
+        has_older = bool(messages) and _has_older(room, queryset, (messages[0].created_at, messages[0].id))
+    else:
+        boundary = None
+        if before:
+            boundary = decode_cursor(before, room)
+            queryset = _older_than(queryset, boundary)
+        page = list(queryset.order_by("-created_at", "-id")[: limit + 1])
+        if len(page) <= limit:
+            if page:
+                boundary = (page[-1].created_at, page[-1].id)
+            page += read_archived_before(room, boundary, limit + 1 - len(page))
+        has_older = len(page) > limit
+        messages = page[:limit]
+        messages.reverse()
+        has_newer = bool(before)
+
+    prev_cursor = encode_message_cursor(messages[0]) if messages and has_older else None
+    next_cursor = encode_message_cursor(messages[-1]) if messages and has_newer else None
+    return messages, prev_cursor, next_cursor
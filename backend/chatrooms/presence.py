@@ -0,0 +1,160 @@
+import threading
+import time
+
+from django.conf import settings
+
+from common.redis_client import get_redis_client
+
+
+def presence_member(user):
+    return f"{user.id}:{user.username}"
+
+
+def parse_member(member):
+    user_id, _, username = member.partition(":")
+    return {"id": int(user_id), "username": username}
+
+
+def _ttl():
+    return getattr(settings, "CHAT_PRESENCE_TTL_SECONDS", 60)
+
+
+class InMemoryPresence:
+    """
+    REDIS_URL 이 없는 단일 프로세스(개발) 환경용 접속자 목록.
+    """
+
+    def __init__(self):
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, room, now):
+        for member in [m for m, state in room.items() if state["deadline"] <= now]:
+            del room[member]
+
+    def join(self, room_id, member):
+        with self._lock:
+            room = self._rooms.setdefault(room_id, {})
+            state = room.setdefault(member, {"refs": 0, "deadline": 0})
+            state["refs"] += 1
+            state["deadline"] = time.time() + _ttl()
+            return state["refs"] == 1
+
+    def leave(self, room_id, member):
+        with self._lock:
+            room = self._rooms.get(room_id, {})
+            state = room.get(member)
+            if not state:
+                return False
+            state["refs"] -= 1
+            if state["refs"] > 0:
+                return False
+            del room[member]
+            return True
+
+    def heartbeat(self, room_id, member):
+        with self._lock:
+            room = self._rooms.setdefault(room_id, {})
+            now = time.time()
+            state = room.setdefault(member, {"refs": 1, "deadline": 0})
+            state["deadline"] = now + _ttl()
+            self._prune(room, now)
+
+    def online_counts(self, room_ids):
+        now = time.time()
+        with self._lock:
+            return {
+                room_id: sum(1 for state in self._rooms.get(room_id, {}).values() if state["deadline"] > now)
+                for room_id in room_ids
+            }
+
+    def online_members(self, room_id):
+        now = time.time()
+        with self._lock:
+            room = self._rooms.get(room_id, {})
+            return [member for member, state in room.items() if state["deadline"] > now]
+
+
+class RedisPresence:
+    """
+    방마다 sorted set(멤버 → 만료 시각)과 hash(멤버 → 접속 수)를 둔다.
+    한 사용자가 여러 탭으로 접속해도 마지막 연결이 끊길 때만 퇴장으로 본다.
+    인원 수는 ZCOUNT 라 O(log n) 이고, 만료된 멤버는 heartbeat 때 정리된다.
+    """
+
+    KEY_PREFIX = "chat:presence"
+
+    JOIN_SCRIPT = """
+    local refs = redis.call('HINCRBY', KEYS[2], ARGV[1], 1)
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+    return refs
+    """
+
+    LEAVE_SCRIPT = """
+    local refs = redis.call('HINCRBY', KEYS[2], ARGV[1], -1)
+    if refs > 0 then
+        return 0
+    end
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    return 1
+    """
+
+    HEARTBEAT_SCRIPT = """
+    local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+    if #expired > 0 then
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+        redis.call('HDEL', KEYS[2], unpack(expired))
+    end
+    if redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1]) == 1 then
+        redis.call('HSETNX', KEYS[2], ARGV[1], 1)
+    end
+    return 1
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._join = client.register_script(self.JOIN_SCRIPT)
+        self._leave = client.register_script(self.LEAVE_SCRIPT)
+        self._heartbeat = client.register_script(self.HEARTBEAT_SCRIPT)
+
+    def _keys(self, room_id):
+        return [f"{self.KEY_PREFIX}:{room_id}", f"{self.KEY_PREFIX}:{room_id}:refs"]
+
+    def join(self, room_id, member):
+        return int(self._join(keys=self._keys(room_id), args=[member, time.time() + _ttl()])) == 1
+
+    def leave(self, room_id, member):
+        return int(self._leave(keys=self._keys(room_id), args=[member])) == 1
+
+    def heartbeat(self, room_id, member):
+        now = time.time()
+        self._heartbeat(keys=self._keys(room_id), args=[member, now + _ttl(), now])
+
+    def online_counts(self, room_ids):
+        room_ids = list(room_ids)
+        if not room_ids:
+            return {}
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        for room_id in room_ids:
+            pipe.zcount(self._keys(room_id)[0], f"({now}", "+inf")
+        return dict(zip(room_ids, pipe.execute()))
+
+    def online_members(self, room_id):
+        return self.client.zrangebyscore(self._keys(room_id)[0], f"({time.time()}", "+inf")
+
+
+_presence = None
+
+
+def get_presence():
+    global _presence
+    if _presence is None:
+        client = get_redis_client()
+        _presence = RedisPresence(client) if client is not None else InMemoryPresence()
+    return _presence
+
+
+def online_count(room_id):
+    return get_presence().online_counts([room_id]).get(room_id, 0)
@@ -0,0 +1,111 @@
+import json
+import threading
+
+from django.conf import settings
+
+from chatrooms.models import ChatRoom
+from chatrooms.serializers import ChatRoomSerializer
+from common.redis_client import get_redis_client
+
+DEFAULT_ROOM_NAME = "오픈 라운지"
+
+
+class InMemoryRoomListCache:
+    """
+    REDIS_URL 이 없는 단일 프로세스(개발) 환경용. 최신 버전 본문 하나만 들고 있다.
+    """
+
+    def __init__(self):
+        self._version = 1
+        self._body = None
+        self._lock = threading.Lock()
+
+    def version(self):
+        with self._lock:
+            return self._version
+
+    def get(self, version):
+        with self._lock:
+            if self._body and self._body[0] == version:
+                return self._body[1]
+            return None
+
+    def set(self, version, rooms):
+        with self._lock:
+            if version == self._version:
+                self._body = (version, rooms)
+
+    def bump(self):
+        with self._lock:
+            self._version += 1
+            self._body = None
+
+
+class RedisRoomListCache:
+    """
+    버전 카운터 하나와 버전별 본문 키를 둔다. 무효화는 INCR 한 번이고, 옛 버전 본문은 TTL 로 사라진다.
+    """
+
+    KEY_PREFIX = "chat:rooms:public"
+
+    def __init__(self, client, ttl):
+        self.client = client
+        self.ttl = ttl
+
+    def version(self):
+        return int(self.client.get(f"{self.KEY_PREFIX}:version") or 0)
+
+    def get(self, version):
+        raw = self.client.get(f"{self.KEY_PREFIX}:{version}")
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, version, rooms):
+        self.client.set(f"{self.KEY_PREFIX}:{version}", json.dumps(rooms, ensure_ascii=False), ex=self.ttl)
+
+    def bump(self):
+        self.client.incr(f"{self.KEY_PREFIX}:version")
+
+
+_room_list_cache = None
+
+
+def get_room_list_cache():
+    global _room_list_cache
+    if _room_list_cache is None:
+        client = get_redis_client()
+        if client is not None:
+            ttl = getattr(settings, "CHAT_ROOM_LIST_CACHE_TTL_SECONDS", 300)
+            _room_list_cache = RedisRoomListCache(client, ttl)
+        else:
+            _room_list_cache = InMemoryRoomListCache()
+    return _room_list_cache
+
+
+def _serialize_public_rooms():
+    rooms = ChatRoom.objects.filter(is_private=False).select_related("owner").order_by("name")
+    data = ChatRoomSerializer(rooms, many=True, context={"member_room_ids": set(), "online_counts": {}}).data
+    return [dict(room) for room in data]
+
+
+def public_room_list():
+    """
+    (버전, 공개 방 목록) 을 돌려준다. 목록은 모든 사용자가 공유하는 부분이라 online_count/is_member 는 비워 둔다.
+    버전을 먼저 읽으므로 계산 도중 무효화되면 옛 버전 키에만 저장되고 다음 요청은 새로 만든다.
+    """
+    cache = get_room_list_cache()
+    version = cache.version()
+    rooms = cache.get(version)
+    if rooms is None:
+        rooms = _serialize_public_rooms()
+        cache.set(version, rooms)
+    return version, rooms
+
+
+def invalidate_public_rooms():
+    get_room_list_cache().bump()
+
+
+def ensure_default_room():
+    if ChatRoom.objects.filter(is_private=False).exists():
+        return
+    ChatRoom.objects.get_or_create(name=DEFAULT_ROOM_NAME, defaults={"capacity": 200, "is_private": False})
@@ -1,7 +1,10 @@
 from django.urls import path
 
-from chatrooms.consumers import ChatRoomConsumer
+from chatrooms.consumers import ChatRoomConsumer, InboxConsumer
+from chatrooms.multiplex import MultiplexConsumer
 
 websocket_urlpatterns = [
     path("ws/chatrooms/<int:room_id>/", ChatRoomConsumer.as_asgi()),
+    path("ws/chatrooms/inbox/", InboxConsumer.as_asgi()),
+    path("ws/stream/", MultiplexConsumer.as_asgi()),
 ]
@@ -0,0 +1,108 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from chatrooms.models import ChatMessage, ChatRoom
+from common.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+SEQ_KEY_PREFIX = "chat:seq"
+
+INCR_IF_EXISTS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('INCR', KEYS[1])
+end
+return false
+"""
+
+INIT_AND_INCR_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'NX')
+return redis.call('INCR', KEYS[1])
+"""
+
+RAISE_IF_LOWER_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current and tonumber(current) < tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+def _current_db_seq(room_id):
+    """
+    DB 에 남은 메시지 seq 최대값과 방의 last_message_seq 중 큰 값.
+    메시지가 아카이브로 지워졌거나 아직 flush 되지 않았어도 이미 기록된 포인터 아래로 내려가지 않는다.
+    """
+    latest = ChatMessage.objects.filter(room_id=room_id).aggregate(value=Max("seq"))["value"] or 0
+    pointer = ChatRoom.objects.filter(pk=room_id).values_list("last_message_seq", flat=True).first() or 0
+    return max(latest, pointer)
+
+
+def next_room_seq(room_id):
+    """
+    방별로 단조 증가하는 메시지 순번을 발급한다.
+    Redis 가 있으면 INCR 로(키가 없을 때만 DB 최대값으로 초기화), 없으면 방 행을 잠근 뒤 DB 최대값 + 1 을 쓴다.
+    write-behind 대기 중인 메시지의 seq 는 Redis 키에만 있으므로 Redis 는 키를 내쫓지 않게(noeviction) 운영한다.
+    DB 경로는 메시지 INSERT 와 같은 트랜잭션 안에서 호출해야 한다.
+    """
+    client = get_redis_client()
+    if client is not None:
+        key = f"{SEQ_KEY_PREFIX}:{room_id}"
+        seq = client.eval(INCR_IF_EXISTS_SCRIPT, 1, key)
+        if seq is None:
+            seq = client.eval(INIT_AND_INCR_SCRIPT, 1, key, _current_db_seq(room_id))
+        return int(seq)
+    list(ChatRoom.objects.select_for_update().filter(pk=room_id).values_list("pk", flat=True))
+    return _current_db_seq(room_id) + 1
+
+
+def current_room_seq(room_id):
+    client = get_redis_client()
+    if client is not None:
+        value = client.get(f"{SEQ_KEY_PREFIX}:{room_id}")
+        if value is not None:
+            return int(value)
+    return _current_db_seq(room_id)
+
+
+def find_duplicate_seqs(since=None):
+    """
+    같은 방에서 seq 가 겹친 메시지를 [(room_id, seq, 개수)] 로 돌려준다.
+    파티션 테이블의 UNIQUE (room, seq, created_at) 는 같은 시각에 겹친 seq 만 막으므로, 시각이 다른 중복은 이 검사로 찾는다.
+    since 를 주면 그 이후 메시지만 본다(해당 월 파티션만 읽는다).
+    """
+    queryset = ChatMessage.objects.all()
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    return list(
+        queryset.order_by()
+        .values("room_id", "seq")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+        .values_list("room_id", "seq", "total")
+    )
+
+
+def check_room_seqs(window_seconds=None):
+    """
+    최근 window_seconds(기본 CHAT_SEQ_CHECK_WINDOW_SECONDS, 0 이면 전체) 동안의 seq 중복을 찾아 기록하고,
+    중복이 난 방의 Redis 카운터가 DB 값보다 뒤에 있으면 끌어올려 더 겹치지 않게 한다. 찾은 중복 목록을 돌려준다.
+    """
+    if window_seconds is None:
+        window_seconds = getattr(settings, "CHAT_SEQ_CHECK_WINDOW_SECONDS", 7200)
+    since = timezone.now() - timedelta(seconds=window_seconds) if window_seconds > 0 else None
+    duplicates = find_duplicate_seqs(since)
+    if not duplicates:
+        return duplicates
+    logger.error("메시지 seq 중복 %d건: %s", len(duplicates), duplicates[:20])
+    client = get_redis_client()
+    if client is not None:
+        for room_id in {room_id for room_id, _seq, _total in duplicates}:
+            client.eval(RAISE_IF_LOWER_SCRIPT, 1, f"{SEQ_KEY_PREFIX}:{room_id}", _current_db_seq(room_id))
+    return duplicates
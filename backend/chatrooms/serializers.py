@@ -1,11 +1,14 @@
+from django.db import transaction
 from rest_framework import serializers
 
 from chatrooms.models import ChatMessage, ChatRoom
+from chatrooms.presence import online_count
+from chatrooms.sequences import next_room_seq
 
 
 class ChatRoomSerializer(serializers.ModelSerializer):
     owner_username = serializers.SerializerMethodField()
-    member_count = serializers.SerializerMethodField()
+    online_count = serializers.SerializerMethodField()
     is_member = serializers.SerializerMethodField()
 
     class Meta:
@@ -17,6 +20,7 @@ class ChatRoomSerializer(serializers.ModelSerializer):
             "is_private",
             "owner_username",
             "member_count",
+            "online_count",
             "created_at",
             "is_member",
         ]
@@ -25,11 +29,11 @@ class ChatRoomSerializer(serializers.ModelSerializer):
     def get_owner_username(self, obj):
         return obj.owner.username if obj.owner else None
 
-    def get_member_count(self, obj):
-        annotated_count = getattr(obj, "current_members", None)
-        if annotated_count is not None:
-            return annotated_count
-        return obj.memberships.count()
+    def get_online_count(self, obj):
+        online_counts = self.context.get("online_counts")
+        if online_counts is not None:
+            return online_counts.get(obj.id, 0)
+        return online_count(obj.id)
 
     def get_is_member(self, obj):
         request = self.context.get("request")
@@ -114,7 +118,7 @@ class ChatRoomJoinSerializer(serializers.Serializer):
                 raise serializers.ValidationError({"password": "비공개 채팅방 비밀번호를 입력해 주세요."})
             if not room.check_password(password):
                 raise serializers.ValidationError({"password": "비밀번호가 일치하지 않습니다."})
-        if not is_member and room.memberships.count() >= room.capacity:
+        if not is_member and room.is_full:
             raise serializers.ValidationError({"name": "채팅방 정원이 가득 찼습니다."})
 
         attrs["room"] = room
@@ -128,8 +132,8 @@ class ChatMessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ChatMessage
-        fields = ["id", "room", "content", "created_at", "is_anonymous", "display_name"]
-        read_only_fields = ["id", "room", "created_at", "display_name"]
+        fields = ["id", "room", "seq", "content", "created_at", "is_anonymous", "display_name"]
+        read_only_fields = ["id", "room", "seq", "created_at", "display_name"]
 
     def validate_content(self, value):
         text = (value or "").strip()
@@ -142,7 +146,9 @@ class ChatMessageSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         request = self.context["request"]
         room = self.context["room"]
-        return ChatMessage.objects.create(user=request.user, room=room, **validated_data)
+        with transaction.atomic():
+            seq = next_room_seq(room.id)
+            return ChatMessage.objects.create(user=request.user, room=room, seq=seq, **validated_data)
 
     def get_display_name(self, obj):
         request = self.context.get("request")
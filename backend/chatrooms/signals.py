@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from chatrooms.archive import purge_archived_users
+from chatrooms.history import forget_deleted_messages, invalidate_room_history
+from chatrooms.models import ChatArchiveSegment, ChatMessage, ChatRoom, ChatRoomMembership
+from chatrooms.room_list import ensure_default_room, invalidate_public_rooms
+from common.storage import get_archive_storage
+
+
+@receiver(post_delete, sender=ChatRoom)
+def drop_deleted_room_history(sender, instance, **_):
+    room_id = instance.pk
+    transaction.on_commit(lambda: invalidate_room_history(room_id))
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def forget_deleted_user_messages(sender, instance, **_):
+    """
+    탈퇴로 CASCADE 삭제될 메시지가 있던 방과, 그 사용자의 메시지가 든 아카이브 세그먼트를 삭제 전에 모아 둔다.
+    커밋 뒤 세그먼트에서 그 사용자의 메시지를 지우고, 방마다 한 번씩 정리한다.
+    """
+    user_id = instance.pk
+    room_ids = set(
+        ChatMessage.objects.filter(user_id=user_id).order_by().values_list("room_id", flat=True).distinct()
+    )
+    segment_ids = list(ChatArchiveSegment.objects.filter(authors=user_id).values_list("pk", flat=True))
+    if not room_ids and not segment_ids:
+        return
+
+    def forget():
+        forget_deleted_messages(room_ids | purge_archived_users({user_id}, segment_ids))
+
+    transaction.on_commit(forget)
+
+
+@receiver(post_delete, sender=ChatArchiveSegment)
+def drop_archive_files(sender, instance, **_):
+    def delete_files():
+        storage = get_archive_storage()
+        storage.delete(instance.path)
+        storage.delete(f"{instance.path}.idx")
+
+    transaction.on_commit(delete_files)
+
+
+@receiver(post_save, sender=ChatRoom)
+@receiver(post_delete, sender=ChatRoom)
+@receiver(post_delete, sender=ChatRoomMembership)
+def drop_cached_room_list(sender, **_):
+    transaction.on_commit(invalidate_public_rooms)
+
+
+@receiver(post_save, sender=ChatRoomMembership)
+def drop_cached_room_list_on_join(sender, created, **_):
+    if created:
+        transaction.on_commit(invalidate_public_rooms)
+
+
+def bootstrap_default_room(sender, **_):
+    """
+    기동 시 migrate 가 끝난 뒤 한 번만 기본 공개방을 만든다(요청마다 확인하지 않는다).
+    """
+    ensure_default_room()
@@ -1,3 +1,250 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from chatrooms.admin import ChatRoomMembershipAdmin
+from chatrooms.archive import _load_index, archive_room_messages, read_archived_before
+from chatrooms.history import record_message
+from chatrooms.membership import join_room, leave_room
+from chatrooms.models import ChatArchiveSegment, ChatMessage, ChatRoom, ChatRoomMembership
+from chatrooms.pagination import decode_cursor, encode_message_cursor, paginate_room_messages
+from common.outbound import SLOW_CONSUMER_CLOSE_CODE, OutboundFlowControlMixin
+from common.cursors import encode_cursor
+from common.storage import LocalArchiveStorage
+
+
+def _user(username):
+    return get_user_model().objects.create(username=username)
+
+
+class MembershipCapacityTests(TestCase):
+    def setUp(self):
+        self.owner = _user("owner")
+        self.room = ChatRoom.objects.create(name="capacity-room", owner=self.owner, capacity=2)
+
+    def _member_count(self):
+        return ChatRoom.objects.values_list("member_count", flat=True).get(pk=self.room.pk)
+
+    def test_join_counts_member_once(self):
+        guest = _user("guest")
+        self.assertTrue(join_room(self.room, guest))
+        self.assertFalse(join_room(self.room, guest))
+        self.assertEqual(self._member_count(), 1)
+
+    def test_join_rejects_full_room_without_changing_count(self):
+        join_room(self.room, _user("first"))
+        join_room(self.room, _user("second"))
+        with self.assertRaises(ValidationError):
+            join_room(self.room, _user("third"))
+        self.assertEqual(self._member_count(), 2)
+        self.assertEqual(ChatRoomMembership.objects.filter(room=self.room).count(), 2)
+
+    def test_join_undoes_reservation_on_duplicate_membership(self):
+        guest = _user("guest")
+        join_room(self.room, guest)
+        # 동시에 들어온 두 요청이 모두 exists() 검사를 통과한 경우를 흉내 낸다.
+        with mock.patch("django.db.models.query.QuerySet.exists", return_value=False):
+            self.assertFalse(join_room(self.room, guest))
+        self.assertEqual(self._member_count(), 1)
+
+    def test_leave_releases_seat_once(self):
+        guest = _user("guest")
+        join_room(self.room, guest)
+        self.assertTrue(leave_room(self.room, guest))
+        self.assertFalse(leave_room(self.room, guest))
+        self.assertEqual(self._member_count(), 0)
+
+    def test_admin_delete_releases_seats(self):
+        join_room(self.room, _user("first"))
+        join_room(self.room, _user("second"))
+        model_admin = ChatRoomMembershipAdmin(ChatRoomMembership, admin.site)
+        self.assertFalse(model_admin.has_add_permission(None))
+        model_admin.delete_queryset(None, ChatRoomMembership.objects.filter(room=self.room))
+        self.assertEqual(self._member_count(), 0)
+
+
+class DecodeCursorTests(TestCase):
+    def setUp(self):
+        self.user = _user("writer")
+        self.room = ChatRoom.objects.create(name="cursor-room")
+        self.other_room = ChatRoom.objects.create(name="cursor-other")
+        self.message = ChatMessage.objects.create(room=self.room, user=self.user, content="hello", seq=1)
+
+    def test_numeric_id_of_same_room(self):
+        self.assertEqual(
+            decode_cursor(str(self.message.pk), self.room),
+            (self.message.created_at, self.message.pk),
+        )
+
+    def test_numeric_id_of_other_room_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            decode_cursor(str(self.message.pk), self.other_room)
+
+    def test_opaque_cursor_round_trip(self):
+        token = encode_message_cursor(self.message)
+        self.assertEqual(decode_cursor(token, self.room), (self.message.created_at, self.message.pk))
+
+    def test_non_ascii_digits_are_rejected(self):
+        for token in ("²", "١٢", "garbage"):
+            with self.subTest(token=token), self.assertRaises(ValidationError):
+                decode_cursor(token, self.room)
+
+
+class AfterCursorPaginationTests(TestCase):
+    def setUp(self):
+        user = _user("pager")
+        self.room = ChatRoom.objects.create(name="pager-room")
+        start = timezone.now() - timedelta(hours=1)
+        self.messages = [
+            ChatMessage.objects.create(
+                room=self.room, user=user, content=f"m{seq}", seq=seq, created_at=start + timedelta(minutes=seq)
+            )
+            for seq in range(1, 4)
+        ]
+
+    def test_page_reaching_room_start_has_no_older_cursor(self):
+        first = self.messages[0]
+        cursor = encode_cursor(first.created_at - timedelta(minutes=1), 0)
+        messages, prev_cursor, next_cursor = paginate_room_messages(self.room, 10, after=cursor)
+        self.assertEqual([message.content for message in messages], ["m1", "m2", "m3"])
+        self.assertIsNone(prev_cursor)
+        self.assertIsNone(next_cursor)
+
+    def test_page_after_existing_message_has_older_cursor(self):
+        messages, prev_cursor, _next_cursor = paginate_room_messages(self.room, 1, after=str(self.messages[0].pk))
+        self.assertEqual([message.content for message in messages], ["m2"])
+        self.assertEqual(prev_cursor, encode_message_cursor(self.messages[1]))
+
+
+class MessageListConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = _user("reader")
+        self.room = ChatRoom.objects.create(name="etag-room")
+        ChatRoomMembership.objects.create(room=self.room, user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("chatrooms:room-messages", args=[self.room.pk])
+
+    def _post(self, content):
+        seq = ChatMessage.objects.filter(room=self.room).count() + 1
+        message = ChatMessage.objects.create(room=self.room, user=self.user, content=content, seq=seq)
+        record_message(message)
+        return message
+
+    def test_unchanged_list_returns_304(self):
+        self._post("first")
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("ETag", first)
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], first["ETag"])
+
+    def test_new_message_returns_200_with_new_etag(self):
+        self._post("first")
+        first = self.client.get(self.url)
+        self._post("second")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        self.assertEqual([message["content"] for message in response.data["messages"]], ["first", "second"])
+
+    def test_query_params_are_part_of_etag(self):
+        first = self.client.get(self.url)
+        response = self.client.get(self.url, {"limit": 1}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+
+
+class _FrameSender:
+    async def __call__(self, scope, receive, send):
+        self.base_send = send
+        await self.run()
+
+
+class _StubFlowConsumer(OutboundFlowControlMixin, _FrameSender):
+    def __init__(self, frames, ack_first):
+        self.frames = frames
+        self.ack_first = ack_first
+
+    async def send_json(self, content):
+        await self.base_send({"type": "websocket.send", "text": json.dumps(content)})
+
+    async def run(self):
+        if self.ack_first:
+            await self.handle_flow_ack({"action": "ack", "received": 0})
+        for index in range(self.frames):
+            await self.send_json({"seq": index})
+
+
+@override_settings(WS_OUTBOUND_MAX_FRAMES=200)
+class OutboundFlowControlTests(SimpleTestCase):
+    def _run(self, frames, ack_first):
+        delivered = []
+
+        async def send(message):
+            delivered.append(message)
+
+        async def receive():
+            return {}
+
+        async_to_sync(_StubFlowConsumer(frames, ack_first))({"type": "websocket"}, receive, send)
+        return delivered
+
+    def test_client_that_never_acks_is_not_windowed(self):
+        delivered = self._run(1000, ack_first=False)
+        self.assertEqual(len(delivered), 1000)
+        self.assertTrue(all(message["type"] == "websocket.send" for message in delivered))
+
+    def test_acking_client_that_stalls_is_closed_for_resume(self):
+        delivered = self._run(1000, ack_first=True)
+        self.assertEqual(len(delivered), 201)
+        self.assertEqual(delivered[-1]["type"], "websocket.close")
+        self.assertEqual(delivered[-1]["code"], SLOW_CONSUMER_CLOSE_CODE)
+
+
+class ArchivedUserDeletionTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        patcher = mock.patch("common.storage._archive_storage", LocalArchiveStorage(self.root))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        _load_index.cache_clear()
+
+        self.keep = _user("keep")
+        self.gone = _user("gone")
+        self.room = ChatRoom.objects.create(name="archive-room")
+        start = timezone.now() - timedelta(days=10)
+        for seq, user in enumerate([self.keep, self.gone, self.gone, self.gone], start=1):
+            ChatMessage.objects.create(
+                room=self.room, user=user, content=f"m{seq}", seq=seq, created_at=start + timedelta(minutes=seq)
+            )
+        archive_room_messages(self.room.pk, timezone.now(), segment_size=2)
+
+    def test_deleting_user_removes_their_archived_messages(self):
+        self.assertEqual(ChatArchiveSegment.objects.filter(authors=self.gone).count(), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gone.delete()
+
+        segment = ChatArchiveSegment.objects.get(room=self.room)
+        self.assertEqual(segment.message_count, 1)
+        self.room.refresh_from_db()
+        self.assertEqual([message.content for message in read_archived_before(self.room, None, 10)], ["m1"])
+        self.assertEqual(
+            sorted(path.name for path in self.root.rglob("*") if path.is_file()),
+            sorted([Path(segment.path).name, f"{Path(segment.path).name}.idx"]),
+        )
@@ -1,6 +1,8 @@
 from django.urls import path
 
 from chatrooms.views import (
+    ChatMessageSearchView,
+    ChatRoomInboxView,
     ChatRoomJoinView,
     ChatRoomLeaveView,
     ChatRoomListCreateView,
@@ -12,7 +14,10 @@ app_name = "chatrooms"
 
 urlpatterns = [
     path("rooms", ChatRoomListCreateView.as_view(), name="room-list"),
+    path("rooms/mine", ChatRoomInboxView.as_view(), name="room-inbox"),
     path("rooms/join", ChatRoomJoinView.as_view(), name="room-join"),
     path("rooms/<int:room_id>/leave", ChatRoomLeaveView.as_view(), name="room-leave"),
     path("rooms/<int:room_id>/messages", ChatRoomMessageListCreateView.as_view(), name="room-messages"),
+    path("rooms/<int:room_id>/messages/search", ChatMessageSearchView.as_view(), name="room-message-search"),
+    path("messages/search", ChatMessageSearchView.as_view(), name="message-search"),
 ]
@@ -1,4 +1,3 @@
-from django.db.models import Count
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.exceptions import PermissionDenied
@@ -6,48 +5,51 @@ from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnl
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from chatrooms.history import is_staff_viewer, record_message
+from chatrooms.inbox import load_inbox, notify_membership_changed, publish_room_activity
+from chatrooms.membership import join_room, leave_room
 from chatrooms.models import ChatMessage, ChatRoom, ChatRoomMembership
+from chatrooms.pagination import paginate_room_messages
+from chatrooms.presence import get_presence
+from chatrooms.room_list import public_room_list
 from chatrooms.serializers import (
     ChatMessageSerializer,
     ChatRoomCreateSerializer,
     ChatRoomJoinSerializer,
     ChatRoomSerializer,
 )
+from common.conditional import conditional_get, etag_matches, make_etag
+from common.search import search_page
 
 
 class ChatRoomListCreateView(APIView):
+    """
+    공개 방 목록은 버전별로 캐시된 공유 본문 위에 사용자별 is_member 와 접속자 수만 덧씌운다.
+    ETag 는 (목록 버전, 내 멤버십, 접속자 수) 로 계산하므로 본문을 만들지 않고 304 를 돌려줄 수 있다.
+    """
+
     permission_classes = [IsAuthenticatedOrReadOnly]
-    DEFAULT_ROOM_NAME = "오픈 라운지"
-
-    def ensure_default_room(self):
-        if ChatRoom.objects.filter(is_private=False).exists():
-            return
-        ChatRoom.objects.get_or_create(
-            name=self.DEFAULT_ROOM_NAME,
-            defaults={"capacity": 200, "is_private": False},
-        )
 
     def get(self, request):
-        self.ensure_default_room()
-        rooms = (
-            ChatRoom.objects.filter(is_private=False)
-            .annotate(current_members=Count("memberships"))
-            .order_by("name")
-        )
-        room_ids = list(rooms.values_list("id", flat=True))
+        version, rooms = public_room_list()
+        room_ids = [room["id"] for room in rooms]
         member_ids = set()
         if request.user.is_authenticated and room_ids:
             member_ids = set(
-                ChatRoomMembership.objects.filter(user=request.user, room_id__in=room_ids).values_list(
+                ChatRoomMembership.objects.filter(user=request.user, room__is_private=False).values_list(
                     "room_id", flat=True
                 )
             )
-        payload = ChatRoomSerializer(
-            rooms,
-            many=True,
-            context={"request": request, "member_room_ids": member_ids},
-        ).data
-        return Response({"rooms": payload})
+        online_counts = get_presence().online_counts(room_ids)
+        etag = make_etag("rooms", version, sorted(member_ids), sorted(online_counts.items()))
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        payload = [
+            {**room, "online_count": online_counts.get(room["id"], 0), "is_member": room["id"] in member_ids}
+            for room in rooms
+        ]
+        return Response({"rooms": payload}, headers=headers)
 
     def post(self, request):
         if not request.user.is_authenticated:
@@ -55,17 +57,25 @@ class ChatRoomListCreateView(APIView):
         serializer = ChatRoomCreateSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
         room = serializer.save()
-        ChatRoomMembership.objects.get_or_create(room=room, user=request.user)
-        enriched_room = (
-            ChatRoom.objects.filter(pk=room.pk).annotate(current_members=Count("memberships")).first()
-        )
-        data = ChatRoomSerializer(
-            enriched_room or room,
-            context={"request": request, "member_room_ids": {room.id}},
-        ).data
+        join_room(room, request.user)
+        notify_membership_changed(request.user.id)
+        room.refresh_from_db(fields=["member_count"])
+        data = ChatRoomSerializer(room, context={"request": request, "member_room_ids": {room.id}}).data
         return Response({"room": data}, status=status.HTTP_201_CREATED)
 
 
+class ChatRoomInboxView(APIView):
+    """
+    내가 속한 방(비공개 포함)을 마지막 메시지 미리보기, 안 읽은 수와 함께 최근 활동 순으로 돌려준다.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        rooms, _state = load_inbox(request.user)
+        return Response({"rooms": rooms})
+
+
 class ChatRoomJoinView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -73,14 +83,10 @@ class ChatRoomJoinView(APIView):
         serializer = ChatRoomJoinSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
         room = serializer.validated_data["room"]
-        ChatRoomMembership.objects.get_or_create(room=room, user=request.user)
-        enriched_room = (
-            ChatRoom.objects.filter(pk=room.pk).annotate(current_members=Count("memberships")).first()
-        )
-        data = ChatRoomSerializer(
-            enriched_room or room,
-            context={"request": request, "member_room_ids": {room.id}},
-        ).data
+        if join_room(room, request.user):
+            notify_membership_changed(request.user.id)
+            room.refresh_from_db(fields=["member_count"])
+        data = ChatRoomSerializer(room, context={"request": request, "member_room_ids": {room.id}}).data
         return Response({"room": data}, status=status.HTTP_200_OK)
 
 
@@ -89,7 +95,8 @@ class ChatRoomLeaveView(APIView):
 
     def post(self, request, room_id):
         room = get_object_or_404(ChatRoom, pk=room_id)
-        ChatRoomMembership.objects.filter(room=room, user=request.user).delete()
+        if leave_room(room, request.user):
+            notify_membership_changed(request.user.id)
         return Response({"detail": "채팅방에서 나갔습니다."}, status=status.HTTP_200_OK)
 
 
@@ -113,19 +120,45 @@ class ChatRoomMessageListCreateView(APIView):
             limit = self.DEFAULT_LIMIT
         return max(1, min(limit, self.MAX_LIMIT))
 
+    def _member_room(self, request, room_id):
+        room = getattr(self, "_room", None)
+        if room is None or room.pk != int(room_id):
+            room = self._get_room(room_id)
+            self._ensure_member(room, request.user)
+            self._room = room
+        return room
+
+    def get_validators(self, request, room_id):
+        """
+        방의 마지막 메시지 포인터와 updated_at(메시지 삭제 시 갱신)을 버전으로 쓴다.
+        포인터는 메시지 행이 읽힐 수 있게 된 뒤에만 옮겨지므로(write-behind 는 flush 때) 본문보다 앞서지 않는다.
+        """
+        room = self._member_room(request, room_id)
+        etag = make_etag(
+            "messages",
+            room.pk,
+            room.last_message_seq,
+            room.last_message_id,
+            room.updated_at,
+            is_staff_viewer(request.user),
+            sorted(request.query_params.items()),
+        )
+        return etag, None
+
+    @conditional_get
     def get(self, request, room_id):
-        room = self._get_room(room_id)
-        self._ensure_member(room, request.user)
+        room = self._member_room(request, room_id)
         limit = self._get_limit(request)
-        queryset = (
-            ChatMessage.objects.filter(room=room)
-            .select_related("user")
-            .order_by("-created_at")[:limit]
+        messages, prev_cursor, next_cursor = paginate_room_messages(
+            room,
+            limit,
+            before=request.query_params.get("before_id"),
+            after=request.query_params.get("after_id"),
         )
-        messages = list(queryset)
-        messages.reverse()
         serializer = ChatMessageSerializer(messages, many=True, context={"request": request})
-        return Response({"messages": serializer.data})
+        return Response(
+            {"messages": serializer.data, "prev_cursor": prev_cursor, "next_cursor": next_cursor}
+        )
 
     def post(self, request, room_id):
         room = self._get_room(room_id)
@@ -133,7 +166,46 @@ class ChatRoomMessageListCreateView(APIView):
         serializer = ChatMessageSerializer(data=request.data, context={"request": request, "room": room})
         serializer.is_valid(raise_exception=True)
         message = serializer.save()
+        entry = record_message(message)
+        publish_room_activity(room.id, entry, request.user.id)
         return Response(
             ChatMessageSerializer(message, context={"request": request}).data,
             status=status.HTTP_201_CREATED,
         )
+
+
+class ChatMessageSearchView(APIView):
+    """
+    내가 참여한 방의 메시지를 최신 순으로 검색한다. room_id 가 있으면 그 방 안에서만 찾는다.
+    아카이브로 옮겨진 메시지는 검색 대상이 아니다.
+    """
+
+    permission_classes = [IsAuthenticated]
+    DEFAULT_LIMIT = 30
+    MAX_LIMIT = 100
+
+    def _get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            limit = self.DEFAULT_LIMIT
+        return max(1, min(limit, self.MAX_LIMIT))
+
+    def get(self, request, room_id=None):
+        memberships = ChatRoomMembership.objects.filter(user=request.user)
+        if room_id is not None:
+            room = get_object_or_404(ChatRoom, pk=room_id)
+            if not memberships.filter(room=room).exists():
+                raise PermissionDenied("채팅방에 먼저 입장해 주세요.")
+            queryset = ChatMessage.objects.filter(room_id=room.id)
+        else:
+            queryset = ChatMessage.objects.filter(room_id__in=memberships.values("room_id"))
+        messages, next_cursor = search_page(
+            queryset.select_related("user"),
+            ["content"],
+            request.query_params.get("q"),
+            self._get_limit(request),
+            cursor=request.query_params.get("cursor"),
+        )
+        serializer = ChatMessageSerializer(messages, many=True, context={"request": request})
+        return Response({"messages": serializer.data, "next_cursor": next_cursor})
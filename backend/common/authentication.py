@@ -1,10 +1,191 @@
-from datetime import timedelta
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs
 
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import DEFAULT_DB_ALIAS
 from django.utils import timezone
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
 from rest_framework.exceptions import AuthenticationFailed
 
+from common.redis_client import get_redis_client
+
+
+class TokenIdentityCache:
+    """
+    토큰 키 → (사용자 기본 정보, 토큰 생성 시각) 캐시.
+    프로세스 내 TTL LRU 를 먼저 보고, REDIS_URL 이 있으면 Redis 를 2단계로 사용한다.
+    Redis 를 쓰는 경우 다른 워커에서의 무효화는 로컬 TTL(기본 5초) 안에 반영된다.
+    """
+
+    KEY_PREFIX = "auth:token"
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_entries(self):
+        return getattr(settings, "AUTH_TOKEN_CACHE_MAX_ENTRIES", 10000)
+
+    @property
+    def shared_ttl(self):
+        return getattr(settings, "AUTH_TOKEN_CACHE_SECONDS", 300)
+
+    @property
+    def local_ttl(self):
+        if get_redis_client() is None:
+            return self.shared_ttl
+        return getattr(settings, "AUTH_TOKEN_LOCAL_CACHE_SECONDS", 5)
+
+    def get_local(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            identity, expires = item
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return identity
+
+    def get(self, key):
+        identity = self.get_local(key)
+        if identity is not None:
+            return identity
+        client = get_redis_client()
+        if client is None:
+            return None
+        raw = client.get(f"{self.KEY_PREFIX}:{key}")
+        if raw is None:
+            return None
+        identity = json.loads(raw)
+        self._set_local(key, identity, self.local_ttl)
+        return identity
+
+    def set(self, key, identity, max_ttl):
+        ttl = max(0, min(self.shared_ttl, int(max_ttl)))
+        if ttl <= 0:
+            return
+        self._set_local(key, identity, min(self.local_ttl, ttl))
+        client = get_redis_client()
+        if client is not None:
+            client.set(f"{self.KEY_PREFIX}:{key}", json.dumps(identity), ex=ttl)
+
+    def _set_local(self, key, identity, ttl):
+        with self._lock:
+            self._entries[key] = (identity, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *keys):
+        if not keys:
+            return
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        client = get_redis_client()
+        if client is not None:
+            client.delete(*[f"{self.KEY_PREFIX}:{key}" for key in keys])
+
+
+token_cache = TokenIdentityCache()
+
+
+def invalidate_token(key):
+    token_cache.invalidate(key)
+
+
+def invalidate_user_tokens(user_id):
+    keys = list(Token.objects.filter(user_id=user_id).values_list("key", flat=True))
+    token_cache.invalidate(*keys)
+
+
+def _cached_user_fields():
+    """
+    비밀번호 해시를 제외한 User 컬럼 전부를 캐시한다(비밀번호는 필요할 때만 지연 로딩).
+    """
+    return [field for field in get_user_model()._meta.concrete_fields if field.attname != "password"]
+
+
+def _encode(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _load_identity(key):
+    fields = _cached_user_fields()
+    row = (
+        Token.objects.filter(key=key)
+        .values("created", *["user__" + field.attname for field in fields])
+        .first()
+    )
+    if row is None:
+        return None
+    identity = {"user": {field.attname: _encode(row["user__" + field.attname]) for field in fields}}
+    identity["created"] = row["created"].isoformat()
+    return identity
+
+
+def _build_user(identity):
+    """
+    캐시된 필드로 User 인스턴스를 만든다. password 필드만 접근할 때 지연 로딩된다.
+    """
+    data = identity["user"]
+    names, values = [], []
+    for field in _cached_user_fields():
+        value = data.get(field.attname)
+        if value is not None and field.get_internal_type() == "DateTimeField":
+            value = datetime.fromisoformat(value)
+        names.append(field.attname)
+        values.append(value)
+    return get_user_model().from_db(DEFAULT_DB_ALIAS, names, values)
+
+
+def _remaining_seconds(identity):
+    created = datetime.fromisoformat(identity["created"])
+    ttl = getattr(settings, "AUTH_TOKEN_TTL_SECONDS", 1800)
+    return (created + timedelta(seconds=ttl) - timezone.now()).total_seconds()
+
+
+def authenticate_token_key(key):
+    """
+    REST/WebSocket 공용 토큰 인증. 캐시 적중 시 DB 조회 없이 (user, token) 을 돌려준다.
+    """
+    identity = token_cache.get(key)
+    if identity is None:
+        identity = _load_identity(key)
+        if identity is None:
+            raise AuthenticationFailed("유효하지 않은 토큰입니다.")
+        cached = False
+    else:
+        cached = True
+
+    if not identity["user"]["is_active"]:
+        raise AuthenticationFailed("비활성화된 사용자입니다.")
+
+    remaining = _remaining_seconds(identity)
+    if remaining <= 0:
+        Token.objects.filter(key=key).delete()
+        token_cache.invalidate(key)
+        raise AuthenticationFailed("로그인 세션이 만료되었습니다. 다시 로그인해 주세요.")
+
+    if not cached:
+        token_cache.set(key, identity, remaining)
+    user = _build_user(identity)
+    token = Token(key=key, user_id=user.pk, created=datetime.fromisoformat(identity["created"]))
+    token.user = user
+    return user, token
+
 
 class ExpiringTokenAuthentication(TokenAuthentication):
     """
@@ -13,19 +194,39 @@ class ExpiringTokenAuthentication(TokenAuthentication):
     """
 
     def authenticate_credentials(self, key):
-        model = self.get_model()
-        try:
-            token = model.objects.select_related("user").get(key=key)
-        except model.DoesNotExist as exc:
-            raise AuthenticationFailed("유효하지 않은 토큰입니다.") from exc
-
-        if not token.user.is_active:
-            raise AuthenticationFailed("비활성화된 사용자입니다.")
-
-        ttl = getattr(settings, "AUTH_TOKEN_TTL_SECONDS", 1800)
-        expires_at = token.created + timedelta(seconds=ttl)
-        if timezone.now() >= expires_at:
-            token.delete()
-            raise AuthenticationFailed("로그인 세션이 만료되었습니다. 다시 로그인해 주세요.")
-
-        return (token.user, token)
+        return authenticate_token_key(key)
+
+
+def _token_from_scope(scope):
+    query = scope.get("query_string", b"")
+    try:
+        params = parse_qs(query.decode())
+    except Exception:
+        return None
+    return params.get("token", [None])[0]
+
+
+def _scope_user_sync(key):
+    try:
+        user, _token = authenticate_token_key(key)
+    except AuthenticationFailed:
+        return AnonymousUser()
+    return user
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """
+    WebSocket 쿼리스트링의 ?token= 을 REST 와 같은 규칙(TTL 포함)으로 인증해 scope["user"] 에 넣는다.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        key = _token_from_scope(scope)
+        identity = token_cache.get_local(key) if key else None
+        if not key:
+            scope["user"] = AnonymousUser()
+        elif identity is not None and identity["user"]["is_active"] and _remaining_seconds(identity) > 0:
+            scope["user"] = _build_user(identity)
+        else:
+            scope["user"] = await database_sync_to_async(_scope_user_sync)(key)
+        return await super().__call__(scope, receive, send)
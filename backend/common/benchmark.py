@@ -0,0 +1,162 @@
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import django
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.utils import timezone
+
+
+def percentile(sorted_values, fraction):
+    """
+    정렬된 값 목록의 백분위수(최근접 순위). 값이 없으면 None.
+    """
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(rank, 1)) - 1]
+
+
+def summarize_ms(samples):
+    """
+    초 단위 측정값 목록을 밀리초 단위 count/min/p50/p95/p99/max/mean 으로 요약한다.
+    """
+    values = sorted(samples)
+    if not values:
+        return {"count": 0}
+    ms = lambda value: round(value * 1000, 3)  # noqa: E731
+    return {
+        "count": len(values),
+        "min": ms(values[0]),
+        "p50": ms(percentile(values, 0.50)),
+        "p95": ms(percentile(values, 0.95)),
+        "p99": ms(percentile(values, 0.99)),
+        "max": ms(values[-1]),
+        "mean": ms(sum(values) / len(values)),
+    }
+
+
+class _RowCountingCursor:
+    """
+    DB-API 커서를 감싸 fetch 로 실제로 가져간 행 수를 센다. 나머지 속성은 그대로 넘긴다.
+    """
+
+    def __init__(self, cursor, recorder):
+        self._cursor = cursor
+        self._recorder = recorder
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._recorder.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._recorder.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._recorder.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._recorder.rows += 1
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class QueryRecorder:
+    """
+    블록 안에서 실행된 SQL 문 수, 가져온 행 수, DB 에서 보낸 시간을 잰다(connection.execute_wrapper 사용).
+    """
+
+    def __init__(self, using=None):
+        self.connection = connections[using or DEFAULT_DB_ALIAS]
+        self.queries = 0
+        self.rows = 0
+        self.db_seconds = 0.0
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        wrapper = context["cursor"]
+        if not isinstance(wrapper.cursor, _RowCountingCursor):
+            wrapper.cursor = _RowCountingCursor(wrapper.cursor, self)
+        self.queries += 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._wrapper.__exit__(*exc_info)
+
+
+def rss_bytes():
+    """
+    현재 프로세스의 RSS. /proc 이 없으면(macOS 등) 최대 RSS 로 대신한다.
+    """
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def git_revision():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_metadata():
+    """
+    커밋 사이 결과를 비교할 때 같이 봐야 하는 실행 환경 정보.
+    """
+    return {
+        "created_at": timezone.now().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "platform": platform.platform(),
+    }
+
+
+def write_report(path, report):
+    """
+    결과를 JSON 으로 저장한다. path 가 "-" 이면 표준 출력으로 보낸다.
+    """
+    text = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+    if path == "-":
+        sys.stdout.write(text + "\n")
+        return
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(text + "\n")
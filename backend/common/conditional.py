@@ -0,0 +1,92 @@
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+PRIVATE_REVALIDATE = "private, no-cache"
+PUBLIC_REVALIDATE = "public, no-cache"
+
+
+def make_etag(*parts):
+    """
+    버전 토큰들로 약한 ETag 를 만든다. 응답 본문을 만들지 않고 계산할 수 있는 값만 넘긴다.
+    """
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def presigned_url_epoch(*field_files):
+    """
+    본문에 presigned URL 이 들어가면 그 URL 의 수명 절반 단위로 바뀌는 시각을 돌려준다(아니면 None).
+    ETag 와 Last-Modified 에 섞어 두면 304 를 계속 받는 클라이언트도 만료 전에 새 URL 을 받아 간다.
+    """
+    if not settings.USE_S3 or not any(field_files):
+        return None
+    step = max(getattr(settings, "AWS_PRESIGNED_URL_EXPIRES", 3600) // 2, 1)
+    return datetime.fromtimestamp(int(time.time()) // step * step, tz=timezone.utc)
+
+
+def _opaque(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(request, etag):
+    """
+    If-None-Match 가 etag 와 (약한 비교로) 일치하면 True.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    return "*" in candidates or _opaque(etag) in {_opaque(candidate) for candidate in candidates}
+
+
+def modified_since_matches(request, last_modified):
+    """
+    If-Modified-Since 이후로 바뀐 게 없으면 True. HTTP 날짜는 초 단위라 초 미만은 버리고 비교한다.
+    """
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since") or "")
+    return since is not None and int(last_modified.timestamp()) <= since
+
+
+def conditional_get(method):
+    """
+    APIView.get 데코레이터. view.get_validators(request, *args, **kwargs) 가 돌려준 (etag, last_modified) 로
+    조건부 요청을 먼저 확인해, 바뀐 게 없으면 본문을 만들지 않고 304 를 돌려준다.
+    If-None-Match 가 있으면 If-Modified-Since 는 보지 않는다(RFC 9110).
+    응답에는 view.cache_control(기본 private, no-cache) 을 붙여 브라우저/프록시가 저장 후 재검증하게 한다.
+    """
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        headers = {"Cache-Control": getattr(self, "cache_control", PRIVATE_REVALIDATE)}
+        if etag:
+            headers["ETag"] = etag
+        if last_modified:
+            headers["Last-Modified"] = http_date(last_modified.timestamp())
+
+        if request.headers.get("If-None-Match"):
+            not_modified = bool(etag) and etag_matches(request, etag)
+        else:
+            not_modified = bool(last_modified) and modified_since_matches(request, last_modified)
+        if not_modified:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = method(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        for name, value in headers.items():
+            response[name] = value
+        if headers["Cache-Control"].startswith("private"):
+            patch_vary_headers(response, ("Authorization",))
+        return response
+
+    return wrapper
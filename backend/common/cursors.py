@@ -0,0 +1,30 @@
+import base64
+import binascii
+
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(created_at, object_id):
+    """
+    (created_at, id) 쌍을 클라이언트가 그대로 돌려주는 불투명 커서로 만든다.
+    """
+    if not isinstance(created_at, str):
+        created_at = created_at.isoformat()
+    raw = f"{created_at}|{object_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor_token(token):
+    """
+    encode_cursor 로 만든 커서를 (created_at, id) 로 되돌린다. 형식이 틀리면 None.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_raw, object_id = base64.urlsafe_b64decode(padded).decode().rsplit("|", 1)
+        created_at = parse_datetime(created_raw)
+        object_id = int(object_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+    if created_at is None:
+        return None
+    return created_at, object_id
@@ -0,0 +1,76 @@
+import os
+import socket
+import uuid
+import zlib
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+from common.redis_client import get_redis_client
+
+
+class LocalLeaderLock:
+    """
+    Redis 도 PostgreSQL 도 없는 단일 프로세스(개발) 환경. 항상 리더다.
+    """
+
+    @contextmanager
+    def hold(self):
+        yield True
+
+
+class PostgresLeaderLock:
+    """
+    pg_try_advisory_xact_lock 으로 한 번의 작업(트랜잭션) 동안만 잡는 잠금.
+    블록 전체가 한 트랜잭션이므로, 블록 안의 DB 작업은 잠금과 함께 커밋된다.
+    """
+
+    def __init__(self, name):
+        self.key = zlib.crc32(name.encode())
+
+    @contextmanager
+    def hold(self):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [self.key])
+                acquired = cursor.fetchone()[0]
+            yield acquired
+
+
+class RedisLeaderLock:
+    """
+    TTL 이 있는 임대(lease). 리더는 hold 할 때마다 임대를 연장하고, 리더 프로세스가 죽으면 TTL 뒤 다른 프로세스가 넘겨받는다.
+    """
+
+    KEY_PREFIX = "leader"
+
+    ACQUIRE_SCRIPT = """
+    local holder = redis.call('GET', KEYS[1])
+    if holder == false or holder == ARGV[1] then
+        redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, client, name, ttl_seconds):
+        self.key = f"{self.KEY_PREFIX}:{name}"
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.token = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._acquire = client.register_script(self.ACQUIRE_SCRIPT)
+
+    @contextmanager
+    def hold(self):
+        yield bool(self._acquire(keys=[self.key], args=[self.token, self.ttl_ms]))
+
+
+def get_leader_lock(name, ttl_seconds):
+    """
+    여러 워커 중 한 곳에서만 돌아야 하는 주기 작업용 잠금. Redis → PostgreSQL advisory lock → 로컬 순으로 고른다.
+    """
+    client = get_redis_client()
+    if client is not None:
+        return RedisLeaderLock(client, name, ttl_seconds)
+    if connection.vendor == "postgresql":
+        return PostgresLeaderLock(name)
+    return LocalLeaderLock()
@@ -0,0 +1,43 @@
+import threading
+
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_observations = {}
+
+
+def increment(name, value=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name, value):
+    with _lock:
+        _gauges[name] = value
+
+
+def adjust_gauge(name, delta):
+    with _lock:
+        _gauges[name] = _gauges.get(name, 0) + delta
+
+
+def observe(name, value):
+    """
+    값 분포를 count/sum/max/last 로만 요약해 둔다(프로세스 단위).
+    """
+    with _lock:
+        stats = _observations.setdefault(name, {"count": 0, "sum": 0, "max": value, "last": value})
+        stats["count"] += 1
+        stats["sum"] += value
+        stats["max"] = max(stats["max"], value)
+        stats["last"] = value
+
+
+def snapshot():
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "observations": {name: dict(stats) for name, stats in _observations.items()},
+        }
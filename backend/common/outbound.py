@@ -0,0 +1,168 @@
+import contextvars
+from collections import deque
+
+from django.conf import settings
+
+from common import metrics
+
+SLOW_CONSUMER_CLOSE_CODE = 4008
+SLOW_CONSUMER_CLOSE_REASON = "resume"
+
+_droppable = contextvars.ContextVar("ws_outbound_droppable", default=False)
+
+
+class OutboundWindow:
+    """
+    연결 하나의 송신 창. 클라이언트의 첫 ack 로 활성화되며, ack 의 received 는 연결 후 받은 프레임 누적 개수다.
+    창 활성화 전에 보낸 프레임은 이미 ack 된 것으로 센다.
+    전송 중(ack 전) 프레임이 한도에 닿으면 나머지는 pending 에 쌓고, pending 도 한도를 넘으면 넘친 것으로 본다.
+    """
+
+    def __init__(self, max_frames, max_bytes):
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.enabled = False
+        self.closed = False
+        self.sent = 0
+        self.acked = 0
+        self.inflight = deque()
+        self.inflight_bytes = 0
+        self.pending = deque()
+        self.pending_bytes = 0
+
+    def has_room(self, size):
+        if not self.inflight:
+            return True
+        return len(self.inflight) < self.max_frames and self.inflight_bytes + size <= self.max_bytes
+
+    def record_sent(self, size):
+        self.sent += 1
+        self.inflight.append(size)
+        self.inflight_bytes += size
+        metrics.adjust_gauge("ws_outbound.inflight_frames", 1)
+        metrics.adjust_gauge("ws_outbound.inflight_bytes", size)
+
+    def record_unwindowed(self):
+        self.sent += 1
+        self.acked += 1
+
+    def ack(self, received):
+        received = min(received, self.sent)
+        while self.acked < received:
+            size = self.inflight.popleft()
+            self.inflight_bytes -= size
+            self.acked += 1
+            metrics.adjust_gauge("ws_outbound.inflight_frames", -1)
+            metrics.adjust_gauge("ws_outbound.inflight_bytes", -size)
+
+    def push(self, message, size, droppable):
+        self.pending.append((message, size, droppable))
+        self.pending_bytes += size
+        metrics.adjust_gauge("ws_outbound.pending_frames", 1)
+        metrics.adjust_gauge("ws_outbound.pending_bytes", size)
+
+    def pop(self):
+        message, size, droppable = self.pending.popleft()
+        self.pending_bytes -= size
+        metrics.adjust_gauge("ws_outbound.pending_frames", -1)
+        metrics.adjust_gauge("ws_outbound.pending_bytes", -size)
+        return message, size
+
+    def overflowing(self):
+        return len(self.pending) > self.max_frames or self.pending_bytes > self.max_bytes
+
+    def drop_oldest_droppable(self):
+        for index, (_message, size, droppable) in enumerate(self.pending):
+            if droppable:
+                del self.pending[index]
+                self.pending_bytes -= size
+                metrics.adjust_gauge("ws_outbound.pending_frames", -1)
+                metrics.adjust_gauge("ws_outbound.pending_bytes", -size)
+                metrics.increment("ws_outbound.dropped")
+                return True
+        return False
+
+    def release(self):
+        metrics.adjust_gauge("ws_outbound.inflight_frames", -len(self.inflight))
+        metrics.adjust_gauge("ws_outbound.inflight_bytes", -self.inflight_bytes)
+        metrics.adjust_gauge("ws_outbound.pending_frames", -len(self.pending))
+        metrics.adjust_gauge("ws_outbound.pending_bytes", -self.pending_bytes)
+        self.inflight.clear()
+        self.pending.clear()
+        self.inflight_bytes = self.pending_bytes = 0
+
+
+class OutboundFlowControlMixin:
+    """
+    소켓별 송신 버퍼 상한. 클라이언트가 {"action": "ack", "received": N} 을 한 번이라도 보내면 활성화된다.
+    ack 를 보내지 않는 클라이언트(random-chat.html, 단일 방/받은편지함 소켓)는 창 없이 그대로 받는다.
+    넘칠 때 presence/typing 같은 버려도 되는 프레임은 오래된 것부터 버리고,
+    채팅 메시지가 넘치면 SLOW_CONSUMER_CLOSE_CODE 로 끊어 last_seq 재접속(resume)을 유도한다.
+    """
+
+    async def __call__(self, scope, receive, send):
+        self._outbound = OutboundWindow(
+            getattr(settings, "WS_OUTBOUND_MAX_FRAMES", 200),
+            getattr(settings, "WS_OUTBOUND_MAX_BYTES", 512 * 1024),
+        )
+        self._raw_send = send
+        try:
+            return await super().__call__(scope, receive, self._flow_send)
+        finally:
+            self._outbound.release()
+
+    async def send_droppable_json(self, content):
+        token = _droppable.set(True)
+        try:
+            await self.send_json(content)
+        finally:
+            _droppable.reset(token)
+
+    async def handle_flow_ack(self, content):
+        if content.get("action") != "ack":
+            return False
+        try:
+            received = int(content.get("received"))
+        except (TypeError, ValueError):
+            return True
+        window = self._outbound
+        window.enabled = True
+        window.ack(received)
+        while window.pending and window.has_room(window.pending[0][1]):
+            message, size = window.pop()
+            window.record_sent(size)
+            await self._raw_send(message)
+        return True
+
+    async def _flow_send(self, message):
+        window = self._outbound
+        if window.closed:
+            return
+        if message["type"] != "websocket.send":
+            await self._raw_send(message)
+            return
+        if not window.enabled:
+            window.record_unwindowed()
+            await self._raw_send(message)
+            return
+        size = len(message.get("text") or message.get("bytes") or "")
+        if not window.pending and window.has_room(size):
+            window.record_sent(size)
+            await self._raw_send(message)
+            return
+        droppable = _droppable.get()
+        window.push(message, size, droppable)
+        while window.overflowing():
+            if window.drop_oldest_droppable():
+                continue
+            await self._close_slow_consumer()
+            return
+
+    async def _close_slow_consumer(self):
+        window = self._outbound
+        window.closed = True
+        window.release()
+        metrics.increment("ws_outbound.slow_consumer_closed")
+        await self._raw_send(
+            {"type": "websocket.close", "code": SLOW_CONSUMER_CLOSE_CODE, "reason": SLOW_CONSUMER_CLOSE_REASON}
+        )
@@ -0,0 +1,262 @@
+from datetime import date
+
+from django.db import connection as default_connection
+
+PARTITION_KEY = "created_at"
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table):
+    """
+    (파티션 이름, 시작 월) 목록. DEFAULT 파티션은 시작 월이 None 이다.
+    """
+    cursor.execute(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s AND pg_table_is_visible(p.oid) ORDER BY c.relname",
+        [table],
+    )
+    partitions = []
+    for name, bound in cursor.fetchall():
+        start = None
+        if bound != "DEFAULT" and name.startswith(f"{table}_p"):
+            suffix = name[len(table) + 2 :]
+            start = date(int(suffix[:4]), int(suffix[4:6]), 1)
+        partitions.append((name, start))
+    return partitions
+
+
+def _quote(connection, name):
+    return connection.ops.quote_name(name)
+
+
+def create_month_partition(cursor, connection, table, month):
+    """
+    month 가 속한 달의 파티션을 만든다. DEFAULT 파티션에 이미 그 달 행이 들어와 있으면
+    새 파티션으로 옮긴 뒤 ATTACH 한다. 이미 있으면 아무것도 하지 않는다.
+    """
+    month = month_start(month)
+    name = partition_name(table, month)
+    if any(existing == name for existing, _start in list_partitions(cursor, table)):
+        return False
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    qtable, qname = _quote(connection, table), _quote(connection, name)
+    cursor.execute(f"CREATE TABLE {qname} (LIKE {qtable} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    default = _quote(connection, f"{table}_default")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {default} WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s RETURNING *) "
+        f"INSERT INTO {qname} SELECT * FROM moved",
+        [lower, upper],
+    )
+    cursor.execute(f"ALTER TABLE {qtable} ATTACH PARTITION {qname} FOR VALUES FROM (%s) TO (%s)", [lower, upper])
+    return True
+
+
+def ensure_partitions(table, months_ahead, start=None, connection=None):
+    """
+    start 달(기본: 이번 달)부터 months_ahead 달 뒤까지 월 파티션을 미리 만든다. 만든 파티션 이름 목록을 돌려준다.
+    """
+    connection = connection or default_connection
+    if connection.vendor != "postgresql":
+        return []
+    created = []
+    first = month_start(start or date.today())
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return []
+        for offset in range(months_ahead + 1):
+            month = add_months(first, offset)
+            if create_month_partition(cursor, connection, table, month):
+                created.append(partition_name(table, month))
+    return created
+
+
+def drop_partitions_before(table, cutoff, connection=None):
+    """
+    cutoff 달 이전에 끝나는 월 파티션을 DETACH 후 DROP 한다(행 단위 DELETE 없이 보존 기간 정리).
+    """
+    connection = connection or default_connection
+    if connection.vendor != "postgresql":
+        return []
+    cutoff = month_start(cutoff)
+    dropped = []
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return []
+        for name, start in list_partitions(cursor, table):
+            if start is None or add_months(start, 1) > cutoff:
+                continue
+            cursor.execute(f"ALTER TABLE {_quote(connection, table)} DETACH PARTITION {_quote(connection, name)}")
+            cursor.execute(f"DROP TABLE {_quote(connection, name)}")
+            dropped.append(name)
+    return dropped
+
+
+def primary_key_name(cursor, table):
+    cursor.execute(
+        "SELECT con.conname FROM pg_constraint con JOIN pg_class c ON c.oid = con.conrelid "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid) AND con.contype = 'p'",
+        [table],
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _table_definition(cursor, table):
+    """
+    다시 만들 때 옮겨야 하는 정의. (나가는 FK, UNIQUE 제약, 일반 인덱스, 이 테이블을 가리키는 FK) 를 돌려준다.
+    UNIQUE 제약과 인덱스는 컬럼 이름 목록을 함께 돌려줘 파티션 키 포함 여부를 볼 수 있게 한다.
+    """
+    cursor.execute(
+        "SELECT con.contype, pg_get_constraintdef(con.oid), con.conname, "
+        "ARRAY(SELECT a.attname::text FROM pg_attribute a WHERE a.attrelid = con.conrelid AND a.attnum = ANY(con.conkey)) "
+        "FROM pg_constraint con JOIN pg_class c ON c.oid = con.conrelid "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid) AND con.contype IN ('f', 'u')",
+        [table],
+    )
+    constraints = cursor.fetchall()
+    foreign_keys = [(definition, name) for kind, definition, name, _columns in constraints if kind == "f"]
+    uniques = [(definition, name, columns) for kind, definition, name, columns in constraints if kind == "u"]
+    cursor.execute(
+        "SELECT pg_get_indexdef(i.indexrelid), i.indisunique, "
+        "ARRAY(SELECT a.attname::text FROM pg_attribute a WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) "
+        "FROM pg_index i JOIN pg_class c ON c.oid = i.indrelid WHERE c.relname = %s AND pg_table_is_visible(c.oid) "
+        "AND NOT i.indisprimary AND NOT EXISTS "
+        "(SELECT 1 FROM pg_constraint con WHERE con.conrelid = i.indrelid AND con.conindid = i.indexrelid)",
+        [table],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT src.relname, con.conname, pg_get_constraintdef(con.oid) FROM pg_constraint con "
+        "JOIN pg_class src ON src.oid = con.conrelid JOIN pg_class c ON c.oid = con.confrelid "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid) AND con.contype = 'f' AND con.conrelid <> con.confrelid",
+        [table],
+    )
+    inbound = cursor.fetchall()
+    return foreign_keys, uniques, indexes, inbound
+
+
+def _copy_table(cursor, connection, table, partitioned):
+    """
+    table 을 같은 이름의 (비)파티션 테이블로 다시 만든다. id 시퀀스, FK, UNIQUE 제약, 인덱스를 옮기고 데이터를 복사한다.
+    다른 테이블에서 이 테이블을 가리키는 FK 는 옛 테이블을 지우기 전에 떼었다가 새 테이블에 다시 건다.
+    파티션 테이블의 PK 는 (id, created_at) 라 id 만 가리키는 FK 를 받을 수 없으므로, 그런 FK 가 있으면 변환하지 않고 실패한다.
+    """
+    foreign_keys, uniques, indexes, inbound = _table_definition(cursor, table)
+    if partitioned:
+        if inbound:
+            names = ", ".join(f"{source}.{name}" for source, name, _definition in inbound)
+            raise RuntimeError(f"{table}: 이 테이블을 가리키는 FK({names})가 있어 파티션 테이블로 바꿀 수 없습니다.")
+        keyless = [name for _definition, name, columns in uniques if PARTITION_KEY not in columns]
+        keyless += [definition for definition, unique, columns in indexes if unique and PARTITION_KEY not in columns]
+        if keyless:
+            raise RuntimeError(f"{table}: 파티션 키가 없는 UNIQUE 는 파티션 테이블에 둘 수 없습니다: {keyless}")
+
+    old = f"{table}_old"
+    qtable, qold = _quote(connection, table), _quote(connection, old)
+    sequence = f"{table}_id_seq"
+    new_sequence = f"{table}_id_seq_new"
+    cursor.execute(f"ALTER TABLE {qtable} RENAME TO {qold}")
+    old_primary_key = primary_key_name(cursor, old)
+    if old_primary_key:
+        cursor.execute(
+            f"ALTER TABLE {qold} RENAME CONSTRAINT {_quote(connection, old_primary_key)} "
+            f"TO {_quote(connection, old + '_pkey')}"
+        )
+    suffix = f" PARTITION BY RANGE ({PARTITION_KEY})" if partitioned else ""
+    cursor.execute(f"CREATE TABLE {qtable} (LIKE {qold} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){suffix}")
+
+    cursor.execute(f"CREATE SEQUENCE {_quote(connection, new_sequence)} OWNED BY {qtable}.id")
+    cursor.execute(
+        f"SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {qold}), 0) + 1, false)",
+        [new_sequence],
+    )
+    cursor.execute(f"ALTER TABLE {qtable} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)", [new_sequence])
+
+    if partitioned:
+        cursor.execute(f"CREATE TABLE {_quote(connection, table + '_default')} PARTITION OF {qtable} DEFAULT")
+        cursor.execute(f"SELECT MIN({PARTITION_KEY}) FROM {qold}")
+        oldest = cursor.fetchone()[0]
+        month = month_start(oldest or date.today())
+        last = add_months(month_start(date.today()), 1)
+        while month <= last:
+            create_month_partition(cursor, connection, table, month)
+            month = add_months(month, 1)
+    columns = f"id, {PARTITION_KEY}" if partitioned else "id"
+    cursor.execute(
+        f"ALTER TABLE {qtable} ADD CONSTRAINT {_quote(connection, table + '_pkey')} PRIMARY KEY ({columns})"
+    )
+
+    cursor.execute(f"INSERT INTO {qtable} SELECT * FROM {qold}")
+    for source, name, _definition in inbound:
+        cursor.execute(f"ALTER TABLE {_quote(connection, source)} DROP CONSTRAINT {_quote(connection, name)}")
+    cursor.execute(f"DROP TABLE {qold}")
+    cursor.execute(f"ALTER SEQUENCE {_quote(connection, new_sequence)} RENAME TO {_quote(connection, sequence)}")
+    for definition, name in foreign_keys:
+        cursor.execute(f"ALTER TABLE {qtable} ADD CONSTRAINT {_quote(connection, name)} {definition}")
+    for definition, name, _columns in uniques:
+        cursor.execute(f"ALTER TABLE {qtable} ADD CONSTRAINT {_quote(connection, name)} {definition}")
+    for definition, _unique, _columns in indexes:
+        cursor.execute(definition)
+    for source, name, definition in inbound:
+        cursor.execute(f"ALTER TABLE {_quote(connection, source)} ADD CONSTRAINT {_quote(connection, name)} {definition}")
+
+
+def convert_to_monthly_partitions(schema_editor, table):
+    """
+    기존 table 을 created_at 월 단위 RANGE 파티션 테이블로 바꾼다(PostgreSQL 전용).
+    PK 는 (id, created_at) 가 되며, 기존 데이터 기간 + 다음 달까지의 파티션과 DEFAULT 파티션을 만든다.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            _copy_table(cursor, connection, table, partitioned=True)
+
+
+def rename_primary_key(schema_editor, table):
+    """
+    PK 이름을 Django 기본 규칙인 {table}_pkey 로 맞춘다. 이름 없이 PK 를 만들던 이전 변환은
+    옛 테이블의 PK 이름과 겹쳐 {table}_pkey1 같은 이름을 남겼다.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        current = primary_key_name(cursor, table)
+        if current and current != f"{table}_pkey":
+            cursor.execute(
+                f"ALTER TABLE {_quote(connection, table)} RENAME CONSTRAINT {_quote(connection, current)} "
+                f"TO {_quote(connection, table + '_pkey')}"
+            )
+
+
+def revert_monthly_partitions(schema_editor, table):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        if is_partitioned(cursor, table):
+            _copy_table(cursor, connection, table, partitioned=False)
@@ -0,0 +1,93 @@
+import time
+
+from django.conf import settings
+
+from common import metrics
+
+RATE_LIMIT_CLOSE_CODE = 4429
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """
+    DRF 와 같은 "횟수/기간" 표기를 (버킷 크기, 초당 충전량) 으로 바꾼다. 예) "5/second".
+    """
+    count, period = rate.split("/")
+    count = int(count)
+    return count, count / PERIODS[period.strip()[0]]
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def consume(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class ActionRateLimiter:
+    """
+    WebSocket 연결 하나에 붙는 action 별 토큰 버킷. 모든 상태가 프로세스 메모리에만 있다.
+    STRIKE_WINDOW 안에 STRIKES 번 넘게 거부되면 should_close 가 True 가 된다.
+    """
+
+    def __init__(self, scope):
+        self.scope = scope
+        rates = getattr(settings, "WS_ACTION_RATES", {})
+        self.rates = {action: parse_rate(rate) for action, rate in rates.items()}
+        self.max_strikes = getattr(settings, "WS_RATE_LIMIT_STRIKES", 20)
+        self.strike_window = getattr(settings, "WS_RATE_LIMIT_STRIKE_WINDOW", 10)
+        self._buckets = {}
+        self._strikes = []
+
+    def allow(self, action):
+        key = action if action in self.rates else "default"
+        rate = self.rates.get(key)
+        if rate is None:
+            return True
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(*rate)
+        if bucket.consume():
+            return True
+        now = time.monotonic()
+        self._strikes = [at for at in self._strikes if now - at < self.strike_window]
+        self._strikes.append(now)
+        metrics.increment(f"ws_rate_limit.{self.scope}.{key}.rejected")
+        return False
+
+    @property
+    def should_close(self):
+        return len(self._strikes) > self.max_strikes
+
+
+class RateLimitedConsumerMixin:
+    """
+    receive_json 맨 앞에서 enforce_rate_limit(action) 을 호출하면
+    초과 요청은 DB 작업 전에 거절하고, 반복 위반자는 RATE_LIMIT_CLOSE_CODE 로 끊는다.
+    """
+
+    rate_limit_scope = "ws"
+
+    async def enforce_rate_limit(self, action):
+        limiter = getattr(self, "_rate_limiter", None)
+        if limiter is None:
+            limiter = self._rate_limiter = ActionRateLimiter(self.rate_limit_scope)
+        if limiter.allow(action):
+            return True
+        if limiter.should_close:
+            metrics.increment(f"ws_rate_limit.{self.rate_limit_scope}.closed")
+            await self.close(code=RATE_LIMIT_CLOSE_CODE)
+            return False
+        await self.send_json({"event": "error", "detail": "요청이 너무 많습니다. 잠시 후 다시 시도해 주세요."})
+        return False
@@ -0,0 +1,19 @@
+import redis
+from django.conf import settings
+
+
+_redis_client = None
+
+
+def get_redis_client():
+    """
+    REDIS_URL 이 설정된 경우에만 공용 Redis 클라이언트를 돌려준다.
+    설정이 없으면 None 을 반환하므로 호출부에서 인메모리 대안을 사용해야 한다.
+    """
+    global _redis_client
+    url = getattr(settings, "REDIS_URL", None)
+    if not url:
+        return None
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(url, decode_responses=True)
+    return _redis_client
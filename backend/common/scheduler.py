@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from common import metrics
+from common.leader import get_leader_lock
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """
+    interval 초마다 func 를 리더 잠금 안에서 작업 전용 스레드(동기)로 실행한다.
+    컨슈머들의 ORM 호출이 줄 서는 공유 sync 스레드(thread_sensitive)를 쓰지 않으므로, 작업이 길어져도 소켓 처리를 막지 않는다.
+    func 는 처리한 행 수(int) 나 처리한 항목 목록을 돌려주고, after 가 있으면 그 결과로 이벤트 루프에서 이어서 실행한다.
+    """
+
+    def __init__(self, name, func, interval, after=None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.after = after
+        self._lock = None
+        self._executor = None
+
+    @property
+    def lock(self):
+        if self._lock is None:
+            self._lock = get_leader_lock(f"scheduler:{self.name}", ttl_seconds=max(5.0, self.interval * 3))
+        return self._lock
+
+    @property
+    def executor(self):
+        # 같은 작업은 한 번에 하나만 돌므로 스레드 하나면 되고, 그 스레드의 DB 연결을 계속 재사용한다.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"scheduler-{self.name}")
+        return self._executor
+
+    def run_locked(self):
+        """
+        리더가 아니면 None, 리더면 func 의 결과.
+        """
+        with self.lock.hold() as leader:
+            if not leader:
+                return None
+            return self.func()
+
+    async def run_once(self):
+        started = time.perf_counter()
+        result = await database_sync_to_async(self.run_locked, thread_sensitive=False, executor=self.executor)()
+        if result is None:
+            return None
+        if self.after is not None:
+            await self.after(result)
+        rows = result if isinstance(result, int) else len(result)
+        prefix = f"scheduler.{self.name}"
+        metrics.observe(f"{prefix}.duration_ms", round((time.perf_counter() - started) * 1000, 1))
+        metrics.increment(f"{prefix}.rows", rows)
+        metrics.set_gauge(f"{prefix}.last_run", round(time.time()))
+        return rows
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("주기 작업 %s 실패", self.name)
+            await asyncio.sleep(self.interval)
+
+
+_jobs = {}
+_tasks = []
+
+
+def register_job(name, func, interval, after=None):
+    """
+    AppConfig.ready 에서 부른다. interval 이 0 이하이면 등록하지 않는다.
+    """
+    if interval <= 0:
+        return
+    _jobs[name] = PeriodicJob(name, func, interval, after)
+
+
+def get_jobs(names=None):
+    if not names:
+        return list(_jobs.values())
+    missing = set(names) - _jobs.keys()
+    if missing:
+        raise KeyError(", ".join(sorted(missing)))
+    return [_jobs[name] for name in names]
+
+
+def ensure_scheduler():
+    """
+    현재 이벤트 루프에 등록된 작업들을 띄운다(프로세스당 한 벌). 이미 돌고 있으면 아무것도 하지 않는다.
+    """
+    if not getattr(settings, "SCHEDULER_ENABLED", True):
+        return
+    if _tasks and not any(task.done() for task in _tasks):
+        return
+    stop_scheduler()
+    loop = asyncio.get_running_loop()
+    _tasks.extend(loop.create_task(job.run_forever(), name=f"scheduler:{job.name}") for job in _jobs.values())
+
+
+def stop_scheduler():
+    for task in _tasks:
+        task.cancel()
+    _tasks.clear()
+
+
+class SchedulerLifespanMiddleware:
+    """
+    ASGI lifespan 을 보내는 서버(uvicorn 등)에서는 startup 때 스케줄러를 띄우고 shutdown 때 멈춘다.
+    daphne 는 lifespan 을 보내지 않아 첫 연결(HTTP/WebSocket)이 올 때까지 작업이 돌지 않는다.
+    그래서 운영(docker-compose.yml)에서는 웹 프로세스를 SCHEDULER_ENABLED=0 으로 두고
+    `manage.py run_scheduler` 를 별도 프로세스(scheduler 서비스)로 띄운다. 첫 연결에서 띄우는 것은 개발용 대비책이다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "lifespan":
+            ensure_scheduler()
+            return await self.app(scope, receive, send)
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                ensure_scheduler()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                stop_scheduler()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
@@ -0,0 +1,149 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.contrib.admin.utils import lookup_spawns_duplicates
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.exceptions import ValidationError
+
+from common.cursors import decode_cursor_token, encode_cursor
+
+TRIGRAM_MIN_LENGTH = 3
+MAX_TERMS = 5
+TSQUERY_SPECIAL = re.compile(r"[&|!():*'\\<>]")
+
+
+def _quote(connection, name):
+    return connection.ops.quote_name(name)
+
+
+def tsvector_sql(connection, columns, table=None):
+    """
+    검색용 tsvector 식. 인덱스와 조회 조건이 같은 식을 써야 GIN 인덱스를 탄다.
+    한국어 형태소 사전이 없으므로 'simple' 설정으로 어절 단위 토큰을 만들고 접두 일치로 찾는다.
+    """
+    prefix = f"{_quote(connection, table)}." if table else ""
+    document = " || ' ' || ".join(f"{prefix}{_quote(connection, column)}" for column in columns)
+    return f"to_tsvector('simple'::regconfig, {document})"
+
+
+def trigram_index_name(table, column):
+    return f"{table}_{column}_trgm_idx"
+
+
+def tsvector_index_name(table):
+    return f"{table}_tsv_idx"
+
+
+def create_search_indexes(schema_editor, table, columns):
+    """
+    컬럼마다 pg_trgm GIN 인덱스(UPPER(col::text), Django icontains 와 같은 식)와
+    컬럼 전체의 tsvector GIN 인덱스를 만든다(PostgreSQL 전용). 새 행은 GIN 인덱스가 삽입 시 바로 반영한다.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    qtable = _quote(connection, table)
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in columns:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {_quote(connection, trigram_index_name(table, column))} "
+                f"ON {qtable} USING gin (UPPER({_quote(connection, column)}::text) gin_trgm_ops)"
+            )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {_quote(connection, tsvector_index_name(table))} "
+            f"ON {qtable} USING gin ({tsvector_sql(connection, columns)})"
+        )
+
+
+def drop_search_indexes(schema_editor, table, columns):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    names = [trigram_index_name(table, column) for column in columns] + [tsvector_index_name(table)]
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(f"DROP INDEX IF EXISTS {_quote(connection, name)}")
+
+
+def search_terms(query):
+    return (query or "").split()[:MAX_TERMS]
+
+
+def search_condition(queryset, columns, term):
+    """
+    검색어 한 단어에 대한 조건. PostgreSQL 에서는 tsvector 접두 일치 또는(3자 이상이면) trigram 부분 일치로 찾는다.
+    2자 이하 부분 일치는 trigram 인덱스를 쓸 수 없으므로 어절 접두 일치만 한다.
+    조건을 만들 수 없는 단어면 빈 Q 를 돌려준다.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return reduce(or_, (Q(**{f"{column}__icontains": term}) for column in columns))
+    condition = Q()
+    prefix = TSQUERY_SPECIAL.sub("", term)
+    if prefix:
+        document = tsvector_sql(connection, columns, queryset.model._meta.db_table)
+        condition |= Q(
+            RawSQL(
+                f"{document} @@ to_tsquery('simple'::regconfig, %s)",
+                [f"{prefix}:*"],
+                output_field=BooleanField(),
+            )
+        )
+    if len(term) >= TRIGRAM_MIN_LENGTH:
+        for column in columns:
+            condition |= Q(**{f"{column}__icontains": term})
+    return condition
+
+
+def search_page(queryset, columns, query, limit, cursor=None):
+    """
+    모든 검색어를 만족하는 행을 (created_at, id) 역순 keyset 으로 limit 개 가져온다.
+    반환값은 (결과 목록, 다음 페이지 커서) 이다. 조건을 만들 수 없는 검색어가 있으면 빈 페이지를 돌려준다.
+    """
+    terms = search_terms(query)
+    if not terms:
+        raise ValidationError({"q": "검색어를 입력해 주세요."})
+    for term in terms:
+        condition = search_condition(queryset, columns, term)
+        if not condition:
+            return [], None
+        queryset = queryset.filter(condition)
+    if cursor:
+        key = decode_cursor_token(str(cursor).strip())
+        if key is None:
+            raise ValidationError({"cursor": "잘못된 커서입니다."})
+        created_at, object_id = key
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=object_id))
+    page = list(queryset.order_by("-created_at", "-id")[: limit + 1])
+    next_cursor = None
+    if len(page) > limit:
+        last = page[limit - 1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return page[:limit], next_cursor
+
+
+class IndexedSearchAdminMixin:
+    """
+    admin 검색에서 search_index_fields 는 search_condition(검색 인덱스)으로,
+    나머지 search_fields 는 기본처럼 icontains 로 찾는다.
+    """
+
+    search_index_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        terms = search_terms(search_term)
+        if not terms:
+            return queryset, False
+        others = [field for field in self.get_search_fields(request) if field not in self.search_index_fields]
+        for term in terms:
+            condition = search_condition(queryset, self.search_index_fields, term)
+            for field in others:
+                condition |= Q(**{f"{field}__icontains": term})
+            if not condition:
+                return queryset.none(), False
+            queryset = queryset.filter(condition)
+        return queryset, any(lookup_spawns_duplicates(self.opts, field) for field in others)
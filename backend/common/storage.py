@@ -1,3 +1,6 @@
+import os
+from pathlib import Path
+
 import boto3
 from botocore.config import Config
 from django.conf import settings
@@ -42,3 +45,70 @@ def build_file_url(field_file):
         },
         ExpiresIn=expires,
     )
+
+
+class LocalArchiveStorage:
+    """
+    채팅 아카이브 세그먼트를 로컬 디스크에 둔다. 파일은 한 번 쓰면 바뀌지 않는다.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def save(self, name, data):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def local_path(self, name):
+        return self.root / name
+
+    def delete(self, name):
+        (self.root / name).unlink(missing_ok=True)
+
+
+class S3ArchiveStorage:
+    """
+    세그먼트를 S3 에 두고, 읽을 때는 로컬 캐시 디렉터리로 한 번 내려받아 mmap 한다.
+    세그먼트가 불변이므로 캐시 무효화가 필요 없다.
+    """
+
+    def __init__(self, bucket, prefix, cache_dir):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.cache_dir = Path(cache_dir)
+
+    def save(self, name, data):
+        _get_s3_client().put_object(Bucket=self.bucket, Key=f"{self.prefix}{name}", Body=data)
+
+    def local_path(self, name):
+        path = self.cache_dir / name
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+            _get_s3_client().download_file(self.bucket, f"{self.prefix}{name}", str(tmp))
+            os.replace(tmp, path)
+        return path
+
+    def delete(self, name):
+        _get_s3_client().delete_object(Bucket=self.bucket, Key=f"{self.prefix}{name}")
+        (self.cache_dir / name).unlink(missing_ok=True)
+
+
+_archive_storage = None
+
+
+def get_archive_storage():
+    global _archive_storage
+    if _archive_storage is None:
+        if settings.USE_S3:
+            _archive_storage = S3ArchiveStorage(
+                settings.AWS_STORAGE_BUCKET_NAME,
+                getattr(settings, "CHAT_ARCHIVE_S3_PREFIX", "chat-archive/"),
+                settings.CHAT_ARCHIVE_CACHE_DIR,
+            )
+        else:
+            _archive_storage = LocalArchiveStorage(settings.CHAT_ARCHIVE_ROOT)
+    return _archive_storage
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+
+
+class TypingCoalescer:
+    """
+    입력 중(typing) 이벤트를 (대상, 사용자) 별로 WS_TYPING_INTERVAL_SECONDS 에 한 번만 통과시킨다.
+    DB/Redis 없이 프로세스 메모리만 쓰므로, 워커가 여러 개면 워커마다 따로 센다.
+    """
+
+    MAX_ENTRIES = 10000
+
+    def __init__(self):
+        self._last_sent = {}
+
+    @property
+    def interval(self):
+        return getattr(settings, "WS_TYPING_INTERVAL_SECONDS", 2)
+
+    def allow(self, target, user_id):
+        now = time.monotonic()
+        key = (target, user_id)
+        last = self._last_sent.get(key)
+        if last is not None and now - last < self.interval:
+            return False
+        self._last_sent[key] = now
+        if len(self._last_sent) > self.MAX_ENTRIES:
+            self._prune(now)
+        return True
+
+    def _prune(self, now):
+        for key in [key for key, at in self._last_sent.items() if now - at >= self.interval]:
+            del self._last_sent[key]
+
+
+typing_coalescer = TypingCoalescer()
@@ -0,0 +1,254 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+
+from common import metrics
+from common.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "chat:write-behind"
+GROUP_NAME = "flushers"
+
+
+def is_enabled():
+    """
+    write-behind 는 Redis stream(내구성 있는 인계 지점)과 PostgreSQL 시퀀스(ID 선발급)가 있어야 동작한다.
+    """
+    if not getattr(settings, "CHAT_WRITE_BEHIND", False):
+        return False
+    return get_redis_client() is not None and connection.vendor == "postgresql"
+
+
+class IdBlockAllocator:
+    """
+    테이블 시퀀스에서 ID를 블록 단위로 미리 받아 두어 메시지마다 DB 왕복을 하지 않도록 한다.
+    """
+
+    def __init__(self, model, block_size):
+        self.model = model
+        self.block_size = block_size
+        self._ids = deque()
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        with self._lock:
+            if not self._ids:
+                self._refill()
+            return self._ids.popleft()
+
+    def _refill(self):
+        table = self.model._meta.db_table
+        column = self.model._meta.pk.column
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                [table, column, self.block_size],
+            )
+            self._ids.extend(row[0] for row in cursor.fetchall())
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def _allocator_for(model):
+    label = model._meta.label_lower
+    with _allocators_lock:
+        allocator = _allocators.get(label)
+        if allocator is None:
+            block_size = getattr(settings, "CHAT_WRITE_BEHIND_ID_BLOCK", 100)
+            allocator = _allocators[label] = IdBlockAllocator(model, block_size)
+        return allocator
+
+
+def _encode_field(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def enqueue(instance):
+    """
+    저장되지 않은 모델 인스턴스에 ID를 발급하고 Redis stream 에 기록한다.
+    XADD 가 끝나면 메시지는 유실되지 않으므로 호출부는 바로 브로드캐스트해도 된다.
+    """
+    model = type(instance)
+    instance.pk = _allocator_for(model).next_id()
+    fields = {
+        field.attname: _encode_field(getattr(instance, field.attname))
+        for field in model._meta.concrete_fields
+    }
+    get_redis_client().xadd(
+        STREAM_KEY,
+        {
+            "model": model._meta.label_lower,
+            "fields": json.dumps(fields, ensure_ascii=False),
+            "enqueued_at": repr(time.time()),
+        },
+    )
+    metrics.increment("write_behind.enqueued")
+    _ensure_flusher()
+    return instance
+
+
+_after_flush = {}
+
+
+def register_after_flush(label, callback):
+    """
+    AppConfig.ready 에서 부른다. label 모델의 행이 flush 될 때마다 callback(저장한 인스턴스 목록) 을 한 번 호출한다.
+    """
+    _after_flush.setdefault(label, []).append(callback)
+
+
+def _build_instance(model, fields):
+    for field in model._meta.concrete_fields:
+        value = fields.get(field.attname)
+        if value is not None and field.get_internal_type() == "DateTimeField":
+            fields[field.attname] = datetime.fromisoformat(value)
+    return model(**fields)
+
+
+def _insert(model, objs):
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(objs, ignore_conflicts=True)
+    except IntegrityError:
+        # 방/세션이 먼저 삭제된 경우 등 FK 위반 행만 버리고 나머지는 살린다.
+        for obj in objs:
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([obj], ignore_conflicts=True)
+            except IntegrityError:
+                metrics.increment("write_behind.dropped")
+                logger.warning("write-behind 행을 저장하지 못해 버립니다: %s #%s", model._meta.label, obj.pk)
+
+
+def flush_entries(entries):
+    """
+    stream 항목을 모델별로 묶어 bulk_create 한 뒤 처리된 항목 ID 목록을 돌려준다.
+    이미 저장된 ID는 ignore_conflicts 로 건너뛰므로 재처리해도 안전하다.
+    """
+    if not entries:
+        return []
+    grouped = {}
+    oldest = None
+    for _entry_id, data in entries:
+        model = apps.get_model(data["model"])
+        grouped.setdefault(model, []).append(_build_instance(model, json.loads(data["fields"])))
+        enqueued_at = float(data.get("enqueued_at") or time.time())
+        oldest = enqueued_at if oldest is None else min(oldest, enqueued_at)
+    for model, objs in grouped.items():
+        _insert(model, objs)
+        for callback in _after_flush.get(model._meta.label_lower, ()):
+            callback(objs)
+    metrics.observe("write_behind.batch_size", len(entries))
+    metrics.observe("write_behind.flush_lag_ms", round((time.time() - oldest) * 1000, 1))
+    metrics.increment("write_behind.flushed", len(entries))
+    return [entry_id for entry_id, _data in entries]
+
+
+class WriteBehindFlusher:
+    """
+    Redis consumer group 으로 stream 을 읽어 일정 시간/개수 단위로 DB에 반영한다.
+    다른 워커가 처리하다 죽은 항목은 CLAIM_IDLE_MS 후 XAUTOCLAIM 으로 넘겨받는다.
+    """
+
+    CLAIM_IDLE_MS = 30_000
+
+    def __init__(self, client):
+        self.client = client
+        self.batch_size = getattr(settings, "CHAT_WRITE_BEHIND_BATCH_SIZE", 200)
+        self.interval = getattr(settings, "CHAT_WRITE_BEHIND_FLUSH_MS", 200) / 1000
+        self.consumer_name = f"{socket.gethostname()}-{os.getpid()}"
+
+    def ensure_group(self):
+        try:
+            self.client.xgroup_create(STREAM_KEY, GROUP_NAME, id="0", mkstream=True)
+        except Exception as exc:  # BUSYGROUP: 이미 생성됨
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def claim_stale(self, min_idle_ms=None):
+        idle = self.CLAIM_IDLE_MS if min_idle_ms is None else min_idle_ms
+        _next, claimed, *_ = self.client.xautoclaim(
+            STREAM_KEY, GROUP_NAME, self.consumer_name, idle, start_id="0-0", count=self.batch_size
+        )
+        return [(entry_id, data) for entry_id, data in claimed if data]
+
+    def read_new(self):
+        response = self.client.xreadgroup(
+            GROUP_NAME, self.consumer_name, {STREAM_KEY: ">"}, count=self.batch_size
+        )
+        if not response:
+            return []
+        return response[0][1]
+
+    def flush_once(self, entries):
+        if not entries:
+            return 0
+        close_old_connections()
+        acked = flush_entries(entries)
+        pipe = self.client.pipeline()
+        pipe.xack(STREAM_KEY, GROUP_NAME, *acked)
+        pipe.xdel(STREAM_KEY, *acked)
+        pipe.execute()
+        return len(acked)
+
+    def drain(self, min_idle_ms=None):
+        self.ensure_group()
+        total = 0
+        while True:
+            claimed = self.flush_once(self.claim_stale(min_idle_ms))
+            total += claimed
+            if claimed < self.batch_size:
+                break
+        while True:
+            flushed = self.flush_once(self.read_new())
+            total += flushed
+            if flushed < self.batch_size:
+                return total
+
+    def run_forever(self):
+        self.ensure_group()
+        last_claim = 0
+        while True:
+            started = time.monotonic()
+            try:
+                if started - last_claim >= self.CLAIM_IDLE_MS / 1000:
+                    self.flush_once(self.claim_stale())
+                    last_claim = started
+                flushed = self.flush_once(self.read_new())
+                metrics.set_gauge("write_behind.pending", self.client.xlen(STREAM_KEY))
+            except Exception:
+                logger.exception("write-behind flush 실패")
+                flushed = 0
+            if flushed >= self.batch_size:
+                continue
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+_flusher_thread = None
+_flusher_lock = threading.Lock()
+
+
+def _ensure_flusher():
+    global _flusher_thread
+    if _flusher_thread is not None:
+        return
+    with _flusher_lock:
+        if _flusher_thread is not None:
+            return
+        flusher = WriteBehindFlusher(get_redis_client())
+        _flusher_thread = threading.Thread(target=flusher.run_forever, name="write-behind-flusher", daemon=True)
+        _flusher_thread.start()
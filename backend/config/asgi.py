@@ -17,11 +17,15 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django_asgi_app = get_asgi_application()
 
 from chatrooms.routing import websocket_urlpatterns as chatroom_patterns  # noqa: E402
+from common.authentication import TokenAuthMiddleware  # noqa: E402
+from common.scheduler import SchedulerLifespanMiddleware  # noqa: E402
 from randomchat.routing import websocket_urlpatterns as randomchat_patterns  # noqa: E402
 
-application = ProtocolTypeRouter(
-    {
-        "http": django_asgi_app,
-        "websocket": URLRouter(chatroom_patterns + randomchat_patterns),
-    }
+application = SchedulerLifespanMiddleware(
+    ProtocolTypeRouter(
+        {
+            "http": django_asgi_app,
+            "websocket": TokenAuthMiddleware(URLRouter(chatroom_patterns + randomchat_patterns)),
+        }
+    )
 )
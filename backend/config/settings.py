@@ -14,7 +14,33 @@ USE_TZ = True
 USE_S3 = os.getenv("USE_S3", "0").lower() in {"1", "true", "yes"}
 AWS_PRESIGNED_URL_EXPIRES = int(os.getenv("AWS_PRESIGNED_URL_EXPIRES", "3600"))
 AUTH_TOKEN_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_TTL_SECONDS", "1800"))
+AUTH_TOKEN_CACHE_SECONDS = int(os.getenv("AUTH_TOKEN_CACHE_SECONDS", "300"))
+AUTH_TOKEN_LOCAL_CACHE_SECONDS = int(os.getenv("AUTH_TOKEN_LOCAL_CACHE_SECONDS", "5"))
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
 RANDOM_CHAT_IDLE_SECONDS = int(os.getenv("RANDOM_CHAT_IDLE_SECONDS", "600"))
+RANDOM_CHAT_HOUSEKEEPING_INTERVAL_SECONDS = float(os.getenv("RANDOM_CHAT_HOUSEKEEPING_INTERVAL_SECONDS", "60"))
+RANDOM_CHAT_COUNTER_REFRESH_SECONDS = float(os.getenv("RANDOM_CHAT_COUNTER_REFRESH_SECONDS", "30"))
+RANDOM_CHAT_BATCH_MATCHING = os.getenv("RANDOM_CHAT_BATCH_MATCHING", "1").lower() in {"1", "true", "yes"}
+RANDOM_CHAT_MATCH_INTERVAL_SECONDS = float(os.getenv("RANDOM_CHAT_MATCH_INTERVAL_SECONDS", "1"))
+RANDOM_CHAT_MATCH_BATCH_SIZE = int(os.getenv("RANDOM_CHAT_MATCH_BATCH_SIZE", "200"))
+CHAT_HISTORY_BUFFER_SIZE = int(os.getenv("CHAT_HISTORY_BUFFER_SIZE", "80"))
+CHAT_HISTORY_BUFFER_TTL_SECONDS = int(os.getenv("CHAT_HISTORY_BUFFER_TTL_SECONDS", "3600"))
+CHAT_WRITE_BEHIND = os.getenv("CHAT_WRITE_BEHIND", "0").lower() in {"1", "true", "yes"}
+CHAT_WRITE_BEHIND_BATCH_SIZE = int(os.getenv("CHAT_WRITE_BEHIND_BATCH_SIZE", "200"))
+CHAT_WRITE_BEHIND_FLUSH_MS = int(os.getenv("CHAT_WRITE_BEHIND_FLUSH_MS", "200"))
+CHAT_WRITE_BEHIND_ID_BLOCK = int(os.getenv("CHAT_WRITE_BEHIND_ID_BLOCK", "100"))
+CHAT_SEQ_CHECK_INTERVAL_SECONDS = float(os.getenv("CHAT_SEQ_CHECK_INTERVAL_SECONDS", "3600"))
+CHAT_SEQ_CHECK_WINDOW_SECONDS = int(os.getenv("CHAT_SEQ_CHECK_WINDOW_SECONDS", "7200"))
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1").lower() in {"1", "true", "yes"}
+CHAT_PRESENCE_HEARTBEAT_SECONDS = int(os.getenv("CHAT_PRESENCE_HEARTBEAT_SECONDS", "20"))
+CHAT_PRESENCE_TTL_SECONDS = int(os.getenv("CHAT_PRESENCE_TTL_SECONDS", "60"))
+CHAT_ROOM_LIST_CACHE_TTL_SECONDS = int(os.getenv("CHAT_ROOM_LIST_CACHE_TTL_SECONDS", "300"))
+CHAT_PARTITION_MONTHS_AHEAD = int(os.getenv("CHAT_PARTITION_MONTHS_AHEAD", "3"))
+CHAT_MESSAGE_RETENTION_MONTHS = int(os.getenv("CHAT_MESSAGE_RETENTION_MONTHS", "0"))
+CHAT_ARCHIVE_AFTER_DAYS = int(os.getenv("CHAT_ARCHIVE_AFTER_DAYS", "180"))
+CHAT_ARCHIVE_ROOT = Path(os.getenv("CHAT_ARCHIVE_ROOT", str(BASE_DIR / "archive")))
+CHAT_ARCHIVE_CACHE_DIR = Path(os.getenv("CHAT_ARCHIVE_CACHE_DIR", str(BASE_DIR / "archive-cache")))
+CHAT_ARCHIVE_S3_PREFIX = os.getenv("CHAT_ARCHIVE_S3_PREFIX", "chat-archive/")
 
 ALLOWED_HOSTS = [h for h in os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",") if h]
 CSRF_TRUSTED_ORIGINS = [o for o in os.getenv("DJANGO_TRUSTED_ORIGINS", "").split(",") if o]
@@ -136,6 +162,20 @@ REST_FRAMEWORK = {
 
 ANON_BLOCK_SECONDS = int(os.getenv("ANON_BLOCK_SECONDS", "300"))
 
+WS_ACTION_RATES = {
+    "default": os.getenv("WS_RATE_DEFAULT", "10/second"),
+    "send_message": os.getenv("WS_RATE_SEND_MESSAGE", "5/second"),
+    "fetch_history": os.getenv("WS_RATE_FETCH_HISTORY", "2/second"),
+    "fetch_messages": os.getenv("WS_RATE_FETCH_MESSAGES", "2/second"),
+    "request_match": os.getenv("WS_RATE_REQUEST_MATCH", "1/second"),
+}
+WS_RATE_LIMIT_STRIKES = int(os.getenv("WS_RATE_LIMIT_STRIKES", "20"))
+WS_RATE_LIMIT_STRIKE_WINDOW = int(os.getenv("WS_RATE_LIMIT_STRIKE_WINDOW", "10"))
+WS_OUTBOUND_MAX_FRAMES = int(os.getenv("WS_OUTBOUND_MAX_FRAMES", "200"))
+WS_OUTBOUND_MAX_BYTES = int(os.getenv("WS_OUTBOUND_MAX_BYTES", str(512 * 1024)))
+WS_TYPING_INTERVAL_SECONDS = float(os.getenv("WS_TYPING_INTERVAL_SECONDS", "2"))
+WS_STREAM_MAX_ROOMS = int(os.getenv("WS_STREAM_MAX_ROOMS", "20"))
+
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
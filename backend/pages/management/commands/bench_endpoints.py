@@ -0,0 +1,367 @@
+import json
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from accounts.models import UserProfile
+from boards.models import Post
+from chatrooms.inbox import update_last_message
+from chatrooms.models import ChatMessage, ChatRoom, ChatRoomMembership
+from chatrooms.room_list import invalidate_public_rooms
+from common.benchmark import QueryRecorder, run_metadata, summarize_ms, write_report
+from pages.models import PageSection, SiteStat
+from randomchat.models import RandomChatMessage
+from randomchat.utils import (
+    build_random_chat_state,
+    join_random_queue,
+    reconcile_random_chat_counters,
+    start_random_sessions,
+)
+
+PASSWORD = "bench-password-1!"
+POOL_SIZE = 20
+
+# 기본 데이터량(--users 등 기본값) 기준 예산. queries/rows 는 호출 한 번의 최댓값, p95_ms 는 벽시계 시간이다.
+BUDGETS = {
+    "posts.list": {"queries": 1, "rows": 1000, "p95_ms": 400},
+    "posts.create": {"queries": 2, "rows": 2, "p95_ms": 100},
+    "rooms.list": {"queries": 1, "rows": 10, "p95_ms": 50},
+    "rooms.list.cold": {"queries": 2, "rows": 60, "p95_ms": 100},
+    "rooms.messages": {"queries": 3, "rows": 55, "p95_ms": 80},
+    "rooms.messages.create": {"queries": 7, "rows": 6, "p95_ms": 100},
+    "randomchat.state": {"queries": 4, "rows": 50, "p95_ms": 80},
+    "randomchat.send_state": {"queries": 2, "rows": 45, "p95_ms": 50},
+    "randomchat.send_state.queued": {"queries": 2, "rows": 2, "p95_ms": 30},
+    "home": {"queries": 3, "rows": 20, "p95_ms": 50},
+    "auth.register": {"queries": 9, "rows": 4, "p95_ms": 1500},
+    "auth.login": {"queries": 7, "rows": 4, "p95_ms": 1500},
+    "auth.profile": {"queries": 1, "rows": 1, "p95_ms": 50},
+}
+
+# (이름, 메서드, 경로 함수, 인증 여부, 요청 본문 함수, 기대 상태 코드, 호출 전 준비 함수)
+SCENARIOS = [
+    ("posts.list", "get", lambda seed, i: "/api/boards/posts", False, None, 200, None),
+    (
+        "posts.create",
+        "post",
+        lambda seed, i: "/api/boards/posts",
+        True,
+        lambda seed, i: {"title": f"벤치마크 글 {i}", "body": "본문"},
+        201,
+        None,
+    ),
+    ("rooms.list", "get", lambda seed, i: "/api/chat/rooms", True, None, 200, None),
+    ("rooms.list.cold", "get", lambda seed, i: "/api/chat/rooms", True, None, 200, invalidate_public_rooms),
+    (
+        "rooms.messages",
+        "get",
+        lambda seed, i: f"/api/chat/rooms/{seed['room_id']}/messages",
+        True,
+        None,
+        200,
+        None,
+    ),
+    (
+        "rooms.messages.create",
+        "post",
+        lambda seed, i: f"/api/chat/rooms/{seed['room_id']}/messages",
+        True,
+        lambda seed, i: {"content": f"벤치마크 메시지 {i}"},
+        201,
+        None,
+    ),
+    ("randomchat.state", "get", lambda seed, i: "/api/random-chat/state", True, None, 200, None),
+    ("home", "get", lambda seed, i: "/api/pages/home", False, None, 200, None),
+    (
+        "auth.register",
+        "post",
+        lambda seed, i: "/api/accounts/register",
+        False,
+        lambda seed, i: {
+            "username": f"bench_new_{i}",
+            "email": f"bench_new_{i}@example.com",
+            "password": PASSWORD,
+            "name": "벤치마크",
+        },
+        201,
+        None,
+    ),
+    (
+        "auth.login",
+        "post",
+        lambda seed, i: "/api/accounts/login",
+        False,
+        lambda seed, i: {"username": seed["logins"][i % len(seed["logins"])], "password": PASSWORD},
+        200,
+        None,
+    ),
+    ("auth.profile", "get", lambda seed, i: "/api/accounts/profile", True, None, 200, None),
+]
+
+# HTTP 를 거치지 않고 함수 하나를 재는 시나리오(WebSocket consumer 가 부르는 경로 등): (이름, 설명, 호출 함수)
+CALLS = [
+    (
+        "randomchat.send_state",
+        "build_random_chat_state (세션 참여 중)",
+        lambda seed, i: build_random_chat_state(seed["random_users"][i % len(seed["random_users"])]),
+    ),
+    (
+        "randomchat.send_state.queued",
+        "build_random_chat_state (대기열)",
+        lambda seed, i: build_random_chat_state(seed["queued_users"][i % len(seed["queued_users"])]),
+    ),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "테스트 DB 에 데이터를 채운 뒤 주요 REST 엔드포인트를 Django test client 로 호출해 "
+        "시간/SQL 문 수/가져온 행 수를 기록하고, 예산을 넘으면 실패합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="엔드포인트별 측정 호출 수(기본 20).")
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--rooms", type=int, default=50)
+        parser.add_argument("--messages", type=int, default=2000, help="측정 대상 방의 메시지 수.")
+        parser.add_argument("--only", nargs="*", default=None, help="이 이름(접두어)의 시나리오만 실행합니다.")
+        parser.add_argument("--budgets", default=None, help="BUDGETS 를 덮어쓸 JSON 파일.")
+        parser.add_argument("--no-time-budgets", action="store_true", help="p95_ms 예산은 검사하지 않습니다.")
+        parser.add_argument("--output", default=None, help="결과 JSON 파일 경로. '-' 이면 표준 출력.")
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations 는 1 이상이어야 합니다.")
+        budgets = {name: dict(budget) for name, budget in BUDGETS.items()}
+        if options["budgets"]:
+            with open(options["budgets"], encoding="utf-8") as handle:
+                for name, budget in json.load(handle).items():
+                    budgets.setdefault(name, {}).update(budget)
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            seed = self._seed(options)
+            results = [
+                self._measure(scenario, seed, options["iterations"])
+                for scenario in SCENARIOS
+                if self._selected(scenario[0], options["only"])
+            ]
+            results += [
+                self._measure_call(call, seed, options["iterations"])
+                for call in CALLS
+                if self._selected(call[0], options["only"])
+            ]
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        failures = []
+        for result in results:
+            result["budget"] = budgets.get(result["name"], {})
+            result["violations"] = self._violations(result, options["no_time_budgets"])
+            failures.extend(f"{result['name']}: {violation}" for violation in result["violations"])
+
+        report = {
+            "benchmark": "endpoints",
+            "meta": run_metadata(),
+            "config": {key: options[key] for key in ("iterations", "users", "posts", "rooms", "messages")},
+            "results": results,
+            "failures": failures,
+        }
+        if options["output"]:
+            write_report(options["output"], report)
+        self._print_table(results)
+        if failures:
+            raise CommandError("예산 초과:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"{len(results)}개 엔드포인트 모두 예산 안입니다."))
+
+    def _seed(self, options):
+        """
+        측정용 데이터를 bulk_create 로 채운다. 인증이 필요한 호출은 앞쪽 POOL_SIZE 명의 토큰을 돌아가며 쓰고
+        (사용자 단위 throttle/하루 글 수 제한에 걸리지 않도록), 로그인은 토큰을 다시 발급하므로 그 다음 사용자들로 한다.
+        기존 글은 pool 밖 사용자가 쓴 것으로 만든다.
+        """
+        User = get_user_model()
+        now = timezone.now()
+        password = make_password(PASSWORD)
+        user_count = max(options["users"], POOL_SIZE * 2)
+        User.objects.bulk_create(
+            [User(username=f"bench_{index}", password=password) for index in range(user_count)]
+        )
+        users = list(User.objects.filter(username__startswith="bench_").order_by("id"))
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users], ignore_conflicts=True)
+        pool, others = users[:POOL_SIZE], users[POOL_SIZE:]
+        tokens = Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in pool])
+
+        Post.objects.bulk_create(
+            [
+                Post(author=others[index % len(others)], title=f"글 {index}", body="본문 " * 20)
+                for index in range(options["posts"])
+            ]
+        )
+
+        rooms = ChatRoom.objects.bulk_create(
+            [
+                ChatRoom(name=f"bench-room-{index}", owner=users[index % len(users)], capacity=ChatRoom.MAX_CAPACITY)
+                for index in range(max(options["rooms"], 1))
+            ]
+        )
+        rooms = list(ChatRoom.objects.filter(name__startswith="bench-room-").order_by("id"))
+        memberships = [ChatRoomMembership(room=rooms[0], user=user) for user in pool]
+        memberships += [
+            ChatRoomMembership(room=room, user=users[(index + offset) % len(users)])
+            for index, room in enumerate(rooms[1:], start=1)
+            for offset in range(5)
+        ]
+        ChatRoomMembership.objects.bulk_create(memberships, ignore_conflicts=True)
+        for room in rooms:
+            ChatRoom.objects.filter(pk=room.pk).update(member_count=room.memberships.count())
+
+        started = now - timedelta(seconds=options["messages"])
+        ChatMessage.objects.bulk_create(
+            [
+                ChatMessage(
+                    room=rooms[0],
+                    user=pool[index % len(pool)],
+                    content=f"메시지 {index}",
+                    seq=index + 1,
+                    created_at=started + timedelta(seconds=index),
+                )
+                for index in range(options["messages"])
+            ]
+        )
+        latest = ChatMessage.objects.filter(room=rooms[0]).select_related("user").order_by("-seq").first()
+        if latest:
+            update_last_message(latest)
+
+        sessions = start_random_sessions([(pool[index].pk, pool[index + 1].pk) for index in range(0, len(pool), 2)])
+        RandomChatMessage.objects.bulk_create(
+            [
+                RandomChatMessage(
+                    session=session,
+                    sender_id=(session.participant_a_id, session.participant_b_id)[offset % 2],
+                    content=f"랜덤 {offset}",
+                )
+                for session in sessions
+                for offset in range(50)
+            ]
+        )
+
+        PageSection.objects.bulk_create(
+            [PageSection(slug=f"bench-{index}", title=f"섹션 {index}", order=index) for index in range(5)]
+        )
+        SiteStat.objects.bulk_create([SiteStat(name=f"bench-{index}", value=index) for index in range(5)])
+        queued = others[-4:]
+        for user in queued:
+            join_random_queue(user)
+        invalidate_public_rooms()
+        reconcile_random_chat_counters()
+        return {
+            "tokens": [token.key for token in tokens],
+            "logins": [user.username for user in others[:POOL_SIZE]],
+            "room_id": rooms[0].id,
+            "random_users": pool,
+            "queued_users": queued,
+        }
+
+    def _selected(self, name, only):
+        return not only or any(name.startswith(prefix) for prefix in only)
+
+    def _measure(self, scenario, seed, iterations):
+        name, method, path, authenticated, body, expected, before = scenario
+        client = Client()
+        timings, queries, rows, statuses = [], [], [], {}
+        # 첫 바퀴는 캐시(토큰 인증, 방 목록 등)를 데우는 용도로 버린다. 측정 결과가 실행 순서에 좌우되지 않게 한다.
+        warmup = len(seed["tokens"]) if authenticated else 1
+        for index in range(warmup + iterations):
+            if before:
+                before()
+            extra = {"REMOTE_ADDR": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"}
+            if authenticated:
+                extra["HTTP_AUTHORIZATION"] = f"Token {seed['tokens'][index % len(seed['tokens'])]}"
+            kwargs = {}
+            if body:
+                kwargs = {"data": json.dumps(body(seed, index)), "content_type": "application/json"}
+            with QueryRecorder() as recorder:
+                started = time.perf_counter()
+                response = getattr(client, method)(path(seed, index), **kwargs, **extra)
+                elapsed = time.perf_counter() - started
+            if index < warmup:
+                continue
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            timings.append(elapsed)
+            queries.append(recorder.queries)
+            rows.append(recorder.rows)
+        return {
+            "name": name,
+            "method": method.upper(),
+            "path": path(seed, 0),
+            "expected_status": expected,
+            "statuses": statuses,
+            "wall_ms": summarize_ms(timings),
+            "queries": {"max": max(queries), "min": min(queries)},
+            "rows": {"max": max(rows), "min": min(rows)},
+        }
+
+    def _measure_call(self, call, seed, iterations):
+        name, description, func = call
+        timings, queries, rows = [], [], []
+        for index in range(1 + iterations):
+            with QueryRecorder() as recorder:
+                started = time.perf_counter()
+                func(seed, index)
+                elapsed = time.perf_counter() - started
+            if index < 1:
+                continue
+            timings.append(elapsed)
+            queries.append(recorder.queries)
+            rows.append(recorder.rows)
+        return {
+            "name": name,
+            "method": "CALL",
+            "path": description,
+            "expected_status": None,
+            "statuses": {},
+            "wall_ms": summarize_ms(timings),
+            "queries": {"max": max(queries), "min": min(queries)},
+            "rows": {"max": max(rows), "min": min(rows)},
+        }
+
+    def _violations(self, result, skip_time):
+        budget = result["budget"]
+        violations = []
+        unexpected = {code: count for code, count in result["statuses"].items() if code != result["expected_status"]}
+        if unexpected:
+            violations.append(f"상태 코드 {unexpected} (기대 {result['expected_status']})")
+        if "queries" in budget and result["queries"]["max"] > budget["queries"]:
+            violations.append(f"SQL {result['queries']['max']}회 > 예산 {budget['queries']}")
+        if "rows" in budget and result["rows"]["max"] > budget["rows"]:
+            violations.append(f"행 {result['rows']['max']}개 > 예산 {budget['rows']}")
+        if not skip_time and "p95_ms" in budget and result["wall_ms"]["p95"] > budget["p95_ms"]:
+            violations.append(f"p95 {result['wall_ms']['p95']}ms > 예산 {budget['p95_ms']}ms")
+        return violations
+
+    def _print_table(self, results):
+        self.stdout.write(f"{'endpoint':<30}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}{'rows':>7}  status")
+        for result in results:
+            wall = result["wall_ms"]
+            line = (
+                f"{result['name']:<30}{wall['p50']:>9}{wall['p95']:>9}"
+                f"{result['queries']['max']:>9}{result['rows']['max']:>7}  "
+                + ("OK" if not result["violations"] else "OVER")
+            )
+            self.stdout.write(self.style.ERROR(line) if result["violations"] else line)
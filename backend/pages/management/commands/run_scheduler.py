@@ -0,0 +1,37 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.scheduler import get_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "등록된 주기 작업(common.scheduler)을 웹 프로세스 밖에서 돌립니다. "
+        "웹 프로세스에서는 SCHEDULER_ENABLED=0 으로 끄고 이 명령을 따로 띄울 수 있습니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--job", action="append", dest="jobs", help="돌릴 작업 이름(여러 번 지정 가능, 기본 전체).")
+        parser.add_argument("--once", action="store_true", help="작업마다 한 번씩만 실행하고 끝냅니다.")
+
+    def handle(self, *args, **options):
+        try:
+            jobs = get_jobs(options["jobs"])
+        except KeyError as exc:
+            raise CommandError(f"등록되지 않은 작업: {exc.args[0]}") from exc
+        if not jobs:
+            raise CommandError("등록된 작업이 없습니다.")
+
+        if not options["once"]:
+            asyncio.run(self.run_forever(jobs))
+            return
+        for job in jobs:
+            rows = asyncio.run(job.run_once())
+            if rows is None:
+                self.stdout.write(f"{job.name}: 다른 프로세스가 실행 중이라 건너뛰었습니다.")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{job.name}: {rows}건 처리"))
+
+    async def run_forever(self, jobs):
+        await asyncio.gather(*(job.run_forever() for job in jobs))
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0002_seed_sections'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitestat',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -22,6 +22,7 @@ class SiteStat(models.Model):
     value = models.PositiveIntegerField(default=0)
     unit = models.CharField(max_length=50, blank=True)
     description = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
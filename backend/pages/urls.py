@@ -1,6 +1,6 @@
 from django.urls import path
 
-from pages.views import HomePageView, healthz
+from pages.views import HomePageView, MetricsView, healthz
 
 
 app_name = "pages"
@@ -8,4 +8,5 @@ app_name = "pages"
 urlpatterns = [
     path("healthz", healthz, name="healthz"),
     path("home", HomePageView.as_view(), name="home"),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
@@ -1,31 +1,74 @@
+from django.db import connection
 from django.http import JsonResponse
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.models import UserProfile
 from boards.models import Post
 from chatrooms.models import ChatRoom
+from common import metrics
+from common.conditional import PUBLIC_REVALIDATE, conditional_get, make_etag
 from pages.models import PageSection, SiteStat
 from pages.serializers import PageSectionSerializer, SiteStatSerializer
-from randomchat.utils import perform_randomchat_housekeeping
 
 
 def healthz(_request):
     return JsonResponse({"ok": True})
 
 
+class MetricsView(APIView):
+    """
+    현재 워커 프로세스의 내부 지표(write-behind 등)를 운영자에게만 보여준다.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
+
+
+def _home_snapshot():
+    """
+    홈 본문이 바뀌었는지 판단할 값(개수, 마지막 수정 시각)과 totals 를 쿼리 한 번으로 읽는다.
+    """
+    quote = connection.ops.quote_name
+    parts = {
+        "users": f"SELECT COUNT(*) FROM {quote(UserProfile._meta.db_table)}",
+        "posts": f"SELECT COUNT(*) FROM {quote(Post._meta.db_table)}",
+        "rooms": f"SELECT COUNT(*) FROM {quote(ChatRoom._meta.db_table)}",
+        "sections": f"SELECT COUNT(*) FROM {quote(PageSection._meta.db_table)}",
+        "sections_updated": f"SELECT MAX(updated_at) FROM {quote(PageSection._meta.db_table)}",
+        "stats": f"SELECT COUNT(*) FROM {quote(SiteStat._meta.db_table)}",
+        "stats_updated": f"SELECT MAX(updated_at) FROM {quote(SiteStat._meta.db_table)}",
+    }
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT " + ", ".join(f"({sql})" for sql in parts.values()))
+        return dict(zip(parts, cursor.fetchone()))
+
+
 class HomePageView(APIView):
+    """
+    모든 사용자에게 같은 본문이므로 공유 캐시(nginx)도 저장 후 재검증할 수 있게 public 으로 내보낸다.
+    """
+
+    cache_control = PUBLIC_REVALIDATE
+
+    def get_validators(self, request):
+        self.snapshot = _home_snapshot()
+        return make_etag("home", self.snapshot), None
+
+    @conditional_get
     def get(self, request):
-        perform_randomchat_housekeeping()
         sections = PageSection.objects.all()
         stats = SiteStat.objects.all()
         payload = {
             "sections": PageSectionSerializer(sections, many=True).data,
             "stats": SiteStatSerializer(stats, many=True).data,
             "totals": {
-                "users": UserProfile.objects.count(),
-                "posts": Post.objects.count(),
-                "rooms": ChatRoom.objects.count(),
+                "users": self.snapshot["users"],
+                "posts": self.snapshot["posts"],
+                "rooms": self.snapshot["rooms"],
             },
         }
         return Response(payload)
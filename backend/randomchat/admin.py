@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from randomchat.models import RandomChatMessage, RandomChatQueueEntry, RandomChatSession
+from randomchat.models import RandomChatActiveSession, RandomChatMessage, RandomChatQueueEntry, RandomChatSession
 
 
 @admin.register(RandomChatQueueEntry)
@@ -17,6 +17,13 @@ class RandomChatSessionAdmin(admin.ModelAdmin):
     search_fields = ("participant_a__username", "participant_b__username")
 
 
+@admin.register(RandomChatActiveSession)
+class RandomChatActiveSessionAdmin(admin.ModelAdmin):
+    list_display = ("user", "session")
+    search_fields = ("user__username",)
+    raw_id_fields = ("user", "session")
+
+
 @admin.register(RandomChatMessage)
 class RandomChatMessageAdmin(admin.ModelAdmin):
     list_display = ("session", "sender", "created_at")
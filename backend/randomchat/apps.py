@@ -1,7 +1,26 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class RandomchatConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "randomchat"
     verbose_name = "Random Chat"
+
+    def ready(self):
+        from common.scheduler import register_job
+        from randomchat.matcher import match_waiting_users, push_state
+        from randomchat.utils import perform_randomchat_housekeeping
+
+        register_job(
+            "randomchat-housekeeping",
+            perform_randomchat_housekeeping,
+            getattr(settings, "RANDOM_CHAT_HOUSEKEEPING_INTERVAL_SECONDS", 60),
+        )
+        if getattr(settings, "RANDOM_CHAT_BATCH_MATCHING", True):
+            register_job(
+                "randomchat-matcher",
+                match_waiting_users,
+                getattr(settings, "RANDOM_CHAT_MATCH_INTERVAL_SECONDS", 1.0),
+                after=push_state,
+            )
@@ -1,24 +1,24 @@
 import logging
-import random
 from types import SimpleNamespace
-from urllib.parse import parse_qs
 
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
-from django.contrib.auth.models import AnonymousUser
-from django.db import transaction
-from django.utils import timezone
-from rest_framework.authtoken.models import Token
 from rest_framework.exceptions import ValidationError
 
-from randomchat.models import RandomChatMessage, RandomChatQueueEntry, RandomChatSession
+from common import write_behind
+from common.outbound import OutboundFlowControlMixin
+from common.rate_limit import RateLimitedConsumerMixin
+from common.typing import typing_coalescer
+from randomchat.models import RandomChatMessage
 from randomchat.serializers import RandomChatMessageSerializer
 from randomchat.utils import (
     RANDOM_CHAT_DEFAULT_LIMIT,
     build_random_chat_state,
-    end_random_sessions_for,
     get_active_random_session,
-    perform_randomchat_housekeeping,
+    join_random_queue,
+    leave_random_queue,
+    match_random_partner,
+    random_chat_user_group,
 )
 
 logger = logging.getLogger(__name__)
@@ -28,47 +28,29 @@ def _session_group_name(session_id):
     return f"random_chat_session_{session_id}"
 
 
-def _user_group_name(user_id):
-    return f"random_chat_user_{user_id}"
-
-
-class RandomChatConsumer(AsyncJsonWebsocketConsumer):
+class RandomChatConsumer(OutboundFlowControlMixin, RateLimitedConsumerMixin, AsyncJsonWebsocketConsumer):
     """
     랜덤 채팅 전용 WebSocket 커넥션.
     REST API가 담당하던 대기열/매칭/메시지를 실시간으로 처리합니다.
     """
 
+    rate_limit_scope = "randomchat"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.session_group = None
         self.user_group_name = None
 
     async def connect(self):
-        self.user = await database_sync_to_async(self._authenticate_from_scope)()
+        self.user = self.scope.get("user")
         if not self.user or not self.user.is_authenticated:
             await self.close(code=4401)
             return
 
-        await self.housekeep()
-        self.user_group_name = _user_group_name(self.user.id)
+        self.user_group_name = random_chat_user_group(self.user.id)
         await self.channel_layer.group_add(self.user_group_name, self.channel_name)
         await self.accept()
 
-    def _authenticate_from_scope(self):
-        query = self.scope.get("query_string", b"")
-        try:
-            params = parse_qs(query.decode())
-        except Exception:
-            return AnonymousUser()
-        token_key = params.get("token", [None])[0]
-        if not token_key:
-            return AnonymousUser()
-        try:
-            token = Token.objects.select_related("user").get(key=token_key)
-        except Token.DoesNotExist:
-            return AnonymousUser()
-        return token.user if token.user.is_active else AnonymousUser()
-
     async def disconnect(self, _code):
         if self.user_group_name:
             await self.channel_layer.group_discard(self.user_group_name, self.channel_name)
@@ -80,8 +62,13 @@ class RandomChatConsumer(AsyncJsonWebsocketConsumer):
         if not action:
             await self.send_error("action 필드가 필요합니다.")
             return
-
-        await self.housekeep()
+        if await self.handle_flow_ack(content):
+            return
+        if action == "typing":
+            await self.handle_typing()
+            return
+        if not await self.enforce_rate_limit(action):
+            return
 
         try:
             if action == "fetch_state":
@@ -145,18 +132,31 @@ class RandomChatConsumer(AsyncJsonWebsocketConsumer):
             },
         )
 
+    async def handle_typing(self):
+        """
+        DB 조회 없이 현재 참여 중인 세션 그룹으로만 보낸다. 세션이 없으면 무시한다.
+        """
+        if not self.session_group or not typing_coalescer.allow(self.session_group, self.user.id):
+            return
+        await self.channel_layer.group_send(
+            self.session_group,
+            {"type": "randomchat.session.typing", "sender_id": self.user.id},
+        )
+
+    async def randomchat_session_typing(self, event):
+        if event["sender_id"] == self.user.id:
+            return
+        await self.send_droppable_json({"event": "typing"})
+
     async def send_state(self):
         data = await self._build_state()
         session = data.get("session")
         await self._sync_session_group(session)
         await self.send_json({"event": "state", "payload": data})
 
-    async def housekeep(self):
-        await database_sync_to_async(perform_randomchat_housekeeping)()
-
     async def push_state_to_user(self, user_id):
         await self.channel_layer.group_send(
-            _user_group_name(user_id),
+            random_chat_user_group(user_id),
             {"type": "randomchat.dispatch.state"},
         )
 
@@ -205,33 +205,16 @@ class RandomChatConsumer(AsyncJsonWebsocketConsumer):
         return await database_sync_to_async(self._create_message_sync)(content)
 
     def _join_queue_sync(self):
-        entry, created = RandomChatQueueEntry.objects.get_or_create(user=self.user)
-        if not created:
-            entry.joined_at = timezone.now()
-            entry.save(update_fields=["joined_at"])
+        join_random_queue(self.user)
 
     def _leave_queue_sync(self):
-        RandomChatQueueEntry.objects.filter(user=self.user).delete()
-        end_random_sessions_for(self.user)
+        leave_random_queue(self.user)
 
     def _request_match_sync(self):
-        with transaction.atomic():
-            try:
-                own_entry = RandomChatQueueEntry.objects.select_for_update().get(user=self.user)
-            except RandomChatQueueEntry.DoesNotExist:
-                own_entry = RandomChatQueueEntry.objects.create(user=self.user)
-            candidates = list(RandomChatQueueEntry.objects.select_for_update().exclude(user=self.user))
-            if not candidates:
-                return {"matched": False, "partner_id": None, "session_id": None}
-            partner_entry = random.choice(candidates)
-            partner_user = partner_entry.user
-            partner_entry.delete()
-            own_entry.delete()
-
-        end_random_sessions_for(self.user)
-        end_random_sessions_for(partner_user)
-        session = RandomChatSession.objects.create(participant_a=self.user, participant_b=partner_user)
-        return {"matched": True, "partner_id": partner_user.id, "session_id": session.id}
+        session = match_random_partner(self.user)
+        if session is None:
+            return {"matched": False, "partner_id": None, "session_id": None}
+        return {"matched": True, "partner_id": session.participant_b_id, "session_id": session.id}
 
     def _fetch_messages_sync(self):
         session = get_active_random_session(self.user)
@@ -256,7 +239,12 @@ class RandomChatConsumer(AsyncJsonWebsocketConsumer):
             context={"request": SimpleNamespace(user=self.user), "session": session},
         )
         serializer.is_valid(raise_exception=True)
-        message = serializer.save()
+        if write_behind.is_enabled():
+            message = write_behind.enqueue(
+                RandomChatMessage(session=session, sender=self.user, **serializer.validated_data)
+            )
+        else:
+            message = serializer.save()
         return {
             "id": message.id,
             "session_id": session.id,
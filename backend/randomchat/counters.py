@@ -0,0 +1,94 @@
+import threading
+import time
+
+from django.conf import settings
+
+from common.redis_client import get_redis_client
+
+ACTIVE_SESSIONS = "active_sessions"
+QUEUE_SIZE = "queue_size"
+
+
+def _refresh_seconds():
+    return getattr(settings, "RANDOM_CHAT_COUNTER_REFRESH_SECONDS", 30)
+
+
+class InMemoryCounters:
+    """
+    REDIS_URL 이 없을 때 쓰는 프로세스 안의 카운터. 처음 읽을 때 count() 로 세고, 이후에는 상태 전이 때 더하고 뺀다.
+    다른 프로세스의 전이는 보이지 않으므로 RANDOM_CHAT_COUNTER_REFRESH_SECONDS 가 지나면 다시 센다.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, count):
+        with self._lock:
+            entry = self._values.get(name)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+        value = count()
+        self.reset(name, value)
+        return value
+
+    def adjust(self, name, delta):
+        if not delta:
+            return
+        with self._lock:
+            entry = self._values.get(name)
+            if entry:
+                entry[0] = max(0, entry[0] + delta)
+
+    def reset(self, name, value):
+        with self._lock:
+            self._values[name] = [value, time.monotonic() + _refresh_seconds()]
+
+
+class RedisCounters:
+    """
+    모든 프로세스가 같이 쓰는 카운터(GET O(1)). 키가 없을 때만 count() 로 세어 채우고,
+    키가 없는 동안의 adjust 는 버린다(다음 get 이 새로 센다). 어긋난 값은 스케줄러의 reconcile 이 바로잡는다.
+    """
+
+    KEY_PREFIX = "randomchat:count"
+
+    ADJUST_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        return redis.call('INCRBY', KEYS[1], ARGV[1])
+    end
+    return false
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._adjust = client.register_script(self.ADJUST_SCRIPT)
+
+    def _key(self, name):
+        return f"{self.KEY_PREFIX}:{name}"
+
+    def get(self, name, count):
+        value = self.client.get(self._key(name))
+        if value is not None:
+            return max(0, int(value))
+        value = count()
+        self.client.set(self._key(name), value, nx=True)
+        return value
+
+    def adjust(self, name, delta):
+        if delta:
+            self._adjust(keys=[self._key(name)], args=[delta])
+
+    def reset(self, name, value):
+        self.client.set(self._key(name), value)
+
+
+_counters = None
+
+
+def get_counters():
+    global _counters
+    if _counters is None:
+        client = get_redis_client()
+        _counters = RedisCounters(client) if client is not None else InMemoryCounters()
+    return _counters
@@ -0,0 +1,38 @@
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from common import metrics
+from randomchat.matchmaking import get_matchmaker
+from randomchat.utils import random_chat_user_group, start_random_sessions
+
+
+def match_waiting_users(limit=None):
+    """
+    대기열을 오래 기다린 순서대로 두 명씩 묶어 세션을 bulk_create 로 한 번에 만든다.
+    state 를 받아야 할 사용자 ID 목록을 돌려준다. 탈퇴/비활성 사용자는 빼고, 짝이 남으면 대기열로 돌려보낸다.
+    """
+    limit = limit or getattr(settings, "RANDOM_CHAT_MATCH_BATCH_SIZE", 200)
+    matchmaker = get_matchmaker()
+    popped = matchmaker.pop_batch(limit)
+    if not popped:
+        return []
+    active = set(get_user_model().objects.filter(pk__in=popped, is_active=True).values_list("pk", flat=True))
+    user_ids = [user_id for user_id in popped if user_id in active]
+    if len(user_ids) % 2:
+        matchmaker.join(user_ids.pop())
+    if not user_ids or not start_random_sessions(list(zip(user_ids[0::2], user_ids[1::2]))):
+        return []
+    metrics.increment("randomchat.matched_pairs", len(user_ids) // 2)
+    return user_ids
+
+
+async def push_state(user_ids):
+    """
+    짝이 된 사용자들의 열린 연결이 state 를 다시 읽게 한다(스케줄러 작업의 after).
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for user_id in user_ids:
+        await channel_layer.group_send(random_chat_user_group(user_id), {"type": "randomchat.dispatch.state"})
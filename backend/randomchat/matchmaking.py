@@ -0,0 +1,195 @@
+import time
+
+from django.db import connection, transaction
+from django.db.models import Case, Exists, F, Func, IntegerField, Subquery, When
+from django.utils import timezone
+
+from common.redis_client import get_redis_client
+from randomchat.counters import QUEUE_SIZE, get_counters
+from randomchat.models import RandomChatQueueEntry
+
+
+class DatabaseMatchmaker:
+    """
+    REDIS_URL 이 없을 때 쓰는 RandomChatQueueEntry 테이블 대기열.
+    짝을 찾을 때 대기열 전체가 아니라 자기 행과, SKIP LOCKED 로 고른 가장 오래 기다린 상대 한 행만 잠근다.
+    대기열 크기는 COUNT 대신 행을 넣고 뺄 때 함께 움직이는 카운터(randomchat.counters)로 읽는다.
+    """
+
+    def join(self, user_id):
+        updated = RandomChatQueueEntry.objects.filter(user_id=user_id).update(joined_at=timezone.now())
+        if not updated:
+            _entry, created = RandomChatQueueEntry.objects.get_or_create(user_id=user_id)
+            if created:
+                get_counters().adjust(QUEUE_SIZE, 1)
+
+    def leave(self, user_id):
+        deleted, _ = RandomChatQueueEntry.objects.filter(user_id=user_id).delete()
+        get_counters().adjust(QUEUE_SIZE, -deleted)
+
+    def leave_many(self, user_ids):
+        deleted, _ = RandomChatQueueEntry.objects.filter(user_id__in=list(user_ids)).delete()
+        get_counters().adjust(QUEUE_SIZE, -deleted)
+
+    def pop_partner(self, user_id):
+        """
+        user_id 를 제외하고 가장 오래 기다린 사용자를 꺼내 둘 다 대기열에서 뺀다.
+        상대가 없으면 user_id 를 대기열에 남겨 두고 None 을 돌려준다.
+        """
+        with transaction.atomic():
+            own = RandomChatQueueEntry.objects.select_for_update().filter(user_id=user_id).first()
+            partner = (
+                RandomChatQueueEntry.objects.select_for_update(skip_locked=True)
+                .exclude(user_id=user_id)
+                .order_by("joined_at", "id")
+                .first()
+            )
+            if partner is None:
+                if own is None:
+                    _entry, created = RandomChatQueueEntry.objects.get_or_create(user_id=user_id)
+                    get_counters().adjust(QUEUE_SIZE, int(created))
+                return None
+            deleted, _ = RandomChatQueueEntry.objects.filter(pk__in=[partner.pk] + ([own.pk] if own else [])).delete()
+        get_counters().adjust(QUEUE_SIZE, -deleted)
+        return partner.user_id
+
+    def pop_batch(self, limit):
+        """
+        가장 오래 기다린 순서로 최대 limit 명(짝수)을 꺼낸다. 다른 트랜잭션이 잡고 있는 행은 건너뛴다.
+        """
+        with transaction.atomic():
+            entries = list(
+                RandomChatQueueEntry.objects.select_for_update(skip_locked=True).order_by("joined_at", "id")[:limit]
+            )
+            entries = entries[: len(entries) // 2 * 2]
+            deleted, _ = RandomChatQueueEntry.objects.filter(pk__in=[entry.pk for entry in entries]).delete()
+        get_counters().adjust(QUEUE_SIZE, -deleted)
+        return [entry.user_id for entry in entries]
+
+    def position(self, user_id):
+        """
+        대기 순번(1부터) 또는 None 을 쿼리 한 번으로 읽는다.
+        """
+        queue = connection.ops.quote_name(RandomChatQueueEntry._meta.db_table)
+        joined_at = f"SELECT joined_at FROM {queue} WHERE user_id = %s"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT ({joined_at}), (SELECT COUNT(*) FROM {queue} WHERE joined_at < ({joined_at}))",
+                [user_id, user_id],
+            )
+            own, ahead = cursor.fetchone()
+        return ahead + 1 if own is not None else None
+
+    def position_expression(self, user_id):
+        """
+        position() 과 같은 값을 다른 쿼리의 annotate 에 끼워 넣을 수 있는 식으로 돌려준다.
+        """
+        own = RandomChatQueueEntry.objects.filter(user_id=user_id).order_by()
+        ahead = (
+            RandomChatQueueEntry.objects.filter(joined_at__lt=Subquery(own.values("joined_at")[:1]))
+            .order_by()
+            .annotate(count=Func(F("pk"), function="COUNT"))
+            .values("count")
+        )
+        return Case(When(Exists(own), then=Subquery(ahead) + 1), default=None, output_field=IntegerField())
+
+    def status(self, user_id):
+        return self.position(user_id), self.size()
+
+    def size(self):
+        return get_counters().get(QUEUE_SIZE, RandomChatQueueEntry.objects.count)
+
+    def reconcile(self):
+        get_counters().reset(QUEUE_SIZE, RandomChatQueueEntry.objects.count())
+
+
+class RedisMatchmaker:
+    """
+    sorted set(사용자 ID → 대기 시작 시각) 대기열. 짝 찾기는 Lua 스크립트 하나로 원자적으로 두 명을 꺼내므로
+    잠금이 없고 O(log n) 이다. 순번은 ZRANK(O(log n)), 크기는 ZCARD(O(1)).
+    이 백엔드를 쓰면 RandomChatQueueEntry 테이블은 비어 있다.
+    """
+
+    KEY = "randomchat:queue"
+
+    POP_PAIR_SCRIPT = """
+    local head = redis.call('ZRANGE', KEYS[1], 0, 1)
+    for _, member in ipairs(head) do
+        if member ~= ARGV[1] then
+            redis.call('ZREM', KEYS[1], member, ARGV[1])
+            return member
+        end
+    end
+    redis.call('ZADD', KEYS[1], 'NX', ARGV[2], ARGV[1])
+    return false
+    """
+
+    POP_BATCH_SCRIPT = """
+    local size = redis.call('ZCARD', KEYS[1])
+    local take = math.min(size - size % 2, tonumber(ARGV[1]))
+    if take < 2 then
+        return {}
+    end
+    local popped = redis.call('ZPOPMIN', KEYS[1], take)
+    local members = {}
+    for index = 1, #popped, 2 do
+        members[#members + 1] = popped[index]
+    end
+    return members
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._pop_pair = client.register_script(self.POP_PAIR_SCRIPT)
+        self._pop_batch = client.register_script(self.POP_BATCH_SCRIPT)
+
+    def join(self, user_id):
+        self.client.zadd(self.KEY, {str(user_id): time.time()})
+
+    def leave(self, user_id):
+        self.client.zrem(self.KEY, str(user_id))
+
+    def leave_many(self, user_ids):
+        members = [str(user_id) for user_id in user_ids]
+        if members:
+            self.client.zrem(self.KEY, *members)
+
+    def pop_partner(self, user_id):
+        partner = self._pop_pair(keys=[self.KEY], args=[str(user_id), time.time()])
+        return int(partner) if partner else None
+
+    def pop_batch(self, limit):
+        return [int(member) for member in self._pop_batch(keys=[self.KEY], args=[limit - limit % 2])]
+
+    def position(self, user_id):
+        rank = self.client.zrank(self.KEY, str(user_id))
+        return rank + 1 if rank is not None else None
+
+    def position_expression(self, user_id):
+        return None
+
+    def status(self, user_id):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrank(self.KEY, str(user_id))
+        pipe.zcard(self.KEY)
+        rank, size = pipe.execute()
+        return (rank + 1 if rank is not None else None), size
+
+    def size(self):
+        return self.client.zcard(self.KEY)
+
+    def reconcile(self):
+        """
+        ZCARD 가 곧 카운터라 맞출 것이 없다.
+        """
+
+
+_matchmaker = None
+
+
+def get_matchmaker():
+    global _matchmaker
+    if _matchmaker is None:
+        client = get_redis_client()
+        _matchmaker = RedisMatchmaker(client) if client is not None else DatabaseMatchmaker()
+    return _matchmaker
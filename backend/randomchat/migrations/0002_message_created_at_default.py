@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('randomchat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='randomchatmessage',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from common.partitioning import convert_to_monthly_partitions, revert_monthly_partitions
+
+
+def partition_messages(apps, schema_editor):
+    convert_to_monthly_partitions(schema_editor, "randomchat_randomchatmessage")
+
+
+def unpartition_messages(apps, schema_editor):
+    revert_monthly_partitions(schema_editor, "randomchat_randomchatmessage")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('randomchat', '0002_message_created_at_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_messages, unpartition_messages),
+    ]
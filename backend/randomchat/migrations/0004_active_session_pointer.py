@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_active_pointers(apps, schema_editor):
+    """
+    활성 세션마다 두 참여자의 포인터를 만든다. 한 사용자에게 활성 세션이 여럿이면 가장 최근 것만 남기고 나머지는 끝낸다.
+    """
+    RandomChatSession = apps.get_model("randomchat", "RandomChatSession")
+    RandomChatActiveSession = apps.get_model("randomchat", "RandomChatActiveSession")
+    taken = set()
+    pointers = []
+    stale = []
+    for session in RandomChatSession.objects.filter(is_active=True).order_by("-started_at", "-id").iterator():
+        participants = {session.participant_a_id, session.participant_b_id}
+        if participants & taken:
+            stale.append(session.pk)
+            continue
+        taken |= participants
+        pointers += [RandomChatActiveSession(user_id=user_id, session_id=session.pk) for user_id in participants]
+    RandomChatSession.objects.filter(pk__in=stale).update(is_active=False, ended_at=timezone.now())
+    RandomChatActiveSession.objects.bulk_create(pointers, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('randomchat', '0003_partition_randomchatmessage_by_month'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RandomChatActiveSession',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='active_random_chat', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='active_pointers', to='randomchat.randomchatsession')),
+            ],
+        ),
+        migrations.RunPython(backfill_active_pointers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+from common.partitioning import rename_primary_key
+
+
+def rename_message_pkey(apps, schema_editor):
+    rename_primary_key(schema_editor, "randomchat_randomchatmessage")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('randomchat', '0004_active_session_pointer'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_message_pkey, migrations.RunPython.noop),
+    ]
@@ -53,11 +53,20 @@ class RandomChatSession(models.Model):
             return self.participant_a
         return None
 
+    def partner_id_for(self, user):
+        if not user:
+            return None
+        if user.pk == self.participant_a_id:
+            return self.participant_b_id
+        if user.pk == self.participant_b_id:
+            return self.participant_a_id
+        return None
+
     def alias_for(self, user):
-        partner = self.partner_for(user)
-        if not partner:
+        partner_id = self.partner_id_for(user)
+        if not partner_id:
             return "상대방"
-        return f"익명#{str(partner.pk).zfill(4)}"
+        return f"익명#{str(partner_id).zfill(4)}"
 
     def deactivate(self):
         if not self.is_active:
@@ -65,6 +74,30 @@ class RandomChatSession(models.Model):
         self.is_active = False
         self.ended_at = timezone.now()
         self.save(update_fields=["is_active", "ended_at"])
+        self.active_pointers.all().delete()
+
+
+class RandomChatActiveSession(models.Model):
+    """
+    사용자별 현재 활성 세션 포인터(세션마다 참여자 두 명의 행). user 가 기본 키라
+    "내 활성 세션" 조회는 participant_a/b 를 OR 로 찾는 대신 인덱스 한 번이고, 사용자당 활성 세션은 하나뿐이다.
+    세션을 만들고 끝내는 randomchat.utils/matcher 가 세션 행과 같은 트랜잭션에서 관리한다.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="active_random_chat",
+    )
+    session = models.ForeignKey(
+        RandomChatSession,
+        on_delete=models.CASCADE,
+        related_name="active_pointers",
+    )
+
+    def __str__(self):
+        return f"{self.user} → RandomChat {self.session_id}"
 
 
 class RandomChatMessage(models.Model):
@@ -79,7 +112,7 @@ class RandomChatMessage(models.Model):
         related_name="random_chat_messages",
     )
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ["created_at"]
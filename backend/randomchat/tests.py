@@ -1,3 +1,115 @@
-from django.test import TestCase
+import asyncio
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from common.leader import LocalLeaderLock
+from common.scheduler import get_jobs
+from randomchat.matchmaking import DatabaseMatchmaker
+from randomchat.models import RandomChatActiveSession, RandomChatQueueEntry, RandomChatSession
+from randomchat.utils import start_random_sessions
+
+
+def _users(count):
+    User = get_user_model()
+    return [User.objects.create(username=f"random{index}") for index in range(count)]
+
+
+class DatabaseMatchmakerTests(TestCase):
+    def setUp(self):
+        self.matchmaker = DatabaseMatchmaker()
+        self.users = _users(5)
+
+    def _enqueue(self, *users):
+        now = timezone.now()
+        for offset, user in enumerate(users):
+            RandomChatQueueEntry.objects.create(user=user, joined_at=now + timedelta(seconds=offset))
+
+    def _queued(self):
+        return set(RandomChatQueueEntry.objects.values_list("user_id", flat=True))
+
+    def test_pop_partner_takes_longest_waiting_user(self):
+        first, second, me = self.users[:3]
+        self._enqueue(first, second, me)
+        self.assertEqual(self.matchmaker.pop_partner(me.pk), first.pk)
+        self.assertEqual(self._queued(), {second.pk})
+
+    def test_pop_partner_without_partner_keeps_caller_waiting(self):
+        me = self.users[0]
+        self.assertIsNone(self.matchmaker.pop_partner(me.pk))
+        self.assertEqual(self._queued(), {me.pk})
+
+    def test_pop_batch_returns_even_number_oldest_first(self):
+        self._enqueue(*self.users)
+        popped = self.matchmaker.pop_batch(10)
+        self.assertEqual(popped, [user.pk for user in self.users[:4]])
+        self.assertEqual(self._queued(), {self.users[4].pk})
+
+    def test_pop_batch_respects_limit(self):
+        self._enqueue(*self.users)
+        self.assertEqual(self.matchmaker.pop_batch(3), [user.pk for user in self.users[:2]])
+        self.assertEqual(len(self._queued()), 3)
+
+
+class StartRandomSessionsTests(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c, self.d = _users(4)
+
+    def test_creates_session_and_pointers(self):
+        sessions = start_random_sessions([(self.a.pk, self.b.pk)])
+        self.assertEqual(len(sessions), 1)
+        self.assertEqual(
+            set(RandomChatActiveSession.objects.values_list("user_id", "session_id")),
+            {(self.a.pk, sessions[0].pk), (self.b.pk, sessions[0].pk)},
+        )
+
+    def test_pointer_conflict_rolls_back_and_requeues_unmatched_users(self):
+        existing = RandomChatSession.objects.create(participant_a=self.c, participant_b=self.d)
+        RandomChatActiveSession.objects.bulk_create(
+            [
+                RandomChatActiveSession(user=self.c, session=existing),
+                RandomChatActiveSession(user=self.d, session=existing),
+            ]
+        )
+        # 다른 워커가 c 를 먼저 짝지은 직후(이전 세션 조회 뒤)에 포인터를 만드는 경우를 흉내 낸다.
+        with mock.patch("randomchat.utils._sessions_of", return_value=[]):
+            self.assertEqual(start_random_sessions([(self.a.pk, self.c.pk)]), [])
+
+        self.assertEqual(RandomChatSession.objects.filter(is_active=True).count(), 1)
+        self.assertEqual(
+            RandomChatActiveSession.objects.get(user=self.c).session_id,
+            existing.pk,
+        )
+        self.assertFalse(RandomChatActiveSession.objects.filter(user=self.a).exists())
+        self.assertEqual(set(RandomChatQueueEntry.objects.values_list("user_id", flat=True)), {self.a.pk})
+
+
+class MatcherJobThreadTests(SimpleTestCase):
+    def test_matcher_tick_does_not_block_consumer_db_calls(self):
+        job = get_jobs(["randomchat-matcher"])[0]
+        release = threading.Event()
+
+        def slow_match():
+            release.wait(5)
+            return []
+
+        async def scenario():
+            tick = asyncio.ensure_future(job.run_once())
+            await asyncio.sleep(0.05)
+            # 컨슈머의 ORM 호출처럼 공유 sync 스레드(thread_sensitive)로 가는 호출이 매칭 중에도 끝나야 한다.
+            consumer_call = await asyncio.wait_for(database_sync_to_async(threading.get_ident)(), timeout=1)
+            release.set()
+            await tick
+            return consumer_call
+
+        with mock.patch.object(job, "func", slow_match), mock.patch.object(job, "_lock", LocalLeaderLock()):
+            try:
+                self.assertEqual(async_to_sync(scenario)(), threading.get_ident())
+            finally:
+                release.set()
@@ -1,7 +1,6 @@
 from rest_framework.throttling import SimpleRateThrottle
 
-from randomchat.models import RandomChatQueueEntry
-from randomchat.utils import end_random_sessions_for
+from randomchat.utils import leave_random_queue
 
 
 class RandomChatThrottle(SimpleRateThrottle):
@@ -26,8 +25,7 @@ class RandomChatThrottle(SimpleRateThrottle):
         allowed = super().allow_request(request, view)
         if not allowed:
             if request.user and request.user.is_authenticated:
-                end_random_sessions_for(request.user)
-                RandomChatQueueEntry.objects.filter(user=request.user).delete()
+                leave_random_queue(request.user)
             else:
                 self.cache.set(self._blocked_cache_key(ident), True, 300)
         return allowed
@@ -35,6 +33,5 @@ class RandomChatThrottle(SimpleRateThrottle):
     def allow_request(self, request, view):
         allowed = super().allow_request(request, view)
         if not allowed and request.user and request.user.is_authenticated:
-            end_random_sessions_for(request.user)
-            RandomChatQueueEntry.objects.filter(user=request.user).delete()
+            leave_random_queue(request.user)
         return allowed
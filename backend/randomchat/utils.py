@@ -2,34 +2,148 @@ from datetime import timedelta
 from types import SimpleNamespace
 
 from django.conf import settings
-from django.db import transaction
-from django.db.models import Exists, OuterRef, Q
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, OuterRef, Prefetch
 from django.utils import timezone
 
-from randomchat.models import RandomChatMessage, RandomChatQueueEntry, RandomChatSession
+from randomchat.counters import ACTIVE_SESSIONS, get_counters
+from randomchat.matchmaking import get_matchmaker
+from randomchat.models import RandomChatActiveSession, RandomChatMessage, RandomChatSession
 from randomchat.serializers import RandomChatMessageSerializer, RandomChatSessionSerializer
 
 RANDOM_CHAT_DEFAULT_LIMIT = 40
 RANDOM_CHAT_MAX_LIMIT = 80
+MATCH_ATTEMPTS = 5
+
+
+def random_chat_user_group(user_id):
+    return f"random_chat_user_{user_id}"
+
+
+def _active_sessions_for(user):
+    """
+    user 의 활성 세션(많아야 하나)을 포인터의 기본 키로 찾는다.
+    """
+    return RandomChatSession.objects.filter(active_pointers__user=user, is_active=True)
 
 
 def get_active_random_session(user):
     if not user or not user.is_authenticated:
         return None
-    return (
-        RandomChatSession.objects.filter(is_active=True)
-        .filter(Q(participant_a=user) | Q(participant_b=user))
-        .order_by("-started_at")
-        .first()
+    return _active_sessions_for(user).first()
+
+
+def _end_sessions(session_ids):
+    """
+    세션들을 끝내고 두 참여자의 포인터를 지운다. 끝낸 세션 수를 돌려준다. 호출부가 트랜잭션을 연다.
+    """
+    if not session_ids:
+        return 0
+    RandomChatActiveSession.objects.filter(session_id__in=session_ids).delete()
+    return RandomChatSession.objects.filter(pk__in=session_ids, is_active=True).update(
+        is_active=False, ended_at=timezone.now()
+    )
+
+
+def _sessions_of(user_ids):
+    return list(
+        RandomChatActiveSession.objects.filter(user_id__in=user_ids).values_list("session_id", flat=True).distinct()
     )
 
 
+def end_random_sessions(user_ids):
+    """
+    사용자들이 참여 중인 세션을 끝낸다(상대 쪽 포인터도 함께 지워진다). 끝낸 세션 수를 돌려준다.
+    """
+    with transaction.atomic():
+        ended = _end_sessions(_sessions_of(user_ids))
+    get_counters().adjust(ACTIVE_SESSIONS, -ended)
+    return ended
+
+
 def end_random_sessions_for(user):
     if not user or not user.is_authenticated:
         return
-    RandomChatSession.objects.filter(is_active=True).filter(
-        Q(participant_a=user) | Q(participant_b=user)
-    ).update(is_active=False, ended_at=timezone.now())
+    end_random_sessions([user.pk])
+
+
+def start_random_sessions(pairs):
+    """
+    (사용자 ID, 사용자 ID) 쌍마다 세션과 포인터를 만들고, 두 사람이 있던 이전 세션은 먼저 끝낸다.
+    같은 사용자가 동시에 다른 곳에서 짝이 되면 포인터의 기본 키 충돌로 전부 되돌리고,
+    아직 세션이 없는 사용자만 대기열로 돌려보낸 뒤 빈 목록을 돌려준다.
+    """
+    user_ids = [user_id for pair in pairs for user_id in pair]
+    try:
+        with transaction.atomic():
+            ended = _end_sessions(_sessions_of(user_ids))
+            sessions = RandomChatSession.objects.bulk_create(
+                [RandomChatSession(participant_a_id=first, participant_b_id=second) for first, second in pairs]
+            )
+            RandomChatActiveSession.objects.bulk_create(
+                [
+                    RandomChatActiveSession(user_id=user_id, session_id=session.pk)
+                    for session in sessions
+                    for user_id in (session.participant_a_id, session.participant_b_id)
+                ]
+            )
+    except IntegrityError:
+        matched = set(
+            RandomChatActiveSession.objects.filter(user_id__in=user_ids).values_list("user_id", flat=True)
+        )
+        matchmaker = get_matchmaker()
+        for user_id in user_ids:
+            if user_id not in matched:
+                matchmaker.join(user_id)
+        return []
+    get_counters().adjust(ACTIVE_SESSIONS, len(sessions) - ended)
+    return sessions
+
+
+def count_active_sessions():
+    """
+    전체 활성 세션 수. COUNT 대신 세션이 생기고 끝날 때 함께 움직이는 카운터(randomchat.counters)로 읽는다.
+    """
+    return get_counters().get(ACTIVE_SESSIONS, RandomChatSession.objects.filter(is_active=True).count)
+
+
+def reconcile_random_chat_counters():
+    """
+    카운터를 실제 행 수로 다시 맞춘다. 전이 밖에서 바뀐 행(회원 탈퇴 CASCADE 등)으로 어긋난 값을 바로잡는다.
+    """
+    get_counters().reset(ACTIVE_SESSIONS, RandomChatSession.objects.filter(is_active=True).count())
+    get_matchmaker().reconcile()
+
+
+def join_random_queue(user):
+    get_matchmaker().join(user.pk)
+
+
+def leave_random_queue(user):
+    get_matchmaker().leave(user.pk)
+    end_random_sessions_for(user)
+
+
+def match_random_partner(user):
+    """
+    대기열에서 가장 오래 기다린 상대와 새 세션을 만든다. 상대가 없으면 user 를 대기열에 남기고 None.
+    대기열에 남아 있던 탈퇴/비활성 사용자는 건너뛴다.
+    """
+    User = get_user_model()
+    matchmaker = get_matchmaker()
+    for _attempt in range(MATCH_ATTEMPTS):
+        partner_id = matchmaker.pop_partner(user.pk)
+        if partner_id is None:
+            return None
+        if User.objects.filter(pk=partner_id, is_active=True).exists():
+            break
+    else:
+        matchmaker.join(user.pk)
+        return None
+
+    sessions = start_random_sessions([(user.pk, partner_id)])
+    return sessions[0] if sessions else None
 
 
 def expire_inactive_random_sessions(timeout_seconds=None):
@@ -47,12 +161,38 @@ def expire_inactive_random_sessions(timeout_seconds=None):
         .annotate(has_messages=Exists(RandomChatMessage.objects.filter(session=OuterRef("pk"))))
         .filter(has_messages=False)
     )
-    now = timezone.now()
-    return stale_sessions.update(is_active=False, ended_at=now)
+    with transaction.atomic():
+        expired = _end_sessions(list(stale_sessions.values_list("pk", flat=True)))
+    get_counters().adjust(ACTIVE_SESSIONS, -expired)
+    return expired
 
 
 def perform_randomchat_housekeeping():
-    expire_inactive_random_sessions()
+    """
+    스케줄러가 주기적으로 부른다(common.scheduler). 오래된 세션을 끝내고 카운터를 맞춘 뒤, 종료한 세션 수를 돌려준다.
+    """
+    expired = expire_inactive_random_sessions()
+    reconcile_random_chat_counters()
+    return expired
+
+
+def random_chat_state_tokens(user):
+    """
+    build_random_chat_state 결과가 바뀌었는지 판단할 값(활성 세션, 그 세션의 마지막 메시지, 활성 세션 수,
+    대기열 순번/크기)을 본문을 만들지 않고 읽는다. DB 는 쿼리 한 번, 대기열은 matchmaker 한 번, 나머지는 카운터다.
+    """
+    quote = connection.ops.quote_name
+    pointers = quote(RandomChatActiveSession._meta.db_table)
+    messages = quote(RandomChatMessage._meta.db_table)
+    active_session = f"SELECT session_id FROM {pointers} WHERE user_id = %s"
+    sql = (
+        f"SELECT ({active_session}), "
+        f"(SELECT MAX(id) FROM {messages} WHERE session_id = ({active_session}))"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user.pk, user.pk])
+        row = cursor.fetchone()
+    return row + (count_active_sessions(),) + get_matchmaker().status(user.pk)
 
 
 def _resolve_actor(actor):
@@ -66,52 +206,50 @@ def _resolve_actor(actor):
 
 
 def build_random_chat_state(actor, limit=RANDOM_CHAT_DEFAULT_LIMIT):
+    """
+    세션 조회에 최근 메시지(prefetch)와 대기 순번(DB 대기열이면 annotate)을 함께 실어 SQL 두 번 안에 끝낸다.
+    대기열 크기와 활성 세션 수는 카운터에서 읽는다.
+    """
     request, user = _resolve_actor(actor)
+    matchmaker = get_matchmaker()
     if not user or not getattr(user, "is_authenticated", False):
         return {
             "in_queue": False,
             "queue_position": None,
-            "queue_size": RandomChatQueueEntry.objects.count(),
-            "active_sessions": RandomChatSession.objects.filter(is_active=True).count(),
+            "queue_size": matchmaker.size(),
+            "active_sessions": count_active_sessions(),
             "session": None,
             "messages": [],
         }
 
-    session = get_active_random_session(user)
+    recent = RandomChatMessage.objects.order_by("-created_at")[:limit]
+    sessions = _active_sessions_for(user).prefetch_related(
+        Prefetch("messages", queryset=recent, to_attr="recent_messages")
+    )
+    position = matchmaker.position_expression(user.pk)
+    if position is not None:
+        sessions = sessions.annotate(queue_position=position)
+    session = sessions.first()
+    if session is not None and position is not None:
+        queue_position = session.queue_position
+    else:
+        queue_position = matchmaker.position(user.pk)
+
     messages_data = []
-    active_sessions = RandomChatSession.objects.filter(is_active=True).count()
+    session_data = None
     if session:
-        queryset = (
-            RandomChatMessage.objects.filter(session=session)
-            .order_by("-created_at")[:limit]
-        )
-        messages = list(queryset)
-        messages.reverse()
         messages_data = RandomChatMessageSerializer(
-            messages,
+            session.recent_messages[::-1],
             many=True,
             context={"request": request},
         ).data
-
-    queue_entry = RandomChatQueueEntry.objects.filter(user=user).first()
-    queue_size = RandomChatQueueEntry.objects.count()
-    queue_position = None
-    if queue_entry:
-        queue_position = (
-            RandomChatQueueEntry.objects.filter(joined_at__lt=queue_entry.joined_at).count() + 1
-        )
-
-    session_data = (
-        RandomChatSessionSerializer(session, context={"request": request}).data
-        if session
-        else None
-    )
+        session_data = RandomChatSessionSerializer(session, context={"request": request}).data
 
     return {
-        "in_queue": bool(queue_entry),
+        "in_queue": queue_position is not None,
         "queue_position": queue_position,
-        "queue_size": queue_size,
-        "active_sessions": active_sessions,
+        "queue_size": matchmaker.size(),
+        "active_sessions": count_active_sessions(),
         "session": session_data,
         "messages": messages_data,
     }
@@ -125,4 +263,4 @@ def reset_queue_and_sessions(user):
         return
     with transaction.atomic():
         end_random_sessions_for(user)
-        RandomChatQueueEntry.objects.filter(user=user).delete()
+        get_matchmaker().leave(user.pk)
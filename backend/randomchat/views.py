@@ -1,23 +1,22 @@
-import random
-
-from django.db import transaction
-from django.utils import timezone
 from rest_framework import status
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from randomchat.models import RandomChatMessage, RandomChatQueueEntry, RandomChatSession
+from common.conditional import conditional_get, make_etag
+from randomchat.models import RandomChatMessage
 from randomchat.serializers import RandomChatMessageSerializer
 from randomchat.throttles import RandomChatThrottle
 from randomchat.utils import (
     RANDOM_CHAT_DEFAULT_LIMIT,
     RANDOM_CHAT_MAX_LIMIT,
     build_random_chat_state,
-    end_random_sessions_for,
     get_active_random_session,
-    perform_randomchat_housekeeping,
+    join_random_queue,
+    leave_random_queue,
+    match_random_partner,
+    random_chat_state_tokens,
 )
 
 
@@ -32,8 +31,12 @@ class RandomChatStateView(APIView):
             limit = RANDOM_CHAT_DEFAULT_LIMIT
         return max(1, min(limit, RANDOM_CHAT_MAX_LIMIT))
 
+    def get_validators(self, request):
+        tokens = random_chat_state_tokens(request.user)
+        return make_etag("random-chat", request.user.pk, tokens, self._get_limit(request)), None
+
+    @conditional_get
     def get(self, request):
-        perform_randomchat_housekeeping()
         limit = self._get_limit(request)
         payload = build_random_chat_state(request, limit)
         return Response(payload, status=status.HTTP_200_OK)
@@ -44,18 +47,12 @@ class RandomChatQueueView(APIView):
     throttle_classes = [RandomChatThrottle]
 
     def post(self, request):
-        perform_randomchat_housekeeping()
-        entry, created = RandomChatQueueEntry.objects.get_or_create(user=request.user)
-        if not created:
-            entry.joined_at = timezone.now()
-            entry.save(update_fields=["joined_at"])
+        join_random_queue(request.user)
         payload = build_random_chat_state(request)
         return Response(payload, status=status.HTTP_200_OK)
 
     def delete(self, request):
-        perform_randomchat_housekeeping()
-        RandomChatQueueEntry.objects.filter(user=request.user).delete()
-        end_random_sessions_for(request.user)
+        leave_random_queue(request.user)
         return Response({"detail": "랜덤 채팅 대기열에서 나갔습니다."}, status=status.HTTP_200_OK)
 
 
@@ -64,28 +61,11 @@ class RandomChatMatchView(APIView):
     throttle_classes = [RandomChatThrottle]
 
     def post(self, request):
-        perform_randomchat_housekeeping()
-        with transaction.atomic():
-            try:
-                own_entry = RandomChatQueueEntry.objects.select_for_update().get(user=request.user)
-            except RandomChatQueueEntry.DoesNotExist:
-                own_entry = RandomChatQueueEntry.objects.create(user=request.user)
-            candidates = list(
-                RandomChatQueueEntry.objects.select_for_update().exclude(user=request.user)
+        if match_random_partner(request.user) is None:
+            return Response(
+                {"detail": "대기 중인 다른 이용자가 없습니다. 잠시만 기다려 주세요."},
+                status=status.HTTP_202_ACCEPTED,
             )
-            if not candidates:
-                return Response(
-                    {"detail": "대기 중인 다른 이용자가 없습니다. 잠시만 기다려 주세요."},
-                    status=status.HTTP_202_ACCEPTED,
-                )
-            partner_entry = random.choice(candidates)
-            partner_user = partner_entry.user
-            partner_entry.delete()
-            own_entry.delete()
-
-        end_random_sessions_for(request.user)
-        end_random_sessions_for(partner_user)
-        RandomChatSession.objects.create(participant_a=request.user, participant_b=partner_user)
         payload = build_random_chat_state(request)
         return Response(payload, status=status.HTTP_201_CREATED)
 
@@ -101,7 +81,6 @@ class RandomChatMessageView(APIView):
         return session
 
     def get(self, request):
-        perform_randomchat_housekeeping()
         session = get_active_random_session(request.user)
         if not session:
             return Response({"messages": []}, status=status.HTTP_200_OK)
@@ -116,7 +95,6 @@ class RandomChatMessageView(APIView):
         return Response({"messages": serializer.data}, status=status.HTTP_200_OK)
 
     def post(self, request):
-        perform_randomchat_housekeeping()
         session = self._ensure_session(request)
         serializer = RandomChatMessageSerializer(
             data=request.data,
@@ -0,0 +1,191 @@
+import { ref } from 'vue'
+import { getApiBaseUrl, loadAuthToken } from '@/services/api'
+
+// 채팅방 여러 개와 내 채팅방 inbox 를 /ws/stream/ 연결 하나로 구독한다. 컴포넌트끼리 같은 소켓을 공유한다.
+const INBOX_STREAM = 'inbox'
+const RECONNECT_DELAY = 3000
+const ACK_EVERY = 20
+
+const status = ref('idle') // idle | connecting | open | closed
+const listeners = new Map()
+let socket = null
+let reconnectTimer = null
+let receivedFrames = 0
+
+export const roomStreamName = (roomId) => `room:${roomId}`
+
+const resolveWsOrigin = () => {
+  if (typeof window === 'undefined') return null
+  const runtimeBase = getApiBaseUrl()
+  try {
+    const absolute = new URL(runtimeBase, window.location.origin)
+    const protocol = absolute.protocol === 'https:' ? 'wss:' : 'ws:'
+    return `${protocol}//${absolute.host}`
+  } catch {
+    if (!window.location?.host) {
+      return null
+    }
+    const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:'
+    return `${protocol}//${window.location.host}`
+  }
+}
+
+const isOpen = () => socket?.readyState === WebSocket.OPEN
+
+const dispatch = (name, data) => {
+  listeners.get(name)?.forEach((listener) => listener.onEvent(data))
+  if (data?.event === 'unsubscribed') {
+    listeners.delete(name)
+  }
+}
+
+const roomRequest = (name) => {
+  const seqs = [...(listeners.get(name) || [])].map((listener) => listener.lastSeq?.() || 0)
+  const lastSeq = seqs.length ? Math.min(...seqs) : 0
+  const id = Number(name.split(':')[1])
+  return lastSeq ? { id, last_seq: lastSeq } : id
+}
+
+const sendRaw = (payload) => {
+  if (!isOpen()) return false
+  try {
+    socket.send(JSON.stringify(payload))
+    return true
+  } catch (error) {
+    console.error('WebSocket 전송 오류', error)
+    return false
+  }
+}
+
+const handleMessage = (event) => {
+  receivedFrames += 1
+  if (receivedFrames % ACK_EVERY === 0) {
+    sendRaw({ action: 'ack', received: receivedFrames })
+  }
+  try {
+    const data = JSON.parse(event.data)
+    if (data.event === 'subscribed') {
+      Object.entries(data.streams || {}).forEach(([name, frames]) => frames.forEach((frame) => dispatch(name, frame)))
+    } else if (data.stream) {
+      dispatch(data.stream, data.data)
+    } else {
+      listeners.forEach((_set, name) => dispatch(name, data))
+    }
+  } catch (error) {
+    console.error('WebSocket 메시지 파싱 실패', error)
+  }
+}
+
+const connect = () => {
+  if (socket || !listeners.size) return
+  const token = loadAuthToken()
+  const origin = resolveWsOrigin()
+  if (!token || !origin) {
+    status.value = 'idle'
+    return
+  }
+  status.value = 'connecting'
+  receivedFrames = 0
+  const current = new WebSocket(`${origin}/ws/stream/?token=${encodeURIComponent(token)}`)
+  socket = current
+  current.addEventListener('open', () => {
+    status.value = 'open'
+    sendRaw({ action: 'ack', received: 0 })
+    const roomNames = [...listeners.keys()].filter((name) => name !== INBOX_STREAM)
+    sendRaw({ action: 'subscribe', rooms: roomNames.map(roomRequest), inbox: listeners.has(INBOX_STREAM) })
+  })
+  current.addEventListener('message', handleMessage)
+  current.addEventListener('close', () => {
+    if (socket !== current) return
+    socket = null
+    if (!listeners.size) {
+      status.value = 'idle'
+      return
+    }
+    status.value = 'closed'
+    reconnectTimer = window.setTimeout(() => {
+      reconnectTimer = null
+      connect()
+    }, RECONNECT_DELAY)
+  })
+  current.addEventListener('error', (event) => {
+    console.error('WebSocket error', event)
+  })
+}
+
+const disconnectIfIdle = () => {
+  if (listeners.size) return
+  if (reconnectTimer) {
+    clearTimeout(reconnectTimer)
+    reconnectTimer = null
+  }
+  const current = socket
+  socket = null
+  status.value = 'idle'
+  try {
+    current?.close()
+  } catch {
+    // ignore
+  }
+}
+
+const subscribeRoom = (roomId, listener) => {
+  const name = roomStreamName(roomId)
+  const existing = listeners.get(name)
+  if (existing) {
+    existing.add(listener)
+    sendRaw({ stream: name, action: 'fetch_history' })
+    return
+  }
+  listeners.set(name, new Set([listener]))
+  if (isOpen()) {
+    sendRaw({ action: 'subscribe', rooms: [roomRequest(name)] })
+  } else {
+    connect()
+  }
+}
+
+const unsubscribeRoom = (roomId, listener) => {
+  const name = roomStreamName(roomId)
+  const existing = listeners.get(name)
+  if (!existing) return
+  existing.delete(listener)
+  if (!existing.size) {
+    listeners.delete(name)
+    sendRaw({ action: 'unsubscribe', streams: [name] })
+  }
+  disconnectIfIdle()
+}
+
+const sendToRoom = (roomId, payload) => sendRaw({ stream: roomStreamName(roomId), ...payload })
+
+// listener.onEvent 는 처음에 { event: 'inbox', rooms }, 이후 { event: 'unread', room_id, unread_count } 를 받는다.
+const subscribeInbox = (listener) => {
+  const existing = listeners.get(INBOX_STREAM)
+  if (existing) {
+    existing.add(listener)
+    sendRaw({ stream: INBOX_STREAM, action: 'fetch_inbox' })
+    return
+  }
+  listeners.set(INBOX_STREAM, new Set([listener]))
+  if (isOpen()) {
+    sendRaw({ action: 'subscribe', inbox: true })
+  } else {
+    connect()
+  }
+}
+
+const unsubscribeInbox = (listener) => {
+  const existing = listeners.get(INBOX_STREAM)
+  if (!existing) return
+  existing.delete(listener)
+  if (!existing.size) {
+    listeners.delete(INBOX_STREAM)
+    sendRaw({ action: 'unsubscribe', streams: [INBOX_STREAM] })
+  }
+  disconnectIfIdle()
+}
+
+export function useChatStream() {
+  return { status, subscribeRoom, unsubscribeRoom, sendToRoom, subscribeInbox, unsubscribeInbox }
+}
@@ -170,6 +170,7 @@ const buildQueryString = (params = {}) => {
 }
 
 export const fetchChatRooms = () => request('/chat/rooms')
+export const fetchMyChatRooms = () => request('/chat/rooms/mine')
 export const createChatRoom = (body) => request('/chat/rooms', { method: 'POST', body })
 export const joinChatRoom = (body) => request('/chat/rooms/join', { method: 'POST', body })
 export const leaveChatRoom = (roomId) => request(`/chat/rooms/${roomId}/leave`, { method: 'POST' })
@@ -177,6 +178,9 @@ export const fetchChatMessages = (roomId, params) =>
   request(`/chat/rooms/${roomId}/messages${buildQueryString(params)}`)
 export const postChatMessage = (roomId, body) =>
   request(`/chat/rooms/${roomId}/messages`, { method: 'POST', body })
+export const searchChatMessages = (params, roomId = null) =>
+  request(`${roomId ? `/chat/rooms/${roomId}` : '/chat'}/messages/search${buildQueryString(params)}`)
+export const searchPosts = (params) => request(`/boards/posts/search${buildQueryString(params)}`)
 
 export const fetchRandomChatState = (params) => request(`/random-chat/state${buildQueryString(params)}`)
 export const joinRandomChatQueue = () => request('/random-chat/queue', { method: 'POST' })